@@ -2,20 +2,37 @@
 # Importar_BD_Geral_fast.py — versão “à prova de 429/503”
 #
 # Requisitos:
-#   pip install gspread google-auth gspread-formatting
+#   pip install gspread google-auth google-api-python-client gspread-formatting
 # Credenciais:
 #   credenciais.json na mesma pasta.
 
 import re
+import sys
+import atexit
 import time
 import random
+import itertools
+import threading
 import unicodedata
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
 from datetime import datetime, timezone, timedelta
 
 import gspread
-from google.oauth2.service_account import Credentials
 from gspread.exceptions import APIError, WorksheetNotFound
 
+import estado
+import janelas
+import paralelo
+import perfil
+import sessao
+import telemetria
+from conversores import parse_number_brazil, to_date_serial_keep, to_time_serial_keep
+from cota import AdaptiveRateLimiter, retry_after_seconds, shared_limiters
+from lotes import chunk_data_batch, count_cells_in_entry, entrada, materializar
+
 try:
     from gspread_formatting import format_cell_range, CellFormat, NumberFormat
     HAS_FMT = True
@@ -50,13 +67,51 @@ MAX_RETRIES = 10                 # retries por chamada (get, batch_update, etc.)
 DEST_RETRIES = 6                 # retries por destino
 DEST_ROUNDS  = 5                 # rodadas extras p/ pendentes
 
-BASE_SLEEP = 1.2                 # base do backoff exponencial
-SLEEP_BETWEEN_BATCHES = 6.0      # pausa entre micro-batches de escrita (seg)
-SLEEP_BETWEEN_DESTINOS = 2.0     # pausa entre destinos (seg)
-RATE_LIMIT_COOLDOWN_BASE = 15.0  # cooldown extra em 429 (multiplica por tentativa)
+BASE_SLEEP = 1.2                 # base do backoff exponencial (erros 5xx)
+
+# Concorrência entre destinos
+DEST_WORKERS = 4                 # destinos processados em paralelo (threads)
+# Modo multiprocesso (opcional): >1 processa os destinos em DEST_PROCESSOS processos (filtro,
+# seleção e deduplicação em Python puro deixam de disputar o GIL). A FONTE vai 1x para memória
+# compartilhada (armazenamento colunar) e a cota é uma só entre os processos. 0/1 = threads.
+DEST_PROCESSOS = 0
+
+# Cota adaptativa (AIMD) por minuto — substitui pausas fixas e cooldown cego em 429.
+# O Sheets conta 60 leituras e 60 escritas/min por usuário; parte-se um pouco abaixo.
+ESCRITAS_POR_MINUTO = 50         # taxa inicial de escritas/min
+LEITURAS_POR_MINUTO = 50         # taxa inicial de leituras/min
+COTA_MIN_POR_MINUTO = 10         # piso da taxa após 429 seguidos
+COTA_MAX_POR_MINUTO = 60         # teto da taxa sem 429
 
 CHUNK = 1000                     # linhas por bloco de dados (cada bloco vira 1 range)
 MAX_CELLS_PER_BATCH = 49000      # células por micro-batch (mantém sob limites)
+ESCRITAS_PARALELAS = 4           # micro-batches de 'bd' de um destino enviados ao mesmo tempo (intervalos disjuntos)
+LEITURA_JANELA = 5000            # linhas por janela na leitura de bd_geral (values.batchGet + prefetch)
+
+# Sincronização incremental da aba 'bd': guarda (em estado.ESTADO_DIR) o hash de cada
+# bloco de CHUNK linhas e reenvia só os blocos alterados. Sem estado válido → limpa e reescreve.
+# O estado guarda também o carimbo de Resumo_MENSAL!I2 gravado junto: se a planilha tiver outro
+# (estado velho restaurado do cache, execução concorrente), o destino é reescrito inteiro.
+SYNC_INCREMENTAL = True
+ESTADO_SYNC = "sync_bd"
+
+# Armazenamento colunar tipado de bd_geral (opcional): converte tipos 1x e guarda
+# cada coluna num vetor (array) em vez de lista de listas de str
+USAR_COLUNAR = False
+
+# Pula o destino se a FONTE (modifiedTime no Drive) e os filtros dele não mudaram desde a última
+# sincronização concluída; 'bd_geral' só é lido se algum destino precisar
+PULAR_SE_INALTERADO = True
+
+# Snapshot local de bd_geral gravado pelo ponto_geral.py com GERAR_SNAPSHOT (estado.ESTADO_DIR/snapshot): se a
+# planilha FONTE não mudou desde a gravação (modifiedTime no Drive), evita o get_all_values.
+# O snapshot guarda os valores formatados, os mesmos da leitura pela API. Desligado como o
+# GERAR_SNAPSHOT de lá (só serve se os dois estiverem ligados).
+USAR_SNAPSHOT = False
+
+# Relatório JSON da execução (telemetria.py: tempo por etapa, chamadas/429/retries por destino);
+# "" = só o resumo no log
+RELATORIO_EXECUCAO = "relatorio_importar_bd_geral.json"
 
 # Formatação (opcional)
 APLICAR_FORMATACAO = False
@@ -72,6 +127,16 @@ FORCAR_TEXTO_HEADERS = {
     "CODIGO","CÓDIGO","ID","OS","TICKET","PROTOCOLO"
 }
 
+# Controladores únicos do processo, compartilhados por todas as threads de destino
+LIMITE_ESCRITA = AdaptiveRateLimiter(ESCRITAS_POR_MINUTO, COTA_MIN_POR_MINUTO, COTA_MAX_POR_MINUTO)
+LIMITE_LEITURA = AdaptiveRateLimiter(LEITURAS_POR_MINUTO, COTA_MIN_POR_MINUTO, COTA_MAX_POR_MINUTO)
+
+# Prefixo de log por thread (identifica o destino quando há vários em paralelo)
+_log_ctx = threading.local()
+
+def log(msg: str = ""):
+    print(f"{getattr(_log_ctx, 'tag', '')}{msg}")
+
 # ==========================
 # Helpers c/ retry
 # ==========================
@@ -80,8 +145,7 @@ def auth_gspread():
         "https://www.googleapis.com/auth/spreadsheets",
         "https://www.googleapis.com/auth/drive",
     ]
-    cred = Credentials.from_service_account_file(CAMINHO_CRED, scopes=scopes)
-    return gspread.authorize(cred)
+    return sessao.cliente_gspread(sessao.credenciais(CAMINHO_CRED, scopes))
 
 def get_http_status(err: Exception) -> int | None:
     if isinstance(err, APIError):
@@ -106,63 +170,83 @@ def is_transient_error(err: Exception) -> bool:
         return True
     return False
 
-def retry_sleep(i, extra: float = 0.0):
-    time.sleep(BASE_SLEEP * (2 ** (i - 1)) + random.uniform(0, 0.6) + extra)
+def is_rate_limit_error(err: Exception) -> bool:
+    return get_http_status(err) == 429 or "quota exceeded" in str(err).lower()
 
-def with_retry(fn, *args, **kwargs):
+def retry_sleep(i, extra: float = 0.0):
+    pausa = BASE_SLEEP * (2 ** (i - 1)) + random.uniform(0, 0.6) + extra
+    telemetria.contar("backoff_s", pausa)
+    time.sleep(pausa)
+
+def call_with_quota(limiter, cells, fn, *args, **kwargs):
+    """
+    Chamada com retry sob o controlador de cota: espera a janela do minuto permitir,
+    em 429 reduz a taxa e pausa (Retry-After, se vier); em 5xx usa backoff exponencial.
+    """
     for i in range(1, MAX_RETRIES + 1):
+        telemetria.contar("espera_cota_s", limiter.acquire(cells))
         try:
-            return fn(*args, **kwargs)
+            out = fn(*args, **kwargs)
         except Exception as e:
-            transient = is_transient_error(e)
-            code = get_http_status(e)
-            if not transient or i == MAX_RETRIES:
+            if not is_transient_error(e) or i == MAX_RETRIES:
                 raise
-            extra = 0.0
-            if code == 429:
-                extra = RATE_LIMIT_COOLDOWN_BASE * i
-                print(f"   • Rate limit (429). Cooldown {extra:.1f}s antes do retry {i}/{MAX_RETRIES}…")
+            telemetria.contar("retries")
+            if is_rate_limit_error(e):
+                pause = limiter.on_throttle(retry_after_seconds(e))
+                log(f"   • Rate limit (429). Pausa {pause:.1f}s, cota {limiter.rate:.0f}/min; retry {i}/{MAX_RETRIES}…")
             else:
-                print(f"   • Falha transitória ({code}). Retry {i}/{MAX_RETRIES}…")
-            retry_sleep(i, extra=extra)
+                log(f"   • Falha transitória ({get_http_status(e)}). Retry {i}/{MAX_RETRIES}…")
+                retry_sleep(i)
+            continue
+        limiter.on_success()
+        telemetria.contar("celulas_enviadas", cells)
+        return out
+
+def with_retry(fn, *args, **kwargs):
+    return call_with_quota(LIMITE_LEITURA, 0, fn, *args, **kwargs)
 
-def safe_open_spreadsheet(gc, spreadsheet_id_or_url):
+def spreadsheet_id(spreadsheet_id_or_url):
     m = re.search(r"/spreadsheets/d/([a-zA-Z0-9-_]+)", spreadsheet_id_or_url)
-    ssid = m.group(1) if m else spreadsheet_id_or_url.strip()
+    return m.group(1) if m else spreadsheet_id_or_url.strip()
+
+def safe_open_spreadsheet(planilhas, spreadsheet_id_or_url):
+    """Abre pelo cache de metadados (sessao.CacheDePlanilhas): novas tentativas não relêem a planilha."""
+    ssid = spreadsheet_id(spreadsheet_id_or_url)
     for i in range(1, MAX_RETRIES + 1):
         try:
-            return gc.open_by_key(ssid), ssid
+            return planilhas.planilha(ssid), ssid
         except Exception as e:
             if i == MAX_RETRIES or not is_transient_error(e):
                 raise
+            telemetria.contar("retries")
             retry_sleep(i)
 
-def safe_get_worksheet(spreadsheet, title, create_if_missing=False, rows=1000, cols=60):
+def safe_get_worksheet(planilhas, spreadsheet, title):
     for i in range(1, MAX_RETRIES + 1):
         try:
-            return spreadsheet.worksheet(title)
+            return planilhas.aba(spreadsheet, title)
         except WorksheetNotFound:
-            if create_if_missing:
-                return spreadsheet.add_worksheet(title, rows=rows, cols=cols)
             raise
         except Exception as e:
             if i == MAX_RETRIES or not is_transient_error(e):
                 raise
+            telemetria.contar("retries")
             retry_sleep(i)
 
-def try_batch_clear(ws, rngs):
-    try:
-        with_retry(ws.batch_clear, rngs)
-        return True
-    except Exception:
-        return False
+def write_with_retry(fn, *args, cells=0, **kwargs):
+    return call_with_quota(LIMITE_ESCRITA, cells, fn, *args, **kwargs)
 
-def values_batch_update(spreadsheet, data, value_input_option="RAW"):
+def values_batch_update(http, ssid, data, value_input_option="RAW"):
     body = {"valueInputOption": value_input_option, "data": data}
-    return with_retry(spreadsheet.values_batch_update, body)
+    cells = sum(count_cells_in_entry(e) for e in data)
+    return write_with_retry(http.values_batch_update, ssid, body, cells=cells)
 
-def read_all_values(ws):
-    return with_retry(ws.get_all_values)
+def iter_sheet_rows(spreadsheet, ws, janela=LEITURA_JANELA):
+    """Blocos de linhas da aba (valores formatados, como get_all_values), janela a janela com prefetch."""
+    def fetch(primeira, ultima):
+        res = with_retry(spreadsheet.values_batch_get, [f"'{ws.title}'!{primeira}:{ultima}"])
+        return res.get("valueRanges", [{}])[0].get("values", [])
+    return janelas.iter_windows(fetch, ws.row_count, janela)
 
 def get_range_with_retry(ws, a1_range: str):
     return with_retry(ws.get, a1_range)
@@ -191,115 +275,240 @@ def letter_to_index(letter: str) -> int:
 def a1_last_col_letter(ncols: int) -> str:
     return gspread.utils.rowcol_to_a1(1, ncols).split("1")[0]
 
-def a1(ws, rng: str) -> str:
-    return f"'{ws.title}'!{rng}"
-
-# ======== Converters (sem apóstrofo) ========
-TZ = TZ_SAO_PAULO
-
-def serial_from_datetime(dt: datetime) -> float:
-    base = datetime(1899, 12, 30, tzinfo=TZ)
-    delta = dt - base
-    return delta.days + (delta.seconds + delta.microseconds / 1e6) / 86400.0
-
-def to_date_serial_keep(v):
-    if v is None or v == "": return ""
-    if isinstance(v, (int, float)):
-        try: return float(v)
-        except Exception: return v
-    s = str(v).strip()
-    m = re.match(r"^(\d{2})/(\d{2})/(\d{4})(?:\s+\d{2}:\d{2}(?::\d{2})?)?$", s)
-    if m:
-        d, mth, y = int(m.group(1)), int(m.group(2)), int(m.group(3))
-        dt = datetime(y, mth, d, tzinfo=TZ)
-        return serial_from_datetime(dt)
-    try:
-        dt = datetime.fromisoformat(s)
-        if dt.tzinfo is None: dt = dt.replace(tzinfo=TZ)
-        dt = dt.replace(hour=0, minute=0, second=0, microsecond=0)
-        return serial_from_datetime(dt)
-    except Exception:
-        try: return float(s)
-        except Exception: return s
-
-def to_time_serial_keep(v):
-    if v is None or v == "": return ""
-    if isinstance(v, (int, float)):
-        try: return float(v)
-        except Exception: return v
-    s = str(v).strip()
-    m = re.match(r"^(\d{1,2}):(\d{2})(?::(\d{2}))?$", s)
-    if m:
-        hh = int(m.group(1)); mm = int(m.group(2)); ss = int(m.group(3) or 0)
-        return (hh*3600 + mm*60 + ss) / 86400.0
-    m = re.match(r"^\d{2}/\d{2}/\d{4}\s+(\d{1,2}):(\d{2})(?::(\d{2}))?$", s)
-    if m:
-        hh = int(m.group(1)); mm = int(m.group(2)); ss = int(m.group(3) or 0)
-        return (hh*3600 + mm*60 + ss) / 86400.0
-    try:
-        dt = datetime.fromisoformat(s)
-        if dt.tzinfo is None: dt = dt.replace(tzinfo=TZ)
-        return (dt.hour*3600 + dt.minute*60 + dt.second) / 86400.0
-    except Exception:
-        try: return float(s)
-        except Exception: return s
-
-def is_zero_left_string(s: str) -> bool:
-    return bool(re.match(r"^0\d+$", s.strip()))
-
-def parse_number_brazil(x):
-    if x is None: return ""
-    if isinstance(x, (int, float)): return float(x)
-    s = str(x).strip()
-    if re.search(r"[A-Za-z]", s): return s
-    if is_zero_left_string(s): return s
-    s2 = s.replace(".", "").replace(",", ".")
-    s2 = re.sub(r"[^0-9\.\-]", "", s2)
-    if re.fullmatch(r"-?\d+(\.\d+)?", s2):
-        try: return float(s2)
-        except Exception: return s
-    return s
-
-# ======== Micro-batching ========
-def count_cells_in_entry(entry):
-    rng = entry["range"].split("!", 1)[1]
-    if ":" not in rng:
-        return 1
-    a1_start, a1_end = rng.split(":")
-    r1, c1 = gspread.utils.a1_to_rowcol(a1_start)
-    r2, c2 = gspread.utils.a1_to_rowcol(a1_end)
-    return (r2 - r1 + 1) * (c2 - c1 + 1)
-
-def chunk_data_batch(entries, max_cells=MAX_CELLS_PER_BATCH):
-    chunk, cells = [], 0
-    for e in entries:
-        e_cells = count_cells_in_entry(e)
-        if cells + e_cells > max_cells and chunk:
-            yield chunk
-            chunk, cells = [], 0
-        chunk.append(e); cells += e_cells
-    if chunk: yield chunk
+def a1(title: str, rng: str) -> str:
+    return f"'{title}'!{rng}"
+
+# ======== Codificação por dicionário ========
+def encode_column(values):
+    """Codifica uma sequência de str: retorna (códigos por linha, valores distintos)."""
+    code_of = {}
+    distinct = []              # código -> valor
+    codes = array("i")         # linha -> código
+    for val in values:
+        code = code_of.get(val)
+        if code is None:
+            code = len(distinct)
+            code_of[val] = code
+            distinct.append(val)
+        codes.append(code)
+    return codes, distinct
+
+# ======== Coluna D codificada por dicionário (filtro "contém") ========
+def build_d_dictionary(valores_d):
+    """
+    Codifica a coluna D: cada valor distinto recebe um código inteiro, normalizado uma única vez.
+    Montado 1x na leitura da FONTE; os destinos só consultam códigos.
+    """
+    codes, orig = encode_column(valores_d)
+    postings = [[] for _ in orig]  # código -> linhas (em ordem)
+    for i, code in enumerate(codes):
+        postings[code].append(i)
+    norm = [normalize_for_match(v) for v in orig]
+    return {"codes": codes, "orig": orig, "norm": norm, "postings": postings, "cache": {}}
+
+def match_d_dictionary(col_d, filtros_set):
+    """
+    Retorna (linhas em ordem, valores originais de D encontrados) para o conjunto de filtros.
+    O teste de substring roda 1x por valor distinto; o resultado fica em cache por conjunto de filtros.
+    """
+    key = frozenset(filtros_set)
+    hit = col_d["cache"].get(key)
+    if hit is None:
+        hit = [c for c, val_norm in enumerate(col_d["norm"])
+               if val_norm and any(f in val_norm for f in key)]
+        col_d["cache"][key] = hit
+    linhas = []
+    for c in hit:
+        linhas.extend(col_d["postings"][c])
+    linhas.sort()
+    return linhas, {col_d["orig"][c] for c in hit}
+
+# ======== Plano de conversão (1x por execução) ========
+CONVERTERS = {"date": to_date_serial_keep, "time": to_time_serial_keep, "number": parse_number_brazil}
+
+def column_kinds(headers, ncols):
+    """Tipo de cada coluna: A(data), TIME_COLS, NUMBER_COLS (exceto cabeçalhos forçados a texto)."""
+    kinds = ["text"] * ncols
+    if ncols:
+        kinds[0] = "date"  # A(data)
+    for col_letter in TIME_COLS:
+        j = letter_to_index(col_letter)
+        if j < ncols:
+            kinds[j] = "time"
+    for col_letter in NUMBER_COLS:
+        j = letter_to_index(col_letter)
+        if j < ncols and clean_cell(headers[j]).upper() not in FORCAR_TEXTO_HEADERS:
+            kinds[j] = "number"
+    return kinds
+
+def build_conversion_plan(headers, ncols):
+    """Lista (índice, conversor) só das colunas que convertem — calculada 1x no main."""
+    return [(j, CONVERTERS[kind]) for j, kind in enumerate(column_kinds(headers, ncols)) if kind != "text"]
+
+def convert_table(corpo_raw, plan, ncols):
+    """Converte a tabela inteira in-place: cada linha é ajustada a ncols e cada célula convertida 1x."""
+    for i, row in enumerate(corpo_raw):
+        if len(row) != ncols:
+            row = (row + [""] * (ncols - len(row)))[:ncols]
+            corpo_raw[i] = row
+        for j, conv in plan:
+            row[j] = conv(row[j])
+    return corpo_raw
+
+# ======== Armazenamento colunar (USAR_COLUNAR / DEST_PROCESSOS) ========
+# Cada coluna vira um vetor de códigos (array('i')) para os valores distintos da coluna:
+#   "text"                     -> {"codes", "values": [distintos]}
+#   "date" / "time" / "number" -> {"codes", "values", "data": array('d')}
+#     (código -1 = número em data[i]; os demais apontam para as células que não viraram
+#      float — vazias e textos mantidos)
+def new_column_store(headers, ncols):
+    cols = []
+    for kind in column_kinds(headers, ncols):
+        col = {"kind": kind, "codes": array("i"), "values": [], "code_of": {}}
+        if kind != "text":
+            col["data"] = array("d")
+        cols.append(col)
+    return {"nrows": 0, "ncols": ncols, "cols": cols}
+
+def append_column_store(store, rows):
+    """Converte os tipos 1x e acrescenta um bloco de linhas às colunas (linhas curtas completadas com "")."""
+    for j, col in enumerate(store["cols"]):
+        raw = (row[j] if j < len(row) else "" for row in rows)
+        codes, values, code_of = col["codes"], col["values"], col["code_of"]
+        if col["kind"] == "text":
+            for val in raw:
+                code = code_of.get(val)
+                if code is None:
+                    code = len(values)
+                    code_of[val] = code
+                    values.append(val)
+                codes.append(code)
+            continue
+        conv = CONVERTERS[col["kind"]]
+        data = col["data"]
+        for v in raw:
+            x = conv(v)
+            if isinstance(x, float):
+                data.append(x)
+                codes.append(-1)
+                continue
+            data.append(0.0)
+            code = code_of.get(x)
+            if code is None:
+                code = len(values)
+                code_of[x] = code
+                values.append(x)
+            codes.append(code)
+    store["nrows"] += len(rows)
+
+def finish_column_store(store, ncols):
+    """Descarta os índices de montagem e as colunas além de ncols."""
+    store["cols"] = store["cols"][:ncols]
+    store["ncols"] = ncols
+    for col in store["cols"]:
+        col.pop("code_of", None)
+    return store
+
+def column_take(col, idxs):
+    codes, values = col["codes"], col["values"]
+    if col["kind"] == "text":
+        return [values[codes[i]] for i in idxs]
+    data = col["data"]
+    return [data[i] if codes[i] < 0 else values[codes[i]] for i in idxs]
+
+def take_rows(store, idxs):
+    """Materializa (já convertidas) só as linhas pedidas, montando coluna a coluna."""
+    if not idxs:
+        return []
+    return [list(r) for r in zip(*(column_take(c, idxs) for c in store["cols"]))]
+
+def rows_of(tabela, idxs):
+    """Linhas pedidas da fonte: referências (lista de linhas) ou montadas na hora (colunar)."""
+    if isinstance(tabela, dict):
+        return take_rows(tabela, idxs)
+    return [tabela[i] for i in idxs]
 
 # ==========================
 # Pipeline — com retry por DESTINO e RODADAS
 # ==========================
-def process_destino(gc, ss_fonte, headers, corpo_raw, d_original_list, d_normalized_list, ncols, dest):
-    """Processa 1 destino. Retorna True se concluiu, False se falha não-transitória."""
-    ss_dest, ssid = safe_open_spreadsheet(gc, dest)
-    ws_resumo     = safe_get_worksheet(ss_dest, ABA_DESTINO_RESUMO)
-    ws_bd_config  = safe_get_worksheet(ss_dest, ABA_DESTINO_CONFIG, create_if_missing=True)
-    ws_bd_dest    = safe_get_worksheet(ss_dest, ABA_DESTINO_DADOS,  create_if_missing=True)
-
-    time_cols_present = sorted([c for c in TIME_COLS if letter_to_index(c) < ncols], key=lambda x: letter_to_index(x))
-    num_cols_present  = sorted([c for c in NUMBER_COLS if letter_to_index(c) < ncols], key=lambda x: letter_to_index(x))
-
-    print(f"🎯 Destino: {dest}")
+def prepare_destino(planilhas, ssid):
+    """
+    Abas do destino com 1 spreadsheets.get (só sheets.properties; em cache entre tentativas)
+    e, se faltar bd_config/bd, 1 batchUpdate criando as duas de uma vez. Retorna {título: properties}.
+    """
+    props = with_retry(planilhas.propriedades, ssid)
+    if ABA_DESTINO_RESUMO not in props:
+        raise WorksheetNotFound(ABA_DESTINO_RESUMO)
+    faltando = [t for t in (ABA_DESTINO_CONFIG, ABA_DESTINO_DADOS) if t not in props]
+    if faltando:
+        body = {"requests": [
+            {"addSheet": {"properties": {"title": t, "gridProperties": {"rowCount": 1000, "columnCount": 60}}}}
+            for t in faltando
+        ]}
+        res = write_with_retry(planilhas.gc.http_client.batch_update, ssid, body)
+        for reply in res.get("replies", []):
+            planilhas.registrar_propriedades(ssid, reply["addSheet"]["properties"])
+    return props
+
+class DiarioDeEscrita:
+    """
+    Estado de sync de 'bd' regravado a cada micro-batch aceito: se a execução cair no meio
+    (timeout do job, erro), a próxima reenvia só o cabeçalho/blocos que ficaram sem confirmação.
+    Enquanto houver pendências o registro fica sem 'fonte' (o destino não conta como concluído).
+    """
+
+    def __init__(self, ssid, sync_novo, pendentes, header_pendente, rows, carimbo):
+        pendentes = set(pendentes)
+        self.ssid = ssid
+        self.sync_novo = sync_novo
+        self.registro = dict(
+            sync_novo, rows=rows, fonte=None, carimbo=carimbo,  # I2 ainda é o da planilha
+            header=None if header_pendente else sync_novo["header"],
+            blocks=[None if i in pendentes else h for i, h in enumerate(sync_novo["blocks"])])
+        self.marcas = {}  # id(entrada) → "header" ou índice do bloco
+        self.lock = threading.Lock()  # lotes de 'bd' confirmados por várias threads
+        estado.save(ESTADO_SYNC, ssid, self.registro)
+
+    def marcar(self, entrada, chave):
+        self.marcas[id(entrada)] = chave
+
+    def enviado(self, parte):
+        """Registra as entradas marcadas de um micro-batch já aceito pela API."""
+        chaves = [self.marcas[id(e)] for e in parte if id(e) in self.marcas]
+        if not chaves:
+            return
+        with self.lock:
+            for chave in chaves:
+                if chave == "header":
+                    self.registro["header"] = self.sync_novo["header"]
+                else:
+                    self.registro["blocks"][chave] = self.sync_novo["blocks"][chave]
+            estado.save(ESTADO_SYNC, self.ssid, self.registro)
+
+def process_destino(planilhas, fonte, dest):
+    """
+    Processa 1 destino. Retorna True se concluiu, False se falha não-transitória.
+    Chamadas por destino: metadados (+ criação de abas, se faltar), 1 values.batchGet dos filtros e de I2,
+    1 values.batchClear com todas as limpezas e os values.batchUpdate dos dados.
+    """
+    ssid = spreadsheet_id(dest)
+    http = planilhas.gc.http_client
+    with telemetria.etapa("destino.preparo"):
+        props = prepare_destino(planilhas, ssid)
+    bd_sheet_id = props[ABA_DESTINO_DADOS]["sheetId"]
+
+    log(f"🎯 Destino: {dest}")
 
     # ===== Lê filtros =====
     try:
-        filtros_vals = get_range_with_retry(ws_bd_config, RANGE_FILTROS)
+        with telemetria.etapa("destino.leitura_filtros"):
+            res = with_retry(http.values_batch_get, ssid, [a1(ABA_DESTINO_CONFIG, RANGE_FILTROS),
+                                                           a1(ABA_DESTINO_RESUMO, CEL_RESUMO_TIMESTAMP_H)])
+        faixas = res.get("valueRanges", []) + [{}, {}]
+        filtros_vals = faixas[0].get("values", [])
+        carimbo = clean_cell((faixas[1].get("values") or [[""]])[0][0])
     except Exception as e:
-        print(f"❌ Erro lendo '{ABA_DESTINO_CONFIG}!{RANGE_FILTROS}' em {ssid}: {e}")
+        log(f"❌ Erro lendo '{ABA_DESTINO_CONFIG}!{RANGE_FILTROS}' em {ssid}: {e}")
         if is_transient_error(e):
             raise
         return False
@@ -313,225 +522,565 @@ def process_destino(gc, ss_fonte, headers, corpo_raw, d_original_list, d_normali
     filtros_set = set(f for f in filtros_norm if f)
 
     if not filtros_set:
-        print(f"⚠️ Sem filtros em '{ABA_DESTINO_CONFIG}!{RANGE_FILTROS}'. Pulando destino.")
+        log(f"⚠️ Sem filtros em '{ABA_DESTINO_CONFIG}!{RANGE_FILTROS}'. Pulando destino.")
         return True
 
-    # ===== Filtra pela coluna D (contém) =====
-    linhas_filtradas = []
-    termos_encontrados_orig = set()
-    for i, row in enumerate(corpo_raw):
-        if len(row) < ncols:
-            row = row + [""] * (ncols - len(row))
-        val_d_norm = d_normalized_list[i]
-        if not val_d_norm:
-            continue
-        if any(f in val_d_norm for f in filtros_set):
-            linhas_filtradas.append(row[:ncols])
-            termos_encontrados_orig.add(d_original_list[i])
-
-    total = len(linhas_filtradas)
-    print(f"   • Filtros: {sorted(filtros_set)}")
-    print(f"   • Linhas filtradas: {total}")
-
-    # ===== Converte tipos =====
-    conv_rows = []
-    for r in linhas_filtradas:
-        r2 = r[:]
-        r2[0] = to_date_serial_keep(r2[0])  # A(data)
-        for col_letter in time_cols_present:
-            j = letter_to_index(col_letter)
-            if 0 <= j < ncols:
-                r2[j] = to_time_serial_keep(r2[j])
-        for col_letter in num_cols_present:
-            j = letter_to_index(col_letter)
-            if 0 <= j < ncols:
-                h = clean_cell(headers[j]).upper()
-                if h not in FORCAR_TEXTO_HEADERS:
-                    r2[j] = parse_number_brazil(r2[j])
-        conv_rows.append(r2)
+    # ===== Fonte e filtros inalterados desde a última sincronização concluída? =====
+    filtros_hash = estado.rows_hash(sorted(filtros_set))
+    sync_prev = estado.load(ESTADO_SYNC, ssid) if SYNC_INCREMENTAL else None
+    if sync_prev is not None and sync_prev.get("carimbo") != carimbo:
+        log(f"   • Estado de sincronização não confere com {ABA_DESTINO_RESUMO}!{CEL_RESUMO_TIMESTAMP_H} "
+            f"('{sync_prev.get('carimbo')}' ≠ '{carimbo}'): reescrevendo o destino inteiro.")
+        sync_prev = None
+    if (PULAR_SE_INALTERADO and sync_prev is not None and fonte.modified
+            and sync_prev.get("fonte") == fonte.modified and sync_prev.get("filtros") == filtros_hash
+            and sync_prev.get("sheet_id") == bd_sheet_id):
+        log(f"⏭️ Fonte e filtros inalterados desde a última sincronização ({fonte.modified}). Pulando destino.")
+        return True
+
+    dados_fonte = fonte.get()
+    if dados_fonte is None:
+        log(f"⚠️ '{ABA_FONTE_DADOS}' vazio. Pulando destino.")
+        return True
+    headers, tabela, col_d, ncols = dados_fonte
+    time_cols_present = sorted([c for c in TIME_COLS if letter_to_index(c) < ncols], key=lambda x: letter_to_index(x))
+    num_cols_present  = sorted([c for c in NUMBER_COLS if letter_to_index(c) < ncols], key=lambda x: letter_to_index(x))
+
+    # ===== Filtra pela coluna D (contém) e seleciona as linhas (tipos já convertidos 1x no main) =====
+    with telemetria.etapa("destino.filtro"):
+        linhas_idx, termos_encontrados_orig = match_d_dictionary(col_d, filtros_set)
+        if isinstance(tabela, dict):  # armazenamento colunar
+            col_b = column_take(tabela["cols"][1], linhas_idx) if ncols > 1 else []
+        else:
+            col_b = [tabela[i][1] for i in linhas_idx] if ncols > 1 else []
+    total = len(linhas_idx)
+    log(f"   • Filtros: {sorted(filtros_set)}")
+    log(f"   • Linhas filtradas: {total}")
 
     # ===== Escrita em lote =====
     try:
-        try:
-            with_retry(ws_bd_dest.clear)
-        except Exception:
-            pass
-
         last_col_letter = a1_last_col_letter(ncols)
-        data_batch = []
-
-        # Cabeçalho
-        data_batch.append({"range": a1(ws_bd_dest, "A1"), "values": [headers]})
-
-        # Dados
-        if total > 0:
-            row_cursor = 2
-            start = 0
-            while start < total:
-                chunk = conv_rows[start:start + CHUNK]
-                rng = a1(ws_bd_dest, f"A{row_cursor}:{last_col_letter}{row_cursor + len(chunk) - 1}")
-                data_batch.append({"range": rng, "values": chunk})
-                start += CHUNK
-                row_cursor += len(chunk)
+        dados_bd = []  # cabeçalho e blocos de 'bd' (intervalos disjuntos, enviados em paralelo)
+        finais = []    # Resumo_MENSAL, bd_config e por último I2 (só depois de 'bd' inteira)
+
+        # Timestamp de I2: vai no último lote e também no estado (carimbo da sincronização)
+        stamp = datetime.now(TZ_SAO_PAULO).strftime("%d/%m/%Y %H:%M:%S")
+
+        # ===== Sincronização de 'bd' por blocos de CHUNK linhas =====
+        # As linhas de um bloco são montadas na hora (hash agora; valores de novo no envio, só para os
+        # alterados): nunca há mais que os blocos em voo convertidos na memória.
+        idx_blocos = [linhas_idx[start:start + CHUNK] for start in range(0, total, CHUNK)]
+        with telemetria.etapa("destino.hash"):
+            sync_novo = {
+                "sheet_id": bd_sheet_id, "ncols": ncols, "chunk": CHUNK,
+                "header": estado.rows_hash([headers]), "rows": total,
+                "blocks": [estado.rows_hash(rows_of(tabela, idxs)) for idxs in idx_blocos],
+                "fonte": fonte.modified, "filtros": filtros_hash, "carimbo": stamp,
+            }
+        # cabeçalho None = envio interrompido com 'bd' já limpa: retoma e reenvia o cabeçalho
+        incremental = sync_prev is not None and all(
+            sync_prev.get(k) == sync_novo[k] for k in ("sheet_id", "ncols", "chunk")) \
+            and sync_prev.get("header") in (sync_novo["header"], None)
+        diario = None
+
+        # Limpezas do destino (Resumo C7:C, bd_config A2:A e 'bd') num único values.batchClear
+        limpezas = [a1(ABA_DESTINO_RESUMO, f"{RESUMO_UNICOS_COL}{B_UNICOS_START_ROW}:{RESUMO_UNICOS_COL}"),
+                    a1(ABA_DESTINO_CONFIG, "A2:A")]
+        sobra_bd = incremental and total < sync_prev["rows"]
+        if incremental:
+            alterados = estado.changed_blocks(sync_prev["blocks"], sync_novo["blocks"])
+            retomados = sum(1 for h in sync_prev["blocks"] if h is None)
+            if retomados:
+                log(f"   • Retomando envio interrompido: {retomados} bloco(s) sem confirmação.")
+            log(f"   • Sincronização incremental: {len(alterados)}/{len(idx_blocos)} bloco(s) alterado(s).")
+            # Até concluir, os blocos em escrita ficam "desconhecidos" (forçam reenvio se falhar no meio)
+            header_pendente = sync_prev.get("header") is None
+            diario = DiarioDeEscrita(ssid, sync_novo, alterados, header_pendente=header_pendente,
+                                     rows=max(sync_prev["rows"], total), carimbo=carimbo)
+            if header_pendente:
+                dados_bd.append(entrada(a1(ABA_DESTINO_DADOS, "A1"), [headers]))
+                diario.marcar(dados_bd[0], "header")
+            if sobra_bd:
+                limpezas.append(a1(ABA_DESTINO_DADOS, f"A{total + 2}:{last_col_letter}{sync_prev['rows'] + 1}"))
         else:
-            print("   • Sem linhas para colar (somente cabeçalho).")
+            alterados = range(len(idx_blocos))
+            estado.delete(ESTADO_SYNC, ssid)
+            limpezas.append(f"'{ABA_DESTINO_DADOS}'")  # aba inteira, como Worksheet.clear
+            # Cabeçalho
+            dados_bd.append(entrada(a1(ABA_DESTINO_DADOS, "A1"), [headers]))
+        try:
+            with telemetria.etapa("destino.limpeza"):
+                write_with_retry(http.values_batch_clear, ssid, body={"ranges": limpezas})
+            limpou = True
+        except Exception:
+            if sobra_bd:
+                raise  # linhas antigas ficariam abaixo dos dados novos
+            limpou = False  # Resumo/bd_config: sobrescreve com vazios (abaixo)
+        if SYNC_INCREMENTAL and not incremental and limpou:
+            # 'bd' vazia: daqui em diante dá para retomar bloco a bloco
+            diario = DiarioDeEscrita(ssid, sync_novo, alterados, header_pendente=True, rows=total, carimbo=carimbo)
+            diario.marcar(dados_bd[0], "header")
+
+        # Dados: entradas preguiçosas (valores montados no envio, lotes.materializar)
+        for b in alterados:
+            row_cursor = 2 + b * CHUNK
+            idxs = idx_blocos[b]
+            rng = a1(ABA_DESTINO_DADOS, f"A{row_cursor}:{last_col_letter}{row_cursor + len(idxs) - 1}")
+            dados_bd.append(entrada(rng, celulas=len(idxs) * ncols, gerar=lambda idxs=idxs: rows_of(tabela, idxs)))
+            if diario is not None:
+                diario.marcar(dados_bd[-1], b)
+        if total == 0:
+            log("   • Sem linhas para colar (somente cabeçalho).")
 
         # ===== Resumo_MENSAL C7:C — únicos da coluna B =====
-        col_b = [clean_cell(r[1]) for r in linhas_filtradas if len(r) > 1]
         unicos_b = sorted(set([v for v in col_b if v != ""]), key=lambda x: x.lower())
         max_clear_b = max(len(unicos_b), 1)
         clear_end_b = B_UNICOS_START_ROW + max_clear_b + 200
 
-        clear_rng_resumo = a1(ws_resumo, f"{RESUMO_UNICOS_COL}{B_UNICOS_START_ROW}:{RESUMO_UNICOS_COL}{clear_end_b}")
-        if not try_batch_clear(ws_resumo, [f"{RESUMO_UNICOS_COL}{B_UNICOS_START_ROW}:{RESUMO_UNICOS_COL}"]):
-            data_batch.append({
-                "range": clear_rng_resumo,
-                "values": [[""] for _ in range(clear_end_b - B_UNICOS_START_ROW + 1)]
-            })
+        clear_rng_resumo = a1(ABA_DESTINO_RESUMO, f"{RESUMO_UNICOS_COL}{B_UNICOS_START_ROW}:{RESUMO_UNICOS_COL}{clear_end_b}")
+        if not limpou:
+            finais.append(entrada(
+                clear_rng_resumo,
+                [[""] for _ in range(clear_end_b - B_UNICOS_START_ROW + 1)]
+            ))
 
         if unicos_b:
-            data_batch.append({
-                "range": a1(ws_resumo, f"{RESUMO_UNICOS_COL}{B_UNICOS_START_ROW}:{RESUMO_UNICOS_COL}{B_UNICOS_START_ROW + len(unicos_b) - 1}"),
-                "values": [[u] for u in unicos_b]
-            })
+            finais.append(entrada(
+                a1(ABA_DESTINO_RESUMO, f"{RESUMO_UNICOS_COL}{B_UNICOS_START_ROW}:{RESUMO_UNICOS_COL}{B_UNICOS_START_ROW + len(unicos_b) - 1}"),
+                [[u] for u in unicos_b]
+            ))
 
         # ===== bd_config A2:A — únicos (originais) da coluna D =====
         unicos_d_orig = sorted([v for v in termos_encontrados_orig if v], key=lambda x: x.casefold())
         clear_end_a = 2 + max(len(unicos_d_orig), 1) + 500
-        if not try_batch_clear(ws_bd_config, ["A2:A"]):
-            data_batch.append({
-                "range": a1(ws_bd_config, f"A2:A{clear_end_a}"),
-                "values": [[""] for _ in range(clear_end_a - 1)]
-            })
+        if not limpou:
+            finais.append(entrada(
+                a1(ABA_DESTINO_CONFIG, f"A2:A{clear_end_a}"),
+                [[""] for _ in range(clear_end_a - 1)]
+            ))
         if unicos_d_orig:
-            data_batch.append({
-                "range": a1(ws_bd_config, f"A2:A{1 + len(unicos_d_orig)}"),
-                "values": [[u] for u in unicos_d_orig]
-            })
+            finais.append(entrada(
+                a1(ABA_DESTINO_CONFIG, f"A2:A{1 + len(unicos_d_orig)}"),
+                [[u] for u in unicos_d_orig]
+            ))
 
         # Timestamp agora em I2
-        stamp = datetime.now(TZ_SAO_PAULO).strftime("%d/%m/%Y %H:%M:%S")
-        data_batch.append({"range": a1(ws_resumo, CEL_RESUMO_TIMESTAMP_H), "values": [[stamp]]})
-
-        # Envia em micro-batches
-        sent_batches = 0
-        for part in chunk_data_batch(data_batch, max_cells=MAX_CELLS_PER_BATCH):
-            values_batch_update(ss_dest, part, value_input_option="RAW")
-            sent_batches += 1
-            total_cells = sum(count_cells_in_entry(x) for x in part)
-            print(f"   • Lote {sent_batches} enviado ({total_cells} células).")
-            time.sleep(SLEEP_BETWEEN_BATCHES)
-        if sent_batches == 0:
-            values_batch_update(ss_dest, data_batch, value_input_option="RAW")
-            print("   • Lote único enviado.")
+        finais.append(entrada(a1(ABA_DESTINO_RESUMO, CEL_RESUMO_TIMESTAMP_H), [[stamp]]))
+
+        # Envia em micro-batches: 'bd' em paralelo (todos sob LIMITE_ESCRITA); um lote que falhe não
+        # interrompe os demais (o diário guarda os confirmados), mas aí Resumo/bd_config/I2 não vão
+        partes_bd = list(enumerate(chunk_data_batch(dados_bd, max_cells=MAX_CELLS_PER_BATCH), 1))
+        tag = getattr(_log_ctx, "tag", "")
+
+        def enviar_bd(item):
+            n, part = item
+            _log_ctx.tag = tag
+            with telemetria.destino(ssid):
+                values_batch_update(http, ssid, materializar(part), value_input_option="RAW")
+            if diario is not None:
+                diario.enviado(part)
+            log(f"   • Lote {n} enviado ({sum(count_cells_in_entry(x) for x in part)} células).")
+
+        with telemetria.etapa("destino.escrita_bd"):
+            resultados = paralelo.fan_out(enviar_bd, partes_bd, ESCRITAS_PARALELAS)
+        falhas = [r["erro"] for r in resultados if not r["ok"]]
+        if falhas:
+            log(f"   • {len(falhas)}/{len(partes_bd)} lote(s) de '{ABA_DESTINO_DADOS}' falharam; "
+                f"{ABA_DESTINO_RESUMO}/{ABA_DESTINO_CONFIG}/{CEL_RESUMO_TIMESTAMP_H} não foram gravados.")
+            raise falhas[0]
+        if len(partes_bd) > 1:
+            res = paralelo.resumo(resultados)
+            log(f"   • '{ABA_DESTINO_DADOS}': {len(partes_bd)} lote(s), p50 {res['p50']:.1f}s | max {res['max']:.1f}s.")
+
+        # I2 é a última entrada: sai no último lote, só depois de 'bd'
+        with telemetria.etapa("destino.escrita_final"):
+            for n, part in enumerate(chunk_data_batch(finais, max_cells=MAX_CELLS_PER_BATCH), len(partes_bd) + 1):
+                values_batch_update(http, ssid, part, value_input_option="RAW")
+                log(f"   • Lote {n} enviado ({sum(count_cells_in_entry(x) for x in part)} células).")
+        if SYNC_INCREMENTAL:
+            estado.save(ESTADO_SYNC, ssid, sync_novo)
 
         # Formatação (opcional)
         if HAS_FMT and APLICAR_FORMATACAO and total > 0:
-            total_rows = max(total + 1, 2)
-            fmt_date = CellFormat(numberFormat=NumberFormat(type="DATE", pattern="dd/mm/yyyy"))
-            format_cell_range(ws_bd_dest, f"A2:A{total_rows}", fmt_date); time.sleep(SLEEP_FMT)
-            if time_cols_present:
-                fmt_time = CellFormat(numberFormat=NumberFormat(type="TIME", pattern="hh:mm:ss"))
-                for col_letter in time_cols_present:
-                    format_cell_range(ws_bd_dest, f"{col_letter}2:{col_letter}{total_rows}", fmt_time); time.sleep(SLEEP_FMT)
-            if num_cols_present:
-                fmt_num = CellFormat(numberFormat=NumberFormat(type="NUMBER", pattern="0.############"))
-                for col_letter in num_cols_present:
-                    format_cell_range(ws_bd_dest, f"{col_letter}2:{col_letter}{total_rows}", fmt_num); time.sleep(SLEEP_FMT)
+            with telemetria.etapa("destino.formatacao"):
+                ss_dest, _ = safe_open_spreadsheet(planilhas, ssid)
+                ws_bd_dest = safe_get_worksheet(planilhas, ss_dest, ABA_DESTINO_DADOS)
+                total_rows = max(total + 1, 2)
+                fmt_date = CellFormat(numberFormat=NumberFormat(type="DATE", pattern="dd/mm/yyyy"))
+                format_cell_range(ws_bd_dest, f"A2:A{total_rows}", fmt_date); time.sleep(SLEEP_FMT)
+                if time_cols_present:
+                    fmt_time = CellFormat(numberFormat=NumberFormat(type="TIME", pattern="hh:mm:ss"))
+                    for col_letter in time_cols_present:
+                        format_cell_range(ws_bd_dest, f"{col_letter}2:{col_letter}{total_rows}", fmt_time); time.sleep(SLEEP_FMT)
+                if num_cols_present:
+                    fmt_num = CellFormat(numberFormat=NumberFormat(type="NUMBER", pattern="0.############"))
+                    for col_letter in num_cols_present:
+                        format_cell_range(ws_bd_dest, f"{col_letter}2:{col_letter}{total_rows}", fmt_num); time.sleep(SLEEP_FMT)
 
     except Exception as e:
         if is_transient_error(e):
             raise
-        print(f"❌ Falha não-transitória no destino {ssid}: {e}")
+        log(f"❌ Falha não-transitória no destino {ssid}: {e}")
         return False
 
-    print("✅ Destino concluído.")
+    log("✅ Destino concluído.")
     return True
 
+def run_destino(args, dest, tag=""):
+    """Processa 1 destino com retries por destino. Retorna True se concluiu."""
+    _log_ctx.tag = tag
+    log("—" * 72)
+    sucesso = False
+    with telemetria.destino(spreadsheet_id(dest)), telemetria.etapa("destino"):
+        for attempt in range(1, DEST_RETRIES + 1):
+            try:
+                sucesso = process_destino(*args, dest)
+                break
+            except Exception as e:
+                if is_transient_error(e) and attempt < DEST_RETRIES:
+                    code = get_http_status(e)
+                    log(f"   • Falha transitória destino (HTTP {code}). Tentativa {attempt}/{DEST_RETRIES}.")
+                    if code == 429:
+                        LIMITE_ESCRITA.on_throttle(retry_after_seconds(e))
+                    telemetria.contar("retries_destino")
+                    retry_sleep(attempt)
+                    continue
+                log(f"❌ Falha ao processar destino após {attempt} tentativa(s): {e}")
+                break
+        if not sucesso:
+            telemetria.contar("destinos_com_falha")
+    if not sucesso:
+        # a próxima rodada relê os metadados (abas podem ter sido apagadas/renomeadas)
+        planilhas, _ = args
+        planilhas.esquecer(spreadsheet_id(dest))
+    return sucesso
+
+def run_round(args, destinos):
+    """Uma rodada sobre os destinos (até DEST_WORKERS em paralelo). Retorna os pendentes, na ordem."""
+    if DEST_WORKERS <= 1 or len(destinos) <= 1:
+        return [d for d in destinos if not run_destino(args, d)]
+    with ThreadPoolExecutor(max_workers=DEST_WORKERS) as pool:
+        futs = [pool.submit(run_destino, args, d, f"[{n}/{len(destinos)}] ") for n, d in enumerate(destinos, 1)]
+        return [d for d, fut in zip(destinos, futs) if not fut.result()]
+
+def read_snapshot_if_fresh(modified):
+    """(blocos, largura) do snapshot local, se a FONTE não mudou desde a gravação; senão None."""
+    meta = estado.snapshot_meta(ABA_FONTE_DADOS)
+    if meta is None or meta.get("spreadsheet_id") != ID_FONTE or not modified:
+        return None
+    if meta.get("valores") != "FORMATTED_VALUE":  # snapshot antigo, de valores crus
+        return None
+    if modified != meta.get("spreadsheet_modified"):
+        print(f"ℹ️ Snapshot local desatualizado (FONTE modificada em {modified}). Lendo pela API.")
+        return None
+    print(f"💾 Usando snapshot local de '{ABA_FONTE_DADOS}' — arquivo {meta.get('source_file_id')} "
+          f"@ {meta.get('source_modified')}, importado em {meta.get('import_stamp')}.")
+    rows = estado.iter_snapshot_rows(ABA_FONTE_DADOS)
+
+    def blocos():
+        bloco = []
+        for row in rows:
+            bloco.append(list(map(clean_cell, row)))
+            if len(bloco) == LEITURA_JANELA:
+                yield bloco
+                bloco = []
+        if bloco:
+            yield bloco
+
+    return blocos(), meta.get("cols") or 0
+
+def fonte_modified_time(gc):
+    """modifiedTime da planilha FONTE no Drive (None se não der para consultar)."""
+    try:
+        return with_retry(gc.http_client.get_file_drive_metadata, ID_FONTE).get("modifiedTime")
+    except Exception as e:
+        print(f"⚠️ Não consegui ler o modifiedTime da FONTE ({e}).")
+        return None
+
+def load_fonte(planilhas, ss_fonte, modified, colunar):
+    """Lê 'bd_geral' (snapshot local ou API, em blocos) e converte 1x. Retorna (headers, tabela, col_d, ncols) ou None se vazio."""
+    fonte = read_snapshot_if_fresh(modified) if USAR_SNAPSHOT else None
+    if fonte is None:
+        print(f"📄 Lendo aba '{ABA_FONTE_DADOS}' em janelas de {LEITURA_JANELA} linhas…")
+        ws_bd_fonte = safe_get_worksheet(planilhas, ss_fonte, ABA_FONTE_DADOS)
+        blocos = ([list(map(clean_cell, row)) for row in bloco] for bloco in iter_sheet_rows(ss_fonte, ws_bd_fonte, LEITURA_JANELA))
+        fonte = blocos, ws_bd_fonte.col_count
+    return load_blocks(*fonte, colunar)
+
+def load_blocks(blocos, largura, colunar):
+    """
+    Consome os blocos de linhas cruas (1ª linha = cabeçalho) sem juntar a aba inteira:
+    coluna D e conversão de tipos bloco a bloco. `largura` é um teto do nº de colunas (grade da aba);
+    no fim tudo é cortado na largura real (a maior linha), como em get_all_values.
+    `colunar`: tabela no armazenamento colunar (dict) em vez de lista de linhas.
+    """
+    blocos = iter(blocos)
+    primeiro = next(blocos, None)
+    if not primeiro:
+        print("⚠️ 'bd_geral' vazio.")
+        return None
+    largura = max(largura, len(primeiro[0]))
+    headers = primeiro[0] + [""] * (largura - len(primeiro[0]))
+    ncols = len(primeiro[0])
+    valores_d = []
+
+    if colunar:
+        print("🧮 Montando armazenamento colunar tipado…")
+        tabela = new_column_store(headers, largura)
+    else:
+        print("🧮 Convertendo tipos (data/hora/número)…")
+        plan = build_conversion_plan(headers, largura)
+        tabela = []
+    for bloco in itertools.chain([primeiro[1:]], blocos):
+        if not bloco:
+            continue
+        ncols = max(ncols, max(len(row) for row in bloco))
+        valores_d.extend(row[3] if len(row) > 3 else "" for row in bloco)
+        with telemetria.etapa("fonte.conversao"):
+            if colunar:
+                append_column_store(tabela, bloco)
+            else:
+                tabela.extend(convert_table(bloco, plan, largura))
+    if not valores_d:
+        print("⚠️ 'bd_geral' vazio.")
+        return None
+
+    ncols = min(ncols, largura)
+    headers = headers[:ncols]
+    if colunar:
+        finish_column_store(tabela, ncols)
+    elif ncols < largura:
+        for row in tabela:
+            del row[ncols:]
+
+    # Preparos coluna D (dicionário de valores distintos)
+    with telemetria.etapa("fonte.coluna_d"):
+        col_d = build_d_dictionary(valores_d)
+    print(f"🔤 Coluna D: {len(col_d['orig'])} valor(es) distinto(s) em {len(valores_d)} linha(s).")
+    return headers, tabela, col_d, ncols
+
+class FonteLazy:
+    """'bd_geral' carregado sob demanda, 1x, pelo 1º destino que precisar (thread-safe)."""
+
+    def __init__(self, planilhas, ss_fonte, modified, colunar):
+        self.planilhas = planilhas
+        self.ss_fonte = ss_fonte
+        self.modified = modified
+        self.colunar = colunar
+        self.lock = threading.Lock()
+        self.carregada = False
+        self.dados = None
+
+    def get(self):
+        with self.lock:
+            if not self.carregada:
+                # a carga é da execução, não do destino que por acaso pediu primeiro
+                with telemetria.destino(None), telemetria.etapa("fonte.carga"):
+                    self.dados = load_fonte(self.planilhas, self.ss_fonte, self.modified, self.colunar)
+                self.carregada = True
+            return self.dados
+
+# ======== Modo multiprocesso (DEST_PROCESSOS) ========
+# A FONTE, no armazenamento colunar, vai 1x para um bloco de memória compartilhada: os códigos
+# (int32) e os números (float64) de cada coluna e os códigos da coluna D. Cada worker recebe só
+# um descritor pequeno (nome do bloco, offsets e valores distintos) e lê as colunas direto do
+# bloco, sem cópia — nada de enviar a tabela inteira (pickle) para cada processo.
+def _vetores_da_fonte(store, col_d):
+    """(chave, array) de tudo que vai para a memória compartilhada."""
+    out = [(("d", "codes"), col_d["codes"])]
+    for j, col in enumerate(store["cols"]):
+        out.append(((j, "codes"), col["codes"]))
+        if "data" in col:
+            out.append(((j, "data"), col["data"]))
+    return out
+
+def share_source(dados):
+    """Copia a FONTE (colunar) para memória compartilhada. Retorna (SharedMemory, descritor)."""
+    headers, store, col_d, ncols = dados
+    vetores = _vetores_da_fonte(store, col_d)
+    offsets, total = {}, 0
+    for chave, arr in vetores:
+        total = -(-total // 8) * 8  # alinha em 8 bytes (float64)
+        offsets[chave] = total
+        total += len(arr) * arr.itemsize
+    shm = shared_memory.SharedMemory(create=True, size=max(total, 1))
+    for chave, arr in vetores:
+        nbytes = len(arr) * arr.itemsize
+        shm.buf[offsets[chave]:offsets[chave] + nbytes] = memoryview(arr).cast("B")
+    descritor = {
+        "shm": shm.name, "nrows": store["nrows"], "ncols": ncols, "headers": headers,
+        "cols": [{"kind": col["kind"], "values": col["values"], "codes": offsets[(j, "codes")],
+                  "data": offsets.get((j, "data"))} for j, col in enumerate(store["cols"])],
+        "col_d": {"codes": offsets[("d", "codes")], "orig": col_d["orig"], "norm": col_d["norm"]},
+    }
+    return shm, descritor
+
+def attach_source(descritor):
+    """(SharedMemory, dados) a partir do descritor: colunas como memoryviews do bloco compartilhado."""
+    shm = shared_memory.SharedMemory(name=descritor["shm"])
+    n = descritor["nrows"]
+
+    def vetor(offset, fmt):
+        tamanho = 8 if fmt == "d" else 4
+        return shm.buf[offset:offset + n * tamanho].cast(fmt)
+
+    cols = []
+    for c in descritor["cols"]:
+        col = {"kind": c["kind"], "codes": vetor(c["codes"], "i"), "values": c["values"]}
+        if c["data"] is not None:
+            col["data"] = vetor(c["data"], "d")
+        cols.append(col)
+    d = descritor["col_d"]
+    codes_d = vetor(d["codes"], "i")
+    postings = [[] for _ in d["orig"]]
+    for i, code in enumerate(codes_d):
+        postings[code].append(i)
+    col_d = {"codes": codes_d, "orig": d["orig"], "norm": d["norm"], "postings": postings, "cache": {}}
+    store = {"nrows": n, "ncols": descritor["ncols"], "cols": cols}
+    return shm, (descritor["headers"], store, col_d, descritor["ncols"])
+
+class FonteCompartilhada:
+    """FONTE já carregada pelo processo principal, lida da memória compartilhada (workers)."""
+
+    def __init__(self, descritor):
+        self.modified = descritor["modified"]
+        self.shm, self.dados = attach_source(descritor) if descritor.get("shm") else (None, None)
+
+    def get(self):
+        return self.dados
+
+    def fechar(self):
+        """Solta as memoryviews das colunas antes de fechar o bloco (senão: BufferError no SharedMemory.__del__)."""
+        if self.shm is None:
+            return
+        _, store, col_d, _ = self.dados
+        for col in store["cols"]:
+            col["codes"].release()
+            if "data" in col:
+                col["data"].release()
+        col_d["codes"].release()
+        self.dados = None
+        self.shm.close()
+        self.shm = None
+
+_worker = {}
+
+def _init_worker(descritor, limites):
+    """Worker do modo multiprocesso: cota compartilhada, sessão de API própria e FONTE anexada."""
+    global LIMITE_ESCRITA, LIMITE_LEITURA
+    LIMITE_ESCRITA, LIMITE_LEITURA = limites
+    sys.stdout.reconfigure(line_buffering=True)
+    fonte = FonteCompartilhada(descritor)
+    atexit.register(fonte.fechar)  # roda antes da coleta do SharedMemory na saída do worker
+    _worker["args"] = (sessao.CacheDePlanilhas(auth_gspread()), fonte)
+
+def _run_destino_worker(dest, tag):
+    """(concluiu?, telemetria do destino) — o principal soma a telemetria à dele."""
+    return run_destino(_worker["args"], dest, tag), telemetria.exportar(zerar_depois=True)
+
+class ProcessosDeDestino:
+    """
+    Pool de DEST_PROCESSOS workers (spawn) que processa as rodadas de destinos. Cada worker tem a
+    sua sessão de API; a cota (LIMITE_ESCRITA/LIMITE_LEITURA) passa a viver num processo gerenciador
+    e vale para todos, inclusive para a leitura da FONTE feita aqui no principal.
+    """
+
+    def __init__(self, fonte):
+        global LIMITE_ESCRITA, LIMITE_LEITURA
+        ctx = multiprocessing.get_context("spawn")
+        self.manager, limites = shared_limiters(
+            ctx,
+            (ESCRITAS_POR_MINUTO, COTA_MIN_POR_MINUTO, COTA_MAX_POR_MINUTO),
+            (LEITURAS_POR_MINUTO, COTA_MIN_POR_MINUTO, COTA_MAX_POR_MINUTO),
+        )
+        LIMITE_ESCRITA, LIMITE_LEITURA = limites
+        self.shm = self.pool = None
+        try:
+            dados = fonte.get()
+            descritor = {"modified": fonte.modified}
+            if dados is not None:
+                with telemetria.etapa("fonte.compartilhar"):
+                    self.shm, compartilhado = share_source(dados)
+                descritor.update(compartilhado)
+                print(f"🧠 FONTE em memória compartilhada ({self.shm.size / 2**20:.1f} MiB); "
+                      f"{DEST_PROCESSOS} processo(s) de destino.")
+            self.pool = ProcessPoolExecutor(max_workers=DEST_PROCESSOS, mp_context=ctx,
+                                            initializer=_init_worker, initargs=(descritor, limites))
+        except Exception:
+            self.fechar()
+            raise
+
+    def rodada(self, destinos):
+        """Uma rodada sobre os destinos. Retorna os pendentes, na ordem."""
+        futs = [self.pool.submit(_run_destino_worker, d, f"[{n}/{len(destinos)}] ")
+                for n, d in enumerate(destinos, 1)]
+        pendentes = []
+        for d, fut in zip(destinos, futs):
+            ok, tele = fut.result()
+            telemetria.incorporar(tele)
+            if not ok:
+                pendentes.append(d)
+        return pendentes
+
+    def fechar(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+        self.manager.shutdown()
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+
 def main():
     print("🔐 Autenticando…")
     gc = auth_gspread()
+    planilhas = sessao.CacheDePlanilhas(gc)
     print("✅ Autenticado.")
 
     print("📂 Abrindo planilha FONTE…")
-    ss_fonte, _ = safe_open_spreadsheet(gc, ID_FONTE)
+    with telemetria.etapa("fonte.abertura"):
+        ss_fonte, _ = safe_open_spreadsheet(planilhas, ID_FONTE)
 
-    print(f"📄 Lendo aba '{ABA_FONTE_DADOS}'…")
-    ws_bd_fonte = safe_get_worksheet(ss_fonte, ABA_FONTE_DADOS)
-    dados = read_all_values(ws_bd_fonte)
-    if not dados or len(dados) < 2:
-        print("⚠️ 'bd_geral' vazio.")
-        return
-
-    headers = [clean_cell(c) for c in dados[0]]
-    corpo_raw = [list(map(clean_cell, row)) for row in dados[1:]]
-    ncols = len(headers)
-
-    # Preparos coluna D
-    d_original_list = []
-    d_normalized_list = []
-    for row in corpo_raw:
-        val_d_orig = clean_cell(row[3]) if len(row) > 3 else ""
-        d_original_list.append(val_d_orig)
-        d_normalized_list.append(normalize_for_match(val_d_orig))
+    # modifiedTime ANTES de ler os dados: se a FONTE mudar durante a leitura, a próxima execução refaz
+    modified = fonte_modified_time(gc) if (PULAR_SE_INALTERADO or USAR_SNAPSHOT) else None
 
     # Destinos
     print("📋 Lendo destinos em 'config' (coluna I)…")
-    ws_config_fonte = safe_get_worksheet(ss_fonte, ABA_CONFIG_FONTE)
-    vals = get_range_with_retry(ws_config_fonte, f"{COL_DESTINOS}{LINHA_INICIO_DESTINOS}:{COL_DESTINOS}")
+    with telemetria.etapa("config.destinos"):
+        ws_config_fonte = safe_get_worksheet(planilhas, ss_fonte, ABA_CONFIG_FONTE)
+        vals = get_range_with_retry(ws_config_fonte, f"{COL_DESTINOS}{LINHA_INICIO_DESTINOS}:{COL_DESTINOS}")
     destinos = [row[0].strip() for row in vals if row and row[0].strip()]
     if not destinos:
         print("⚠️ Nenhum destino em 'config'.")
         return
+    # Mesmo ID em URL e puro = 1 destino: 2 threads disputariam as mesmas abas e o mesmo .estado
+    unicos = {}
+    for dest in destinos:
+        unicos.setdefault(spreadsheet_id(dest), dest)
+    if len(unicos) < len(destinos):
+        print(f"ℹ️ {len(destinos) - len(unicos)} destino(s) repetido(s) ignorado(s).")
+        destinos = list(unicos.values())
 
     print(f"🧭 {len(destinos)} destino(s) . Iniciando…\n")
 
-    pendentes = []
-    for dest in destinos:
-        print("—" * 72)
-        sucesso = False
-        for attempt in range(1, DEST_RETRIES + 1):
-            try:
-                sucesso = process_destino(gc, ss_fonte, headers, corpo_raw, d_original_list, d_normalized_list, ncols, dest)
-                break
-            except Exception as e:
-                if is_transient_error(e) and attempt < DEST_RETRIES:
-                    code = get_http_status(e)
-                    print(f"   • Falha transitória destino (HTTP {code}). Tentativa {attempt}/{DEST_RETRIES}.")
-                    extra = RATE_LIMIT_COOLDOWN_BASE * attempt if code == 429 else 0.0
-                    retry_sleep(attempt, extra=extra)
-                    continue
-                print(f"❌ Falha ao processar destino após {attempt} tentativa(s): {e}")
-                break
-        if not sucesso:
-            pendentes.append(dest)
-        time.sleep(SLEEP_BETWEEN_DESTINOS)
-
-    round_idx = 1
-    while pendentes and round_idx < DEST_ROUNDS:
-        print("\n🔁 Rodada extra para pendentes…")
-        restantes = []
-        for dest in pendentes:
-            print("—" * 72)
-            sucesso = False
-            for attempt in range(1, DEST_RETRIES + 1):
-                try:
-                    sucesso = process_destino(gc, ss_fonte, headers, corpo_raw, d_original_list, d_normalized_list, ncols, dest)
-                    break
-                except Exception as e:
-                    if is_transient_error(e) and attempt < DEST_RETRIES:
-                        code = get_http_status(e)
-                        print(f"   • Falha transitória destino (HTTP {code}). Tentativa {attempt}/{DEST_RETRIES}.")
-                        extra = RATE_LIMIT_COOLDOWN_BASE * attempt if code == 429 else 0.0
-                        retry_sleep(attempt, extra=extra)
-                        continue
-                    print(f"❌ Falha ao processar destino após {attempt} tentativa(s): {e}")
-                    break
-            if not sucesso:
-                restantes.append(dest)
-            time.sleep(SLEEP_BETWEEN_DESTINOS)
-        pendentes = restantes
-        round_idx += 1
+    usar_processos = DEST_PROCESSOS > 1 and len(destinos) > 1
+    fonte = FonteLazy(planilhas, ss_fonte, modified, colunar=USAR_COLUNAR or usar_processos)
+    processos = ProcessosDeDestino(fonte) if usar_processos else None
+    try:
+        if processos is not None:
+            rodada = processos.rodada
+        else:
+            args = (planilhas, fonte)
+            rodada = lambda ds: run_round(args, ds)
+        pendentes = rodada(destinos)
+
+        round_idx = 1
+        while pendentes and round_idx < DEST_ROUNDS:
+            print("\n🔁 Rodada extra para pendentes…")
+            pendentes = rodada(pendentes)
+            round_idx += 1
+    finally:
+        if processos is not None:
+            processos.fechar()
 
     if pendentes:
         print("\n⚠️ Alguns destinos ainda falharam após tentativas adicionais:")
@@ -540,4 +1089,5 @@ def main():
         print("\n🎉 Processo finalizado para todos os destinos com sucesso.")
 
 if __name__ == "__main__":
-    main()
+    with telemetria.execucao("Importar_BD_Geral", RELATORIO_EXECUCAO), perfil.execucao("Importar_BD_Geral"):
+        main()
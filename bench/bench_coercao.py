@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark da coerção numérica do importador: implementação célula a célula original
+x conversores.coerce_number_columns, em dados sintéticos no formato de UNFORMATTED_VALUE.
+
+Só mede tempo. A equivalência (tipo e repr de cada célula) é conferida em tests/test_conversores.py,
+de onde vem a versão original.
+
+Uso: python bench/bench_coercao.py [--linhas 200000] [--colunas 40] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "tests"))
+
+import conversores  # noqa: E402
+from test_conversores import coerce_columns_to_number  # noqa: E402
+
+# mesmas colunas de ponto_geral.TARGET_COLS_LETTERS
+TARGET_COLS_LETTERS = ["L","P","Q","R","Z","AA","AC","AD","AE","AF","AG","AJ","AL","AM","AN"]
+
+
+def col_letter_to_index(letter: str) -> int:
+    val = 0
+    for ch in letter.upper():
+        val = val * 26 + (ord(ch) - 64)
+    return val
+
+
+TARGET_COLS = {col_letter_to_index(c) for c in TARGET_COLS_LETTERS}
+TARGET_IDX = sorted(c - 1 for c in TARGET_COLS)
+
+
+def synthetic_rows(n: int, ncols: int, seed: int):
+    rnd = random.Random(seed)
+    textos = ["abc", "R$ 10,50", "1e3", " 7 ", "x-1", "'0012", "N/A", "1.234.567,8", "-0,75", "  ", "nan", "1_000"]
+    rows = []
+    for _ in range(n):
+        row = []
+        for _ in range(rnd.randint(ncols - 5, ncols)):
+            k = rnd.random()
+            if k < 0.25:
+                row.append(rnd.randint(0, 5000))
+            elif k < 0.40:
+                row.append(round(rnd.random() * 1000, 2))
+            elif k < 0.55:
+                row.append(f"{rnd.randint(0, 9999)},{rnd.randint(0, 99):02d}")
+            elif k < 0.62:
+                row.append(f"{rnd.randint(0, 999)}.{rnd.randint(0, 99)}")
+            elif k < 0.70:
+                row.append(str(rnd.randint(0, 99999)))
+            elif k < 0.76:
+                row.append(f"'{rnd.randint(0, 99)}")
+            elif k < 0.84:
+                row.append("")
+            elif k < 0.88:
+                row.append(rnd.choice([True, False, None]))
+            else:
+                row.append(rnd.choice(textos))
+        while row and row[-1] == "":
+            row.pop()
+        rows.append(row if rnd.random() > 0.01 else [])
+    return rows
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    res = fn(*args)
+    return res, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--linhas", type=int, default=200_000)
+    ap.add_argument("--colunas", type=int, default=40)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    rows = synthetic_rows(args.linhas, args.colunas, args.seed)
+    print(f"📊 {len(rows)} linhas x até {args.colunas} colunas; {len(TARGET_IDX)} colunas-alvo.")
+
+    _, t_ref = timed(coerce_columns_to_number, rows, TARGET_COLS)
+    conversores._numero_de_texto.cache_clear()
+    _, t_new = timed(conversores.coerce_number_columns, rows, TARGET_IDX)
+    _, t_warm = timed(conversores.coerce_number_columns, rows, TARGET_IDX)
+
+    print(f"   original:            {t_ref:8.3f}s")
+    print(f"   por colunas (frio):  {t_new:8.3f}s  ({t_ref / t_new:5.1f}x)")
+    print(f"   por colunas (cache): {t_warm:8.3f}s  ({t_ref / t_warm:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark dos conversores de data/hora/número do Importar_BD_Geral.py:
+versões anteriores (regex por chamada, época recriada a cada célula) x conversores.py.
+
+Só mede tempo. A equivalência (casos-limite + corpus, tipo e repr) é conferida em
+tests/test_conversores.py, de onde vêm as versões anteriores e o corpus.
+
+Uso: python bench/bench_conversores.py [--celulas 300000] [--seed 1]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "tests"))
+
+import conversores  # noqa: E402
+from test_conversores import PARES, corpus  # noqa: E402
+
+
+def timed(fn, valores):
+    t0 = time.perf_counter()
+    for v in valores:
+        fn(v)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--celulas", type=int, default=300_000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    dados = corpus(args.celulas, args.seed)
+    print(f"📊 {args.celulas} células por conversor")
+    for nome, (ref, nova) in PARES.items():
+        for f in (conversores._data_de_texto, conversores._hora_de_texto, conversores._numero_br_de_texto):
+            f.cache_clear()
+        t_ref = timed(ref, dados[nome])
+        t_new = timed(nova, dados[nome])
+        print(f"   {nome:<7} original {t_ref:7.3f}s | novo {t_new:7.3f}s ({t_ref / t_new:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark ponta a ponta dos dois scripts contra o emulador das APIs (bench/emulador.py):
+ponto_geral.importar_excel_para_bd_geral (XLSX do Drive → 'bd_geral') e em seguida
+Importar_BD_Geral.main ('bd_geral' → N destinos), em dados sintéticos no formato de produção.
+
+Para cada tamanho, roda os cenários em sequência sobre o mesmo "Drive" (e o mesmo .estado):
+  inicial      → tudo do zero;
+  1% alterado  → o XLSX muda em 1% das linhas (sincronização incremental);
+  sem mudança  → nada mudou (execuções puladas).
+Reporta tempo, linhas/s, chamadas de API, células escritas/lidas e 429 por etapa, e confere o
+conteúdo de 'bd_geral' (= XLSX) e da 'bd' de cada destino (linhas da EQUIPE, na ordem, com as
+conversões do Importar_BD_Geral sobre o texto que o emulador devolve em FORMATTED_VALUE).
+
+Os limitadores de cota dos scripts (cota.py) ficam desligados por padrão — com eles, qualquer
+execução acima de ~50 chamadas espera a janela real de 60 s; use --limitadores para mantê-los
+(junto com --cota, mede o comportamento sob 429).
+
+Importar_BD_Geral.DEST_PROCESSOS > 1 não roda aqui: os workers são processos novos, não herdam o
+emulador e chamariam a API real (auth_gspread + credenciais.json); o --param é recusado.
+
+Uso: python bench/bench_ponta_a_ponta.py [--linhas 10000,100000] [--destinos 5] [--latencia-ms 80]
+        [--cota 0] [--prob-429 0] [--rodadas 3] [--param Importar_BD_Geral.CHUNK=2000] [--json saida.json]
+"""
+
+import argparse
+import ast
+import contextlib
+import importlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import conversores  # noqa: E402
+import cota  # noqa: E402
+import estado  # noqa: E402
+from emulador import Emulador, _formatado  # noqa: E402
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+NOME_ARQUIVO = "base.xlsx"
+# nenhuma é substring de outra (o filtro dos destinos é "contém")
+EQUIPES = ["Equipe Alfa", "Equipe Bravo", "Equipe Charlie", "Equipe Delta", "Manutenção Leste",
+           "Manutenção Oeste", "Obras Norte", "Obras Sul", "Limpeza Centro", "Vigilância Noturna",
+           "Suporte Remoto", "Logística Porto"]
+CENARIOS = ["inicial", "1% alterado", "sem mudança"]
+
+
+# ======== Dados sintéticos ========
+def _letra(col: int) -> str:
+    s = ""
+    while col:
+        col, r = divmod(col - 1, 26)
+        s = chr(r + 65) + s
+    return s
+
+
+def gerar_linhas(n: int, ncols: int, time_cols: set, number_cols: set, seed: int) -> list[list]:
+    """Cabeçalho + n linhas como a 1ª aba do XLSX de produção (datas/horas já em serial)."""
+    rnd = random.Random(seed)
+    letras = [_letra(c) for c in range(1, ncols + 1)]
+    header = ["DATA", "NOME", "SETOR", "EQUIPE", "MATRICULA"] + [f"CAMPO {l}" for l in letras[5:]]
+    nomes = [f"Pessoa {i:04d}" for i in range(400)]
+    linhas = [header[:ncols]]
+    for _ in range(n):
+        row = []
+        for j, letra in enumerate(letras):
+            if j == 0:
+                row.append(rnd.randint(45000, 45700))
+            elif j == 1:
+                row.append(rnd.choice(nomes))
+            elif j == 2:
+                row.append(f"Setor {rnd.randint(1, 30)}")
+            elif j == 3:
+                row.append(rnd.choice(EQUIPES))
+            elif j == 4:
+                row.append(f"{rnd.randint(0, 99999):06d}")
+            elif letra in time_cols:
+                row.append(round(rnd.randint(0, 1439) / 1440, 10) if rnd.random() > 0.1 else "")
+            elif letra in number_cols:
+                row.append(round(rnd.random() * 1000, 2) if rnd.random() > 0.5 else rnd.randint(0, 500))
+            else:
+                row.append(rnd.choice(["OK", "PENDENTE", "N/A", "", f"OBS {rnd.randint(1, 50)}"]))
+        while row and row[-1] == "":
+            row.pop()
+        linhas.append(row)
+    return linhas
+
+
+def alterar(linhas: list[list], fracao: float, seed: int) -> list[list]:
+    """Cópia com `fracao` das linhas de dados com o nome trocado (mesmo tamanho)."""
+    rnd = random.Random(seed)
+    out = [list(r) for r in linhas]
+    for i in rnd.sample(range(1, len(out)), max(1, int((len(out) - 1) * fracao))):
+        out[i][1] = f"Pessoa {rnd.randint(400, 999):04d}"
+    return out
+
+
+def xlsx(linhas: list[list]) -> bytes:
+    """XLSX mínimo (1 aba, strings inline), só com o que leitura_local.read_xlsx precisa."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        zf.writestr("[Content_Types].xml",
+                    '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                    '<Default Extension="xml" ContentType="application/xml"/></Types>')
+        zf.writestr("_rels/.rels",
+                    '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/></Relationships>')
+        zf.writestr("xl/workbook.xml",
+                    '<?xml version="1.0" encoding="UTF-8"?><workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+                    '<sheet name="Planilha1" sheetId="1" r:id="rId1"/></sheets></workbook>')
+        zf.writestr("xl/_rels/workbook.xml.rels",
+                    '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/></Relationships>')
+        with zf.open("xl/worksheets/sheet1.xml", "w") as f:
+            f.write(b'<?xml version="1.0" encoding="UTF-8"?><worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            for i, row in enumerate(linhas, 1):
+                celulas = []
+                for j, v in enumerate(row, 1):
+                    ref = f"{_letra(j)}{i}"
+                    if v == "":
+                        continue
+                    if isinstance(v, str):
+                        celulas.append(f'<c r="{ref}" t="inlineStr"><is><t>{escape(v)}</t></is></c>')
+                    else:
+                        celulas.append(f'<c r="{ref}"><v>{v!r}</v></c>')
+                f.write(f'<row r="{i}">{"".join(celulas)}</row>'.encode("utf-8"))
+            f.write(b"</sheetData></worksheet>")
+    return buf.getvalue()
+
+
+# ======== Cenário no emulador ========
+def montar(emu: Emulador, ponto, imp, linhas: list[list], ndestinos: int) -> dict:
+    """Planilha FONTE (config + bd_geral), pasta com o XLSX e os destinos. Retorna {ssid: equipes}."""
+    destinos = {}
+    for d in range(ndestinos):
+        equipes = [EQUIPES[d % len(EQUIPES)], EQUIPES[(d + 5) % len(EQUIPES)]]
+        ssid = emu.criar_planilha(f"DEST{d:03d}", {
+            imp.ABA_DESTINO_RESUMO: None,
+            imp.ABA_DESTINO_CONFIG: [[""] * 5 + ["FILTRO"]] + [[""] * 5 + [e] for e in equipes],
+        }, titulo=f"Destino {d}")
+        destinos[ssid] = equipes
+    col_destinos = imp.letter_to_index(imp.COL_DESTINOS) + 1
+    config = [[""] * col_destinos for _ in range(max(ndestinos, 1) + 1)]
+    config[1][2] = NOME_ARQUIVO  # C2
+    for i, ssid in enumerate(destinos, 1):
+        # metade como URL, como costuma estar em config!I
+        config[i][col_destinos - 1] = ssid if i % 2 else f"https://docs.google.com/spreadsheets/d/{ssid}/edit"
+    # 'bd_geral' é a 1ª aba: o ponto_geral grava intervalos sem nome de aba (vão para a primeira)
+    emu.criar_planilha(ponto.SPREADSHEET_ID_DEST, {ponto.ABA_DESTINO: None, ponto.ABA_CONFIG: config},
+                       titulo="FONTE")
+    publicar(emu, ponto, linhas)
+    return destinos
+
+
+def publicar(emu: Emulador, ponto, linhas: list[list]):
+    """(Re)grava o XLSX na pasta; o anterior vai para a lixeira (novo id + md5 = arquivo mudou)."""
+    for meta in emu.arquivos.values():
+        if meta["name"] == NOME_ARQUIVO:
+            meta["trashed"] = True
+    emu.criar_arquivo(NOME_ARQUIVO, MIME_XLSX, xlsx(linhas), pastas=[ponto.PASTA_ID], linhas=linhas)
+
+
+def _aparar(row: list) -> list:
+    """Sem as células vazias do fim (a largura gravada varia entre os caminhos)."""
+    n = len(row)
+    while n and row[n - 1] == "":
+        n -= 1
+    return row[:n]
+
+
+def _comparar(nome: str, obtido: list[list], esperado: list[list]) -> list[str]:
+    """Célula a célula (24 == 24.0: int e float do mesmo número batem). Relata a 1ª célula diferente."""
+    if len(obtido) != len(esperado):
+        return [f"{nome}: {len(obtido)} linhas (esperado {len(esperado)})"]
+    diferentes = [i for i, (a, b) in enumerate(zip(obtido, esperado)) if _aparar(a) != _aparar(b)]
+    if not diferentes:
+        return []
+    i = diferentes[0]
+    a, b = _aparar(obtido[i]), _aparar(esperado[i])
+    j = next((j for j, (x, y) in enumerate(zip(a, b)) if x != y), min(len(a), len(b)))
+    x, y = (a[j] if j < len(a) else ""), (b[j] if j < len(b) else "")
+    return [f"{nome}: {len(diferentes)} linha(s) diferente(s); a 1ª em {_letra(j + 1)}{i + 1}: {x!r} (esperado {y!r})"]
+
+
+def conferir(emu: Emulador, ponto, imp, linhas: list[list], destinos: dict) -> list[str]:
+    # 'bd_geral' = XLSX (a coerção do ponto_geral não muda os números, que já vêm como número)
+    erros = _comparar(f"'{ponto.ABA_DESTINO}'", emu.valores(ponto.SPREADSHEET_ID_DEST, ponto.ABA_DESTINO), linhas)
+    # destinos: o Importar lê 'bd_geral' formatado (pela API ou do snapshot local, que guarda o mesmo
+    # texto) e converte data/horas/números pelo plano de colunas
+    ncols = max(len(r) for r in linhas)
+    header = [_formatado(v) for v in linhas[0]]
+    header += [""] * (ncols - len(header))
+    lidas = [[_formatado(v) for v in r] for r in linhas[1:]]
+    corpo = imp.convert_table(lidas, imp.build_conversion_plan(header, ncols), ncols)
+    for ssid, equipes in destinos.items():
+        esperado = [header] + [r for r in corpo if r[3] in equipes]
+        erros += _comparar(f"{ssid} '{imp.ABA_DESTINO_DADOS}'", emu.valores(ssid, imp.ABA_DESTINO_DADOS), esperado)
+    return erros
+
+
+# ======== Execução ========
+def carregar_scripts(params: list[str], limitadores: bool):
+    ponto = importlib.import_module("ponto_geral")
+    imp = importlib.import_module("Importar_BD_Geral")
+    modulos = {"ponto_geral": ponto, "Importar_BD_Geral": imp}
+    for p in params:
+        alvo, _, valor = p.partition("=")
+        nome_mod, _, nome = alvo.partition(".")
+        if nome_mod not in modulos or not hasattr(modulos[nome_mod], nome):
+            raise SystemExit(f"❌ --param desconhecido: {alvo}")
+        if alvo == "Importar_BD_Geral.DEST_PROCESSOS" and ast.literal_eval(valor) > 1:
+            raise SystemExit("❌ DEST_PROCESSOS > 1 não roda no emulador: os workers chamariam a API real.")
+        setattr(modulos[nome_mod], nome, ast.literal_eval(valor))
+    if not limitadores:
+        for m in (ponto, imp):
+            m.LIMITE_ESCRITA = cota.AdaptiveRateLimiter(1e9, 1e9, 1e9)
+            m.LIMITE_LEITURA = cota.AdaptiveRateLimiter(1e9, 1e9, 1e9)
+    return ponto, imp
+
+
+def limpar_caches():
+    """Cada execução agendada é um processo novo: não aproveita o cache dos conversores."""
+    for obj in vars(conversores).values():
+        if hasattr(obj, "cache_clear"):
+            obj.cache_clear()
+
+
+def medir(emu: Emulador, fn, verboso: bool) -> dict:
+    limpar_caches()
+    emu.zerar_metricas()
+    saida = io.StringIO()
+    t0 = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(sys.stdout if verboso else saida):
+            fn()
+        erro = None
+    except Exception as e:
+        erro = f"{type(e).__name__}: {e}"
+    segundos = time.perf_counter() - t0
+    if erro and not verboso:
+        print(saida.getvalue()[-3000:])
+    return dict(emu.relatorio(), segundos=segundos, erro=erro)
+
+
+def rodar(n: int, args, ponto, imp, resultados: list) -> bool:
+    """Cenários de um tamanho de dataset, num Drive e .estado novos. False se algo falhou."""
+    emu = Emulador(latencia=args.latencia_ms / 1000, latencia_por_celula=args.latencia_celula_us / 1e6,
+                   cota_por_minuto=args.cota, prob_429=args.prob_429, seed=args.seed,
+                   injetar_em=("leitura", "escrita") if args.injetar_em == "todas" else (args.injetar_em,))
+    estado.ESTADO_DIR = tempfile.mkdtemp(prefix="bench_estado_")
+    linhas = gerar_linhas(n, args.colunas, imp.TIME_COLS, imp.NUMBER_COLS, args.seed)
+    destinos = montar(emu, ponto, imp, linhas, args.destinos)
+    ok = True
+    with emu.instalado():
+        for rodada, cenario in enumerate(CENARIOS[:args.rodadas]):
+            if cenario == "1% alterado":
+                linhas = alterar(linhas, 0.01, args.seed + rodada)
+                publicar(emu, ponto, linhas)
+            for etapa, fn in (("ponto", ponto.importar_excel_para_bd_geral), ("importar", imp.main)):
+                r = medir(emu, fn, args.verboso)
+                r.update(linhas=n, cenario=cenario, etapa=etapa)
+                resultados.append(r)
+                print(f"{n:>8} {cenario:<12} {etapa:<10} {r['segundos']:>7.2f}s {n / r['segundos']:>10.0f} "
+                      f"{r['chamadas']:>9} {r['celulas_escritas']:>14} {r['celulas_lidas']:>11} {r['erros_429']:>5}")
+                if args.detalhe:
+                    for ep, c in r["por_endpoint"].items():
+                        print(f"{'':>32}{ep:<32} {c:>6}")
+                if r["erro"]:
+                    # os cenários seguintes partiriam de um estado que nenhuma execução real teria
+                    print(f"❌ {etapa}: {r['erro']}")
+                    return False
+            for e in conferir(emu, ponto, imp, linhas, destinos):
+                print(f"❌ Resultado incorreto — {e}")
+                ok = False
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--linhas", default="10000,50000", help="tamanhos do dataset, separados por vírgula")
+    ap.add_argument("--colunas", type=int, default=40)
+    ap.add_argument("--destinos", type=int, default=5)
+    ap.add_argument("--rodadas", type=int, default=3, choices=(1, 2, 3), help="cenários: " + ", ".join(CENARIOS).replace("%", "%%"))
+    ap.add_argument("--latencia-ms", type=float, default=0.0, help="latência fixa por requisição")
+    ap.add_argument("--latencia-celula-us", type=float, default=0.0, help="latência por célula enviada/lida")
+    ap.add_argument("--cota", type=int, default=0, help="requisições/min (leitura e escrita, cada); 0 = sem cota")
+    ap.add_argument("--prob-429", type=float, default=0.0, help="probabilidade de 429 aleatório por requisição")
+    ap.add_argument("--429-em", dest="injetar_em", default="escrita", choices=("escrita", "leitura", "todas"),
+                    help="requisições sujeitas ao 429 aleatório")
+    ap.add_argument("--limitadores", action="store_true", help="mantém os limitadores de cota dos scripts")
+    ap.add_argument("--param", action="append", default=[], help="MODULO.CONSTANTE=valor (ex.: ponto_geral.BATCH=2000)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--detalhe", action="store_true", help="chamadas por endpoint")
+    ap.add_argument("--verboso", action="store_true", help="mostra o log dos scripts")
+    ap.add_argument("--json", help="grava os resultados neste arquivo")
+    args = ap.parse_args()
+
+    ponto, imp = carregar_scripts(args.param, args.limitadores)
+    resultados = []
+    falhou = False
+    print(f"{'linhas':>8} {'cenário':<12} {'etapa':<10} {'tempo':>8} {'linhas/s':>10} {'chamadas':>9} "
+          f"{'cél. escritas':>14} {'cél. lidas':>11} {'429':>5}")
+    for n in (int(x) for x in args.linhas.split(",")):
+        falhou = not rodar(n, args, ponto, imp, resultados) or falhou
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    if falhou:
+        sys.exit(1)
+    print("✅ Conteúdo conferido ('bd_geral' e 'bd' de cada destino).")
+
+
+if __name__ == "__main__":
+    main()
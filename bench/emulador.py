@@ -0,0 +1,650 @@
+# -*- coding: utf-8 -*-
+"""
+Emulador em processo das APIs do Google usadas pelos scripts (Sheets v4 e Drive v3), para medir
+desempenho sem rede e sem a cota real.
+
+Funciona na camada HTTP: o gspread recebe uma requests.Session falsa e os clientes googleapiclient
+um `http` falso (no lugar do httplib2), então o código dos scripts e das bibliotecas roda inteiro.
+Endpoints emulados:
+- Sheets: spreadsheets.get, spreadsheets.batchUpdate (addSheet, updateSheetProperties, deleteSheet;
+  formatação é aceita e ignorada), values.get/update/clear, values.batchGet/batchUpdate
+  (com includeValuesInResponse)/batchClear;
+- Drive: files.list (name, 'pasta' in parents, trashed, mimeType), files.get (metadados e
+  alt=media em partes com Range), files.copy (conversão para planilha Google), files.update (lixeira).
+
+Configurável: latência fixa por requisição e por célula, cota de requisições/min (leitura e escrita
+contadas à parte; estourou → 429 com Retry-After) e 429 aleatório (em leituras, escritas ou ambas). Conta chamadas por endpoint,
+células escritas/lidas e 429 devolvidos.
+
+Aproximações: FORMATTED_VALUE mostra números como texto simples (sem formato de célula nem locale);
+USER_ENTERED só reconhece números, TRUE/FALSE e o apóstrofo inicial; escrita fora da grade a expande.
+
+Uso:
+    emu = Emulador(latencia=0.05)
+    emu.criar_planilha("ID", {"config": [["x"]], "bd_geral": []})
+    with emu.instalado():   # os clientes de sessao.py passam a falar com o emulador
+        script.main()
+    print(emu.relatorio())
+"""
+
+import contextlib
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import gspread
+import httplib2
+import requests
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from requests.hooks import dispatch_hook
+from requests.structures import CaseInsensitiveDict
+
+MIME_PLANILHA = "application/vnd.google-apps.spreadsheet"
+JANELA_COTA = 60.0  # segundos, como a cota por minuto do Google
+
+_RE_CELULA = re.compile(r"^([A-Z]*)(\d*)$")
+_RE_NUMERO = re.compile(r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$")
+
+
+class ErroApi(Exception):
+    def __init__(self, status: int, mensagem: str, headers: dict | None = None):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+        self.headers = headers or {}
+
+
+# ======== A1 ========
+def _coluna(letras: str) -> int:
+    n = 0
+    for ch in letras:
+        n = n * 26 + (ord(ch) - 64)
+    return n
+
+
+def _letras(col: int) -> str:
+    s = ""
+    while col:
+        col, r = divmod(col - 1, 26)
+        s = chr(r + 65) + s
+    return s
+
+
+def _ponta(ref: str):
+    """'B7' → (7, 2); 'C' → (None, 3); '12' → (12, None)."""
+    m = _RE_CELULA.match(ref.strip().upper())
+    if not m or not (m.group(1) or m.group(2)):
+        raise ErroApi(400, f"Unable to parse range: {ref}")
+    return (int(m.group(2)) if m.group(2) else None), (_coluna(m.group(1)) if m.group(1) else None)
+
+
+def _separar_aba(rng: str):
+    """"'Aba X'!A1:B2" → ("Aba X", "A1:B2"); "Aba" → ("Aba", None); "A1:B2" → (None, "A1:B2")."""
+    if "!" in rng:
+        titulo, resto = rng.rsplit("!", 1)
+    elif rng.startswith("'") or not re.fullmatch(r"[A-Za-z]*\d*(:[A-Za-z]*\d*)?", rng):
+        titulo, resto = rng, None
+    else:
+        return None, rng
+    if titulo.startswith("'") and titulo.endswith("'"):
+        titulo = titulo[1:-1].replace("''", "'")
+    return titulo, resto
+
+
+# ======== Estado ========
+class Aba:
+    """Valores como linhas de listas (sem as células vazias do fim), no formato UNFORMATTED_VALUE."""
+
+    def __init__(self, sheet_id: int, titulo: str, indice: int, linhas: int = 1000, colunas: int = 26):
+        self.sheet_id = sheet_id
+        self.titulo = titulo
+        self.indice = indice
+        self.linhas = linhas
+        self.colunas = colunas
+        self.valores: list[list] = []
+
+    def propriedades(self) -> dict:
+        return {"sheetId": self.sheet_id, "title": self.titulo, "index": self.indice, "sheetType": "GRID",
+                "gridProperties": {"rowCount": self.linhas, "columnCount": self.colunas}}
+
+    def intervalo(self, resto: str | None):
+        """(r1, c1, r2, c2) 1-based e inclusivo; pontas abertas vão até o fim da grade."""
+        if not resto:
+            return 1, 1, self.linhas, self.colunas
+        a, _, b = resto.partition(":")
+        r1, c1 = _ponta(a)
+        r2, c2 = _ponta(b) if b else (r1, c1)
+        return r1 or 1, c1 or 1, r2 or self.linhas, c2 or self.colunas
+
+    def escrever(self, r1: int, c1: int, linhas: list[list]) -> int:
+        """Escreve a partir de (r1, c1); "" e None apagam a célula. Retorna as células escritas."""
+        largura = max((len(l) for l in linhas), default=0)
+        self.linhas = max(self.linhas, r1 + len(linhas) - 1)
+        self.colunas = max(self.colunas, c1 + largura - 1)
+        while len(self.valores) < r1 - 1 + len(linhas):
+            self.valores.append([])
+        for i, nova in enumerate(linhas):
+            if not nova:
+                continue
+            row = self.valores[r1 - 1 + i]
+            fim = c1 - 1 + len(nova)
+            if len(row) < fim:
+                row.extend([""] * (fim - len(row)))
+            row[c1 - 1:fim] = ["" if v is None else v for v in nova]
+            while row and row[-1] == "":
+                row.pop()
+        self._aparar()
+        return sum(len(l) for l in linhas)
+
+    def limpar(self, r1: int, c1: int, r2: int, c2: int):
+        for row in self.valores[r1 - 1:r2]:
+            if len(row) >= c1:
+                fim = min(len(row), c2)
+                row[c1 - 1:fim] = [""] * (fim - c1 + 1)
+                while row and row[-1] == "":
+                    row.pop()
+        self._aparar()
+
+    def ler(self, r1: int, c1: int, r2: int, c2: int) -> list[list]:
+        out = [row[c1 - 1:c2] for row in self.valores[r1 - 1:r2]]
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def _aparar(self):
+        while self.valores and not self.valores[-1]:
+            self.valores.pop()
+
+
+class Planilha:
+    def __init__(self, ssid: str, titulo: str):
+        self.id = ssid
+        self.titulo = titulo
+        self.abas: list[Aba] = []
+
+    def aba(self, titulo: str | None) -> Aba:
+        if titulo is None:
+            return self.abas[0]
+        for aba in self.abas:
+            if aba.titulo == titulo:
+                return aba
+        raise ErroApi(400, f"Unable to parse range: {titulo}")
+
+
+def _agora_iso(t: datetime) -> str:
+    return t.strftime("%Y-%m-%dT%H:%M:%S.") + f"{t.microsecond // 1000:03d}Z"
+
+
+def _formatado(v):
+    if isinstance(v, bool):
+        return "TRUE" if v else "FALSE"
+    if isinstance(v, float):
+        return str(int(v)) if v.is_integer() else repr(v)
+    return str(v)
+
+
+def _user_entered(v):
+    if not isinstance(v, str):
+        return v
+    if v.startswith("'"):
+        return v[1:]
+    t = v.strip()
+    if _RE_NUMERO.match(t):
+        f = float(t)
+        return int(f) if f.is_integer() and "." not in t and "e" not in t.lower() else f
+    if t.upper() in ("TRUE", "FALSE"):
+        return t.upper() == "TRUE"
+    return v
+
+
+# ======== Emulador ========
+class Emulador:
+    def __init__(self, latencia: float = 0.0, latencia_por_celula: float = 0.0, cota_por_minuto: int = 0,
+                 prob_429: float = 0.0, retry_after: float = 1.0, injetar_em=("leitura", "escrita"), seed: int = 0):
+        self.latencia = latencia                        # s por requisição
+        self.latencia_por_celula = latencia_por_celula  # s por célula enviada/devolvida
+        self.cota_por_minuto = cota_por_minuto          # 0 = sem cota
+        self.prob_429 = prob_429
+        self.retry_after = retry_after                  # Retry-After dos 429 aleatórios (s)
+        self.injetar_em = set(injetar_em)               # tipos de requisição sujeitos ao 429 aleatório
+        self.rnd = random.Random(seed)
+        self.lock = threading.RLock()
+        self.planilhas: dict[str, Planilha] = {}
+        self.arquivos: dict[str, dict] = {}             # Drive: id → metadados (+ conteúdo/linhas)
+        self.chamadas = Counter()
+        self.celulas_escritas = 0
+        self.celulas_lidas = 0
+        self.erros_429 = 0
+        self._janelas = {"leitura": deque(), "escrita": deque()}
+        self._ids = 0
+        self._relogio = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    # ---------- montagem do cenário ----------
+    def _novo_id(self, prefixo: str) -> str:
+        self._ids += 1
+        return f"{prefixo}{self._ids:06d}"
+
+    def _tocar(self, fid: str):
+        """modifiedTime estritamente crescente a cada alteração."""
+        self._relogio = max(self._relogio + timedelta(milliseconds=1), datetime.now(timezone.utc))
+        if fid in self.arquivos:
+            self.arquivos[fid]["modifiedTime"] = _agora_iso(self._relogio)
+
+    def criar_planilha(self, ssid: str | None, abas: dict, titulo: str = "Planilha", pastas=()) -> str:
+        """abas: {título: linhas (UNFORMATTED) ou None}. Grade mínima 1000 x 26, como no Sheets."""
+        with self.lock:
+            ssid = ssid or self._novo_id("SS")
+            ss = Planilha(ssid, titulo)
+            for i, (nome, linhas) in enumerate(abas.items()):
+                linhas = linhas or []
+                largura = max((len(l) for l in linhas), default=0)
+                aba = Aba(self._ids * 100 + i + 1, nome, i, max(1000, len(linhas)), max(26, largura))
+                aba.escrever(1, 1, linhas)
+                ss.abas.append(aba)
+            self.planilhas[ssid] = ss
+            self.arquivos[ssid] = {"id": ssid, "name": titulo, "mimeType": MIME_PLANILHA,
+                                   "parents": list(pastas), "trashed": False}
+            self._tocar(ssid)
+            return ssid
+
+    def alterar(self, ssid: str, titulo: str, linhas: list[list], linha: int = 1, coluna: int = 1):
+        """Edição "à mão" a partir de (linha, coluna), como um usuário: muda o modifiedTime."""
+        with self.lock:
+            self.planilhas[ssid].aba(titulo).escrever(linha, coluna, linhas)
+            self._tocar(ssid)
+
+    def criar_arquivo(self, nome: str, mime: str, conteudo: bytes, pastas=(), linhas=None,
+                      fid: str | None = None) -> str:
+        """Arquivo binário no Drive. `linhas` (UNFORMATTED) é o resultado da conversão em files.copy."""
+        with self.lock:
+            fid = fid or self._novo_id("F")
+            self.arquivos[fid] = {"id": fid, "name": nome, "mimeType": mime, "parents": list(pastas),
+                                  "trashed": False, "conteudo": conteudo, "linhas": linhas,
+                                  "md5Checksum": hashlib.md5(conteudo).hexdigest()}
+            self._tocar(fid)
+            return fid
+
+    def valores(self, ssid: str, titulo: str) -> list[list]:
+        """Valores da aba (UNFORMATTED), para conferência."""
+        with self.lock:
+            aba = self.planilhas[ssid].aba(titulo)
+            return [list(r) for r in aba.valores]
+
+    # ---------- clientes ----------
+    def cliente_gspread(self) -> gspread.Client:
+        return gspread.Client(auth=None, session=_SessaoFalsa(self))
+
+    def cliente_api(self, servico: str, versao: str):
+        return build_from_document(get_static_doc(servico, versao), http=_HttpFalso(self))
+
+    @contextlib.contextmanager
+    def instalado(self):
+        """
+        Troca o transporte de sessao.py pelo do emulador enquanto o bloco roda: os clientes continuam
+        sendo montados por sessao.cliente_gspread/cliente_api (com a medição da telemetria).
+        """
+        import sessao
+        antes = (sessao.credenciais, sessao.sessao_http, sessao.http_autorizado)
+        sessao.credenciais = lambda caminho, scopes: None
+        sessao.sessao_http = lambda creds, pool=sessao.POOL_CONEXOES: _SessaoFalsa(self)
+        sessao.http_autorizado = lambda creds: _HttpFalso(self)
+        try:
+            yield self
+        finally:
+            sessao.credenciais, sessao.sessao_http, sessao.http_autorizado = antes
+
+    # ---------- métricas ----------
+    def zerar_metricas(self):
+        with self.lock:
+            self.chamadas.clear()
+            self.celulas_escritas = self.celulas_lidas = self.erros_429 = 0
+
+    def relatorio(self) -> dict:
+        with self.lock:
+            return {"chamadas": sum(self.chamadas.values()), "por_endpoint": dict(sorted(self.chamadas.items())),
+                    "celulas_escritas": self.celulas_escritas, "celulas_lidas": self.celulas_lidas,
+                    "erros_429": self.erros_429}
+
+    # ---------- atendimento ----------
+    def atender(self, metodo: str, url: str, params: dict, corpo) -> tuple[int, dict, bytes]:
+        """(status, headers, conteúdo) de uma requisição HTTP."""
+        caminho = urlsplit(url).path
+        try:
+            nome, fn, args, tipo = self._rota(metodo.upper(), caminho, params)
+            with self.lock:
+                self.chamadas[nome] += 1
+                self._cota(tipo)
+            resultado, celulas = fn(*args, params, corpo)
+            time.sleep(self.latencia + celulas * self.latencia_por_celula)
+            if isinstance(resultado, bytes):
+                return 200, {}, resultado
+            return 200, {"content-type": "application/json"}, json.dumps(resultado).encode("utf-8")
+        except ErroApi as e:
+            if e.status == 429:
+                time.sleep(self.latencia)
+            status = {400: "INVALID_ARGUMENT", 404: "NOT_FOUND", 429: "RESOURCE_EXHAUSTED"}.get(e.status, "UNKNOWN")
+            corpo_erro = {"error": {"code": e.status, "message": e.mensagem, "status": status}}
+            return e.status, dict(e.headers, **{"content-type": "application/json"}), json.dumps(corpo_erro).encode("utf-8")
+
+    def _cota(self, tipo: str):
+        if self.prob_429 and tipo in self.injetar_em and self.rnd.random() < self.prob_429:
+            self.erros_429 += 1
+            raise ErroApi(429, "Quota exceeded (injetado)", {"retry-after": f"{self.retry_after:g}"})
+        if not self.cota_por_minuto:
+            return
+        agora = time.monotonic()
+        janela = self._janelas[tipo]
+        while janela and agora - janela[0] >= JANELA_COTA:
+            janela.popleft()
+        if len(janela) >= self.cota_por_minuto:
+            self.erros_429 += 1
+            espera = JANELA_COTA - (agora - janela[0])
+            raise ErroApi(429, f"Quota exceeded for quota metric '{tipo} requests' per minute",
+                          {"retry-after": str(max(1, int(espera + 0.999)))})
+        janela.append(agora)
+
+    def _rota(self, metodo: str, caminho: str, params: dict):
+        """(nome do endpoint, função, args, leitura|escrita)."""
+        m = re.match(r"^/v4/spreadsheets/([^/:]+)(.*)$", caminho)
+        if m:
+            ssid, resto = m.group(1), m.group(2)
+            if resto == "" and metodo == "GET":
+                return "sheets.get", self._sheets_get, (ssid,), "leitura"
+            if resto == ":batchUpdate":
+                return "sheets.batchUpdate", self._sheets_batch_update, (ssid,), "escrita"
+            if resto == "/values:batchGet":
+                return "sheets.values.batchGet", self._values_batch_get, (ssid,), "leitura"
+            if resto == "/values:batchUpdate":
+                return "sheets.values.batchUpdate", self._values_batch_update, (ssid,), "escrita"
+            if resto == "/values:batchClear":
+                return "sheets.values.batchClear", self._values_batch_clear, (ssid,), "escrita"
+            m2 = re.match(r"^/values/(.+?)(:clear)?$", resto)
+            if m2:
+                rng = unquote(m2.group(1))
+                if m2.group(2):
+                    return "sheets.values.clear", self._values_clear, (ssid, rng), "escrita"
+                if metodo == "GET":
+                    return "sheets.values.get", self._values_get, (ssid, rng), "leitura"
+                if metodo == "PUT":
+                    return "sheets.values.update", self._values_update, (ssid, rng), "escrita"
+        m = re.match(r"^(?:/download)?/drive/v3/files(?:/([^/]+))?(/copy)?$", caminho)
+        if m:
+            fid, copia = m.group(1), m.group(2)
+            if fid is None and metodo == "GET":
+                return "drive.files.list", self._files_list, (), "leitura"
+            if copia and metodo == "POST":
+                return "drive.files.copy", self._files_copy, (unquote(fid),), "escrita"
+            if fid and metodo == "GET":
+                media = params.get("alt") == ["media"]
+                return ("drive.files.get_media" if media else "drive.files.get"), self._files_get, (unquote(fid),), "leitura"
+            if fid and metodo == "PATCH":
+                return "drive.files.update", self._files_update, (unquote(fid),), "escrita"
+        raise ErroApi(404, f"Endpoint não emulado: {metodo} {caminho}")
+
+    # ---------- Sheets ----------
+    def _planilha(self, ssid: str) -> Planilha:
+        ss = self.planilhas.get(ssid)
+        if ss is None or self.arquivos[ssid]["trashed"]:
+            raise ErroApi(404, f"Requested entity was not found: {ssid}")
+        return ss
+
+    def _resolver(self, ss: Planilha, rng: str):
+        titulo, resto = _separar_aba(rng)
+        if titulo is None and any(a.titulo == rng for a in ss.abas):
+            titulo, resto = rng, None  # nome de aba sem aspas (ex.: "Sheet1")
+        aba = ss.aba(titulo)
+        r1, c1, r2, c2 = aba.intervalo(resto)
+        return aba, r1, c1, r2, c2
+
+    def _range_a1(self, aba: Aba, r1, c1, r2, c2) -> str:
+        nome = "'" + aba.titulo.replace("'", "''") + "'"
+        return f"{nome}!{_letras(c1)}{r1}:{_letras(c2)}{r2}"
+
+    def _ler(self, ss: Planilha, rng: str, params: dict) -> tuple[dict, int]:
+        aba, r1, c1, r2, c2 = self._resolver(ss, rng)
+        if r1 > aba.linhas or c1 > aba.colunas:
+            raise ErroApi(400, f"Range ({rng}) exceeds grid limits. Max rows: {aba.linhas}, max columns: {aba.colunas}")
+        valores = aba.ler(r1, c1, min(r2, aba.linhas), min(c2, aba.colunas))
+        if (params.get("valueRenderOption") or ["FORMATTED_VALUE"])[0] == "FORMATTED_VALUE":
+            valores = [[_formatado(v) for v in row] for row in valores]
+        out = {"range": self._range_a1(aba, r1, c1, min(r2, aba.linhas), min(c2, aba.colunas)),
+               "majorDimension": "ROWS"}
+        if valores:
+            out["values"] = valores
+        celulas = sum(len(r) for r in valores)
+        self.celulas_lidas += celulas
+        return out, celulas
+
+    def _escrever(self, ss: Planilha, rng: str, valores: list[list], entrada: str) -> int:
+        aba, r1, c1, _, _ = self._resolver(ss, rng)
+        if entrada == "USER_ENTERED":
+            valores = [[_user_entered(v) for v in row] for row in valores]
+        celulas = aba.escrever(r1, c1, valores)
+        self.celulas_escritas += celulas
+        return celulas
+
+    def _sheets_get(self, ssid, params, corpo):
+        with self.lock:
+            ss = self._planilha(ssid)
+            return {"spreadsheetId": ssid,
+                    "properties": {"title": ss.titulo, "locale": "pt_BR", "timeZone": "America/Sao_Paulo"},
+                    "sheets": [{"properties": a.propriedades()} for a in ss.abas]}, 0
+
+    def _sheets_batch_update(self, ssid, params, corpo):
+        with self.lock:
+            ss = self._planilha(ssid)
+            replies = []
+            for req in corpo.get("requests", []):
+                if "addSheet" in req:
+                    props = req["addSheet"].get("properties", {})
+                    titulo = props.get("title") or f"Sheet{len(ss.abas) + 1}"
+                    if any(a.titulo == titulo for a in ss.abas):
+                        raise ErroApi(400, f"Invalid requests[0].addSheet: A sheet with the name \"{titulo}\" already exists.")
+                    grade = props.get("gridProperties", {})
+                    self._ids += 1
+                    aba = Aba(self._ids * 100, titulo, len(ss.abas), grade.get("rowCount", 1000), grade.get("columnCount", 26))
+                    ss.abas.append(aba)
+                    replies.append({"addSheet": {"properties": aba.propriedades()}})
+                elif "updateSheetProperties" in req:
+                    props = req["updateSheetProperties"]["properties"]
+                    aba = next((a for a in ss.abas if a.sheet_id == props.get("sheetId")), None)
+                    if aba is None:
+                        raise ErroApi(400, f"No grid with id: {props.get('sheetId')}")
+                    grade = props.get("gridProperties", {})
+                    aba.linhas = grade.get("rowCount", aba.linhas)
+                    aba.colunas = grade.get("columnCount", aba.colunas)
+                    aba.valores = [row[:aba.colunas] for row in aba.valores[:aba.linhas]]
+                    aba._aparar()
+                    replies.append({})
+                elif "deleteSheet" in req:
+                    sid = req["deleteSheet"]["sheetId"]
+                    ss.abas = [a for a in ss.abas if a.sheet_id != sid]
+                    replies.append({})
+                else:
+                    replies.append({})  # formatação etc.: aceita sem efeito nos valores
+            self._tocar(ssid)
+            return {"spreadsheetId": ssid, "replies": replies}, 0
+
+    def _values_get(self, ssid, rng, params, corpo):
+        with self.lock:
+            return self._ler(self._planilha(ssid), rng, params)
+
+    def _values_batch_get(self, ssid, params, corpo):
+        with self.lock:
+            ss = self._planilha(ssid)
+            ranges, celulas = [], 0
+            for rng in params.get("ranges", []):
+                vr, n = self._ler(ss, rng, params)
+                ranges.append(vr)
+                celulas += n
+            return {"spreadsheetId": ssid, "valueRanges": ranges}, celulas
+
+    def _values_update(self, ssid, rng, params, corpo):
+        with self.lock:
+            ss = self._planilha(ssid)
+            entrada = (params.get("valueInputOption") or ["RAW"])[0]
+            celulas = self._escrever(ss, rng, corpo.get("values", []), entrada)
+            self._tocar(ssid)
+            return {"spreadsheetId": ssid, "updatedRange": rng, "updatedCells": celulas}, celulas
+
+    def _values_batch_update(self, ssid, params, corpo):
+        with self.lock:
+            ss = self._planilha(ssid)
+            entrada = corpo.get("valueInputOption", "RAW")
+            celulas = sum(self._escrever(ss, d["range"], d.get("values", []), entrada) for d in corpo.get("data", []))
+            self._tocar(ssid)
+            out = {"spreadsheetId": ssid, "totalUpdatedCells": celulas}
+            if corpo.get("includeValuesInResponse"):
+                render = {"valueRenderOption": [corpo.get("responseValueRenderOption", "FORMATTED_VALUE")]}
+                out["responses"] = [{"spreadsheetId": ssid, "updatedRange": d["range"],
+                                     "updatedData": self._ler(ss, d["range"], render)[0]}
+                                    for d in corpo.get("data", [])]
+            return out, celulas
+
+    def _values_clear(self, ssid, rng, params, corpo):
+        with self.lock:
+            ss = self._planilha(ssid)
+            aba, r1, c1, r2, c2 = self._resolver(ss, rng)
+            aba.limpar(r1, c1, r2, c2)
+            self._tocar(ssid)
+            return {"spreadsheetId": ssid, "clearedRange": rng}, 0
+
+    def _values_batch_clear(self, ssid, params, corpo):
+        with self.lock:
+            ss = self._planilha(ssid)
+            for rng in corpo.get("ranges", []):
+                aba, r1, c1, r2, c2 = self._resolver(ss, rng)
+                aba.limpar(r1, c1, r2, c2)
+            self._tocar(ssid)
+            return {"spreadsheetId": ssid, "clearedRanges": corpo.get("ranges", [])}, 0
+
+    # ---------- Drive ----------
+    def _arquivo(self, fid: str) -> dict:
+        meta = self.arquivos.get(fid)
+        if meta is None:
+            raise ErroApi(404, f"File not found: {fid}.")
+        return meta
+
+    @staticmethod
+    def _publico(meta: dict) -> dict:
+        return {k: v for k, v in meta.items() if k not in ("conteudo", "linhas")}
+
+    def _files_list(self, params, corpo):
+        q = (params.get("q") or [""])[0]
+        filtros = []
+        for m in re.finditer(r"(\w+)\s*=\s*'((?:[^'\\]|\\.)*)'", q):
+            filtros.append((m.group(1), m.group(2).replace("\\'", "'")))
+        pastas = [p.replace("\\'", "'") for p in re.findall(r"'((?:[^'\\]|\\.)*)'\s+in\s+parents", q)]
+        lixeira = re.search(r"trashed\s*=\s*(true|false)", q)
+        with self.lock:
+            files = []
+            for meta in self.arquivos.values():
+                if any(meta.get(campo) != valor for campo, valor in filtros):
+                    continue
+                if any(p not in meta["parents"] for p in pastas):
+                    continue
+                if lixeira and meta["trashed"] != (lixeira.group(1) == "true"):
+                    continue
+                files.append(self._publico(meta))
+            return {"files": files}, 0
+
+    def _files_get(self, fid, params, corpo):
+        with self.lock:
+            meta = self._arquivo(fid)
+            if params.get("alt") != ["media"]:
+                return self._publico(meta), 0
+            if "conteudo" not in meta:
+                raise ErroApi(403, "Only files with binary content can be downloaded.")
+            return meta["conteudo"], 0
+
+    def _files_copy(self, fid, params, corpo):
+        corpo = corpo or {}
+        with self.lock:
+            meta = self._arquivo(fid)
+            if corpo.get("mimeType") != MIME_PLANILHA:
+                raise ErroApi(400, "O emulador só copia convertendo para planilha Google.")
+            if meta.get("linhas") is None:
+                raise ErroApi(400, f"Sem linhas para converter '{meta['name']}' (criar_arquivo(linhas=...)).")
+            ssid = self.criar_planilha(None, {"Sheet1": meta["linhas"]}, titulo=corpo.get("name", meta["name"]),
+                                       pastas=meta["parents"])
+            return self._publico(self.arquivos[ssid]), 0
+
+    def _files_update(self, fid, params, corpo):
+        with self.lock:
+            meta = self._arquivo(fid)
+            for k in ("name", "trashed"):
+                if corpo and k in corpo:
+                    meta[k] = corpo[k]
+            self._tocar(fid)
+            return self._publico(meta), 0
+
+
+# ======== Transportes ========
+def _params(params, query: str) -> dict:
+    """{nome: [valores str]} a partir da query string e do params do requests (dict ou lista de pares)."""
+    out = {k: list(v) for k, v in parse_qs(query, keep_blank_values=True).items()}
+    itens = params.items() if isinstance(params, dict) else (params or [])
+    for k, v in itens:
+        vals = v if isinstance(v, (list, tuple)) else [v]
+        out.setdefault(k, []).extend(str(x) if not isinstance(x, bool) else str(x).lower() for x in vals)
+    return out
+
+
+class _SessaoFalsa(requests.Session):
+    """requests.Session do gspread: nada sai do processo."""
+
+    def __init__(self, emulador: Emulador):
+        super().__init__()
+        self.emulador = emulador
+
+    def request(self, method, url, params=None, data=None, headers=None, json=None, **kwargs):
+        partes = urlsplit(url)
+        corpo = json if json is not None else (_json_de(data) if data else None)
+        t0 = time.perf_counter()
+        status, cabecalhos, conteudo = self.emulador.atender(method, url, _params(params, partes.query), corpo)
+        resp = requests.Response()
+        resp.status_code = status
+        resp._content = conteudo
+        resp.headers = CaseInsensitiveDict(cabecalhos)
+        resp.url = url
+        resp.encoding = "utf-8"
+        resp.elapsed = timedelta(seconds=time.perf_counter() - t0)
+        # corpo serializado como o requests enviaria (bytes medidos pelos hooks, ex.: telemetria)
+        resp.request = requests.Request(method, url, data=data, json=json).prepare()
+        return dispatch_hook("response", self.hooks, resp)
+
+
+class _HttpFalso:
+    """Substituto do httplib2.Http dos clientes googleapiclient (inclui download em partes com Range)."""
+
+    def __init__(self, emulador: Emulador):
+        self.emulador = emulador
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=None, connection_type=None):
+        partes = urlsplit(uri)
+        corpo = _json_de(body) if body else None
+        status, cabecalhos, conteudo = self.emulador.atender(method, uri, _params(None, partes.query), corpo)
+        faixa = (headers or {}).get("range") or (headers or {}).get("Range")
+        if status == 200 and faixa and not cabecalhos:
+            ini, _, fim = faixa.split("=", 1)[1].partition("-")
+            ini, fim = int(ini), min(int(fim or len(conteudo) - 1), len(conteudo) - 1)
+            cabecalhos = {"content-range": f"bytes {ini}-{fim}/{len(conteudo)}"}
+            conteudo, status = conteudo[ini:fim + 1], 206
+        resp = httplib2.Response(dict(cabecalhos, status=str(status)))
+        return resp, conteudo
+
+
+def _json_de(body):
+    if isinstance(body, bytes):
+        body = body.decode("utf-8")
+    try:
+        return json.loads(body)
+    except (TypeError, ValueError):
+        return None
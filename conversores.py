@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Conversores de células compartilhados pelos scripts.
+
+Coerção numérica do importador (ponto_geral.py): só nas colunas-alvo, sem olhar as demais.
+- int/float (UNFORMATTED_VALUE) passam direto;
+- formas comuns ("123", "1.234,56", "12.5") caem num regex pré-compilado e são convertidas
+  com as mesmas expressões de to_number_if_possible, sem try/except;
+- o resto passa por to_number_if_possible, com memória (lru_cache) por texto cru.
+O resultado é idêntico ao de to_number_if_possible célula a célula (tests/test_conversores.py; tempo em bench/bench_coercao.py).
+
+Datas, horas e números pt-BR do Importar_BD_Geral.py (to_date_serial_keep, to_time_serial_keep,
+parse_number_brazil): padrões pré-compilados, época do Sheets calculada 1x, memória (lru_cache)
+por texto cru e parser sem regex para as formas comuns "dd/mm/aaaa", "HH:MM[:SS]" e inteiros.
+Resultados idênticos às versões anteriores (tests/test_conversores.py; tempo em bench/bench_conversores.py).
+"""
+
+import re
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, List
+
+CACHE_TEXTOS = 1 << 16  # textos distintos memorizados por conversor
+
+_RE_INT = re.compile(r"-?\d{1,15}", re.ASCII)        # até 15 dígitos: int(s) == int(float(s))
+_RE_BR = re.compile(r"-?[\d.]*,\d+", re.ASCII)       # 1.234,56 / 1234,5 / -0,75
+_RE_US = re.compile(r"-?\d*\.\d+", re.ASCII)         # 1234.56 / .5
+
+
+def to_number_if_possible(v: Any):
+    """Remove apóstrofo à esquerda e tenta parse numérico (pt-BR/US)."""
+    if v is None:
+        return ""
+    if isinstance(v, (int, float)):
+        return v
+    s = str(v).strip()
+    if s == "":
+        return ""
+    if s.startswith("'"):
+        s = s[1:].strip()
+    s_br = s.replace(" ", "").replace("R$", "")
+    if any(c in s_br for c in ",."):
+        if "," in s_br and (s_br.rfind(",") > s_br.rfind(".")):
+            try:
+                f = float(s_br.replace(".", "").replace(",", "."))
+                return int(f) if f.is_integer() else f
+            except:
+                pass
+    try:
+        f = float(s.replace(" ", "").replace("R$", ""))
+        return int(f) if f.is_integer() else f
+    except:
+        try:
+            return int(s)
+        except:
+            return s
+
+
+@lru_cache(maxsize=CACHE_TEXTOS)
+def _numero_de_texto(s: str):
+    if _RE_INT.fullmatch(s):
+        return int(s)
+    if _RE_BR.fullmatch(s):
+        f = float(s.replace(".", "").replace(",", "."))
+        return int(f) if f.is_integer() else f
+    if _RE_US.fullmatch(s):
+        f = float(s)
+        return int(f) if f.is_integer() else f
+    return to_number_if_possible(s)
+
+
+def coerce_number_columns(block: List[List[Any]], col_idxs: List[int]) -> List[List[Any]]:
+    """
+    to_number_if_possible só nas colunas col_idxs (0-based, em ordem crescente) de cada linha.
+    Retorna linhas novas (as de entrada não são alteradas); linhas vazias saem como estão.
+    """
+    conv = _numero_de_texto
+    out = []
+    for row in block:
+        if not row:
+            out.append(row)
+            continue
+        new_row = row[:]
+        n = len(new_row)
+        for j in col_idxs:
+            if j >= n:
+                break
+            v = new_row[j]
+            if v.__class__ is str:
+                new_row[j] = conv(v)
+            elif not isinstance(v, (int, float)):
+                new_row[j] = to_number_if_possible(v)
+        out.append(new_row)
+    return out
+
+
+# ======== Datas / horas / números pt-BR (sem apóstrofo) ========
+TZ = timezone(timedelta(hours=-3))             # America/Sao_Paulo (sem horário de verão)
+EPOCH_SHEETS = datetime(1899, 12, 30, tzinfo=TZ)  # serial 0 do Sheets
+_EPOCH_ORD = EPOCH_SHEETS.toordinal()
+
+_RE_DATA_BR = re.compile(r"^(\d{2})/(\d{2})/(\d{4})(?:\s+\d{2}:\d{2}(?::\d{2})?)?$")
+_RE_HORA = re.compile(r"^(\d{1,2}):(\d{2})(?::(\d{2}))?$")
+_RE_DATA_HORA = re.compile(r"^\d{2}/\d{2}/\d{4}\s+(\d{1,2}):(\d{2})(?::(\d{2}))?$")
+_RE_LETRA = re.compile(r"[A-Za-z]")
+_RE_ZERO_ESQ = re.compile(r"^0\d+$")
+_RE_NAO_NUM = re.compile(r"[^0-9\.\-]")
+_RE_NUM_PONTO = re.compile(r"-?\d+(\.\d+)?")
+
+
+def _digitos(s: str) -> bool:
+    """Só dígitos ASCII (str.isdigit sozinho aceita '²', '٣' etc.)."""
+    return s.isascii() and s.isdigit()
+
+
+def serial_from_datetime(dt: datetime) -> float:
+    delta = dt - EPOCH_SHEETS
+    return delta.days + (delta.seconds + delta.microseconds / 1e6) / 86400.0
+
+
+def _data_lenta(s: str):
+    m = _RE_DATA_BR.match(s)
+    if m:
+        d, mth, y = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        try:
+            dt = datetime(y, mth, d, tzinfo=TZ)
+        except ValueError:
+            return s  # data inválida (ex.: 31/02/2024) fica como texto
+        return serial_from_datetime(dt)
+    try:
+        dt = datetime.fromisoformat(s)
+        if dt.tzinfo is None: dt = dt.replace(tzinfo=TZ)
+        dt = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        return serial_from_datetime(dt)
+    except Exception:
+        try: return float(s)
+        except Exception: return s
+
+
+@lru_cache(maxsize=CACHE_TEXTOS)
+def _data_de_texto(raw: str):
+    s = raw.strip()
+    if len(s) == 10 and s[2] == "/" and s[5] == "/":
+        d, mth, y = s[:2], s[3:5], s[6:]
+        if _digitos(d) and _digitos(mth) and _digitos(y):
+            try:
+                return float(date(int(y), int(mth), int(d)).toordinal() - _EPOCH_ORD)
+            except ValueError:
+                return s
+    return _data_lenta(s)
+
+
+def to_date_serial_keep(v):
+    if v is None or v == "": return ""
+    if isinstance(v, (int, float)):
+        try: return float(v)
+        except Exception: return v
+    if v.__class__ is str:
+        return _data_de_texto(v)
+    return _data_lenta(str(v).strip())
+
+
+def _hora_lenta(s: str):
+    m = _RE_HORA.match(s) or _RE_DATA_HORA.match(s)
+    if m:
+        hh = int(m.group(1)); mm = int(m.group(2)); ss = int(m.group(3) or 0)
+        return (hh*3600 + mm*60 + ss) / 86400.0
+    try:
+        dt = datetime.fromisoformat(s)
+        if dt.tzinfo is None: dt = dt.replace(tzinfo=TZ)
+        return (dt.hour*3600 + dt.minute*60 + dt.second) / 86400.0
+    except Exception:
+        try: return float(s)
+        except Exception: return s
+
+
+@lru_cache(maxsize=CACHE_TEXTOS)
+def _hora_de_texto(raw: str):
+    s = raw.strip()
+    partes = s.split(":")
+    if (len(partes) in (2, 3) and 1 <= len(partes[0]) <= 2
+            and all(len(p) == 2 for p in partes[1:]) and all(_digitos(p) for p in partes)):
+        hh = int(partes[0]); mm = int(partes[1]); ss = int(partes[2]) if len(partes) == 3 else 0
+        return (hh*3600 + mm*60 + ss) / 86400.0
+    return _hora_lenta(s)
+
+
+def to_time_serial_keep(v):
+    if v is None or v == "": return ""
+    if isinstance(v, (int, float)):
+        try: return float(v)
+        except Exception: return v
+    if v.__class__ is str:
+        return _hora_de_texto(v)
+    return _hora_lenta(str(v).strip())
+
+
+def is_zero_left_string(s: str) -> bool:
+    return bool(_RE_ZERO_ESQ.match(s.strip()))
+
+
+def _numero_br_lento(s: str):
+    if _RE_LETRA.search(s): return s
+    if is_zero_left_string(s): return s
+    s2 = s.replace(".", "").replace(",", ".")
+    s2 = _RE_NAO_NUM.sub("", s2)
+    if _RE_NUM_PONTO.fullmatch(s2):
+        try: return float(s2)
+        except Exception: return s
+    return s
+
+
+@lru_cache(maxsize=CACHE_TEXTOS)
+def _numero_br_de_texto(raw: str):
+    s = raw.strip()
+    if _digitos(s) and (len(s) == 1 or s[0] != "0"):
+        return float(s)
+    return _numero_br_lento(s)
+
+
+def parse_number_brazil(x):
+    if x is None: return ""
+    if isinstance(x, (int, float)): return float(x)
+    if x.__class__ is str:
+        return _numero_br_de_texto(x)
+    return _numero_br_lento(str(x).strip())
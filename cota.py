@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Controle de cota das APIs do Google (Sheets/Drive), compartilhado pelos scripts.
+
+A cota do Sheets é contada por minuto (por usuário/projeto). Em vez de pausas fixas
+entre chamadas e de cooldowns cegos em 429, cada chamada passa por um controlador
+único do processo (vale para todas as threads):
+- janela rolante de 60 s com requisições e células enviadas;
+- limite de requisições/min ajustado por AIMD: sobe +`increase` a cada sucesso,
+  cai para `rate * decrease` a cada 429;
+- `Retry-After` (quando vier no 429) pausa todas as chamadas até o instante indicado.
+
+Com vários processos (ex.: DEST_PROCESSOS do importador), shared_limiters() hospeda os
+limitadores num processo gerenciador e devolve proxies com a mesma interface: a janela e a
+taxa continuam únicas para todos os processos.
+"""
+
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from multiprocessing.managers import BaseManager, BaseProxy
+
+JANELA = 60.0  # segundos
+
+
+def retry_after_seconds(err: Exception) -> float | None:
+    """Lê o header Retry-After de um erro do gspread (requests) ou do googleapiclient (httplib2)."""
+    # is None explícito: requests.Response de um 429 é falsy (__bool__ devolve .ok)
+    resp = getattr(err, "response", None)
+    if resp is None:
+        resp = getattr(err, "resp", None)
+    headers = getattr(resp, "headers", resp)
+    if headers is None or not hasattr(headers, "get"):
+        return None
+    raw = headers.get("Retry-After") or headers.get("retry-after")
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(raw).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """Limitador thread-safe por janela rolante de 60 s, com taxa adaptativa (AIMD)."""
+
+    def __init__(self, rate_per_min: float, min_rate: float, max_rate: float,
+                 cells_per_min: int | None = None, increase: float = 1.0, decrease: float = 0.5,
+                 cooldown: float = 5.0):
+        self.rate = float(rate_per_min)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.cells_per_min = cells_per_min
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown          # pausa padrão em 429 sem Retry-After (cresce com 429 seguidos)
+        self.sent = deque()               # (instante, células) das chamadas na janela
+        self.cells_in_window = 0
+        self.pause_until = 0.0
+        self.throttles_in_row = 0
+        self.lock = threading.Lock()
+
+    def _expire(self, now: float):
+        while self.sent and now - self.sent[0][0] >= JANELA:
+            _, c = self.sent.popleft()
+            self.cells_in_window -= c
+
+    def _wait_needed(self, now: float, cells: int) -> float:
+        if now < self.pause_until:
+            return self.pause_until - now
+        self._expire(now)
+        wait = 0.0
+        if len(self.sent) >= int(self.rate):
+            idx = len(self.sent) - int(self.rate)
+            wait = self.sent[idx][0] + JANELA - now
+        if self.cells_per_min and self.sent and self.cells_in_window + cells > self.cells_per_min:
+            freed, t_free = self.cells_in_window, now
+            for t, c in self.sent:
+                freed -= c
+                t_free = t + JANELA
+                if freed + cells <= self.cells_per_min:
+                    break
+            wait = max(wait, t_free - now)
+        return max(wait, 0.0)
+
+    def acquire(self, cells: int = 0) -> float:
+        """Bloqueia até a chamada caber na janela. Retorna quantos segundos esperou."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                wait = self._wait_needed(now, cells)
+                if wait <= 0:
+                    self.sent.append((now, cells))
+                    self.cells_in_window += cells
+                    return waited
+            time.sleep(min(wait, JANELA))
+            waited += min(wait, JANELA)
+
+    def on_success(self):
+        with self.lock:
+            self.throttles_in_row = 0
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: float | None = None) -> float:
+        """429 recebido: reduz a taxa e pausa todas as chamadas. Retorna a pausa aplicada (s)."""
+        with self.lock:
+            self.throttles_in_row += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            pause = retry_after if retry_after is not None else min(JANELA, self.cooldown * self.throttles_in_row)
+            self.pause_until = max(self.pause_until, time.monotonic() + pause)
+            return pause
+
+    def window_stats(self) -> tuple[int, int]:
+        """(requisições, células) enviadas no último minuto."""
+        with self.lock:
+            self._expire(time.monotonic())
+            return len(self.sent), self.cells_in_window
+
+
+class _LimiterProxy(BaseProxy):
+    """Proxy de um AdaptiveRateLimiter hospedado no gerenciador (acquire/on_success/on_throttle/rate)."""
+
+    _exposed_ = ("acquire", "on_success", "on_throttle", "window_stats", "__getattribute__")
+
+    def acquire(self, cells: int = 0) -> float:
+        return self._callmethod("acquire", (cells,))
+
+    def on_success(self):
+        return self._callmethod("on_success")
+
+    def on_throttle(self, retry_after: float | None = None) -> float:
+        return self._callmethod("on_throttle", (retry_after,))
+
+    def window_stats(self) -> tuple[int, int]:
+        return self._callmethod("window_stats")
+
+    @property
+    def rate(self) -> float:
+        return self._callmethod("__getattribute__", ("rate",))
+
+
+class CotaManager(BaseManager):
+    pass
+
+
+CotaManager.register("AdaptiveRateLimiter", AdaptiveRateLimiter, proxytype=_LimiterProxy)
+
+
+def shared_limiters(ctx, *specs):
+    """
+    Inicia um CotaManager (contexto multiprocessing `ctx`) com um AdaptiveRateLimiter por spec
+    (tupla de argumentos do construtor). Retorna (manager, [proxies]); os proxies podem ser
+    passados a processos filhos. Encerrar com manager.shutdown().
+    """
+    manager = CotaManager(ctx=ctx)
+    manager.start()
+    return manager, [manager.AdaptiveRateLimiter(*spec) for spec in specs]
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Estado local entre execuções (hashes de sincronização, snapshot de abas), compartilhado pelos scripts.
+
+Cada registro é um JSON em ESTADO_DIR/<categoria>/<chave>.json. No GitHub Actions a pasta
+é restaurada/salva com actions/cache; se não existir, tudo funciona do zero (modo completo).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+
+ESTADO_DIR = os.environ.get("ESTADO_DIR", ".estado")
+
+
+def _path(categoria: str, chave: str) -> str:
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", chave)
+    return os.path.join(ESTADO_DIR, categoria, f"{safe}.json")
+
+
+def load(categoria: str, chave: str) -> dict | None:
+    try:
+        with open(_path(categoria, chave), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save(categoria: str, chave: str, data: dict):
+    """Grava de forma atômica (arquivo temporário + rename)."""
+    path = _path(categoria, chave)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def delete(categoria: str, chave: str):
+    try:
+        os.remove(_path(categoria, chave))
+    except OSError:
+        pass
+
+
+def rows_hash(rows) -> str:
+    """Hash do conteúdo de um bloco de linhas (tipos contam: 1 ≠ 1.0 ≠ "1")."""
+    payload = json.dumps(rows, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def changed_blocks(prev_hashes: list, new_hashes: list) -> list[int]:
+    """Índices dos blocos novos que diferem do estado anterior (ou não existiam)."""
+    return [i for i, h in enumerate(new_hashes) if i >= len(prev_hashes) or prev_hashes[i] != h]
+
+
+# ======== Snapshot de uma aba (entre etapas do pipeline) ========
+# ESTADO_DIR/snapshot/<nome>.jsonl.gz  → 1 linha JSON por linha da planilha (valores crus)
+# ESTADO_DIR/snapshot/<nome>.json      → metadados (chave de frescor); gravado por último
+def _snapshot_paths(nome: str) -> tuple[str, str]:
+    base = _path("snapshot", nome)[: -len(".json")]
+    return f"{base}.jsonl.gz", f"{base}.json"
+
+
+class SnapshotWriter:
+    """Grava as linhas à medida que chegam (memória limitada); só publica em commit()."""
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.data_path, self.meta_path = _snapshot_paths(nome)
+        os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
+        self.tmp = f"{self.data_path}.tmp"
+        self.f = gzip.open(self.tmp, "wt", encoding="utf-8", compresslevel=3)
+        self.rows = 0
+
+    def write_rows(self, rows):
+        for r in rows:
+            self.f.write(json.dumps(r, ensure_ascii=False, separators=(",", ":")))
+            self.f.write("\n")
+            self.rows += 1
+
+    def commit(self, meta: dict):
+        self.f.close()
+        delete("snapshot", self.nome)  # invalida o metadado antigo antes de trocar os dados
+        os.replace(self.tmp, self.data_path)
+        save("snapshot", self.nome, dict(meta, rows=self.rows))
+
+    def abort(self):
+        try:
+            self.f.close()
+            os.remove(self.tmp)
+        except OSError:
+            pass
+
+
+def snapshot_meta(nome: str) -> dict | None:
+    meta = load("snapshot", nome)
+    if meta is None or not os.path.exists(_snapshot_paths(nome)[0]):
+        return None
+    return meta
+
+
+def iter_snapshot_rows(nome: str):
+    with gzip.open(_snapshot_paths(nome)[0], "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Leitura de abas grandes em janelas de linhas, compartilhada pelos scripts.
+
+Em vez de um único get da aba inteira (resposta gigante, timeout, tudo em memória de uma vez),
+a aba é lida em janelas de N linhas (values.batchGet) e consumida bloco a bloco. Enquanto um
+bloco é processado, a próxima janela já está sendo buscada (1 thread de prefetch).
+
+Os blocos saem alinhados: todos com exatamente N linhas (linhas vazias no meio viram []),
+exceto o último, que termina na última linha com dados — igual a um get da aba inteira fatiado.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _fetch_ahead(fetch, faixas, prefetch: bool):
+    """Busca as faixas em ordem; com prefetch, a faixa seguinte é pedida antes de entregar a atual."""
+    if not prefetch:
+        for a, b in faixas:
+            yield fetch(a, b)
+        return
+    pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        fut = None
+        for a, b in faixas:
+            prox = pool.submit(fetch, a, b)
+            if fut is not None:
+                yield fut.result()
+            fut = prox
+        if fut is not None:
+            yield fut.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_windows(fetch, total_rows: int, janela: int, prefetch: bool = True):
+    """
+    Gera blocos de linhas de uma aba com `total_rows` linhas de grade.
+    fetch(primeira, ultima) → linhas da faixa (1-based, inclusiva), como a API devolve
+    (sem as linhas vazias do fim da faixa).
+    """
+    faixas = [(a, min(a + janela - 1, total_rows)) for a in range(1, total_rows + 1, janela)]
+    pendente = None  # última janela com dados: só se sabe se é a última quando chega a seguinte
+    vazias = 0       # janelas sem dados depois dela
+    for rows in _fetch_ahead(fetch, faixas, prefetch):
+        if not rows:
+            vazias += 1
+            continue
+        if pendente is not None:
+            yield pendente + [[] for _ in range(janela - len(pendente))]
+        for _ in range(vazias):
+            yield [[] for _ in range(janela)]
+        pendente, vazias = rows, 0
+    if pendente is not None:
+        yield pendente
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Leitura local de XLSX (só biblioteca padrão), no mesmo formato que a API do Sheets devolve
+com valueRenderOption=UNFORMATTED_VALUE + dateTimeRenderOption=SERIAL_NUMBER:
+- números como int/float (datas/horas já são seriais no XLSX), booleanos como True/False, texto como str;
+- linhas sem as células vazias do fim; linhas vazias no meio como []; sem linhas vazias no fim.
+
+O XLSX é lido em streaming (zipfile + iterparse) só na 1ª aba, sem montar a árvore XML inteira nem
+a lista de linhas: uma passada rápida (expat) mede a aba (xlsx_size) e read_xlsx gera as linhas uma a uma.
+Casos que não dá para reproduzir fielmente levantam FormatoNaoSuportado (quem chama usa a conversão do Google).
+
+CSV não é lido aqui: a conversão do Google detecta datas, horas, moeda e porcentagem (viram seriais/números)
+pelo locale da planilha; um parser local deixaria esses valores como texto. CSV segue pelo temporário.
+Fórmulas vêm com o valor salvo no arquivo (<v>); sem ele (arquivo gerado sem recalcular), é
+FormatoNaoSuportado. Diferença que resta no XLSX: fórmulas voláteis (AGORA/HOJE, ALEATÓRIO…) vêm com
+o valor salvo, e o Google as recalcula na conversão.
+"""
+
+import posixpath
+import zipfile
+from xml.etree.ElementTree import iterparse
+from xml.parsers import expat
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_REL_DOC = "/officeDocument"
+_MAX_INT_EXATO = 2 ** 53
+
+
+class FormatoNaoSuportado(Exception):
+    pass
+
+
+def _local(tag: str) -> str:
+    """Nome do elemento sem namespace (aceita OOXML transitional e strict)."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _attr(elem, nome: str):
+    for k, v in elem.attrib.items():
+        if _local(k) == nome:
+            return v
+    return None
+
+
+def _numero(s: str):
+    f = float(s)
+    return int(f) if f.is_integer() and abs(f) < _MAX_INT_EXATO else f
+
+
+def _col_index(ref: str) -> int:
+    """'AB12' → 27 (0-based)."""
+    n = 0
+    for ch in ref:
+        if "A" <= ch <= "Z":
+            n = n * 26 + (ord(ch) - 64)
+        else:
+            break
+    return n - 1
+
+
+def _rels(zf: zipfile.ZipFile, part: str) -> dict:
+    """Id → caminho no zip, a partir de <pasta>/_rels/<arquivo>.rels."""
+    pasta, arq = posixpath.split(part)
+    rels_path = posixpath.join(pasta, "_rels", arq + ".rels")
+    out = {}
+    with zf.open(rels_path) as f:
+        for _, el in iterparse(f):
+            if _local(el.tag) == "Relationship":
+                alvo = el.get("Target", "")
+                alvo = alvo.lstrip("/") if alvo.startswith("/") else posixpath.normpath(posixpath.join(pasta, alvo))
+                out[el.get("Id")] = (el.get("Type", ""), alvo)
+    return out
+
+
+def _workbook_part(zf: zipfile.ZipFile) -> str:
+    for tipo, alvo in _rels(zf, "").values():
+        if tipo.endswith(_REL_DOC):
+            return alvo
+    return "xl/workbook.xml"
+
+
+def _first_sheet(zf: zipfile.ZipFile, wb_part: str) -> tuple[str, bool]:
+    """(caminho da 1ª aba, date1904)."""
+    rid, date1904 = None, False
+    with zf.open(wb_part) as f:
+        for _, el in iterparse(f):
+            nome = _local(el.tag)
+            if nome == "workbookPr":
+                date1904 = (el.get("date1904") or "").lower() in ("1", "true")
+            elif nome == "sheet" and rid is None:
+                rid = _attr(el, "id")
+    if rid is None:
+        raise FormatoNaoSuportado("XLSX sem abas")
+    rels = _rels(zf, wb_part)
+    return rels[rid][1], date1904
+
+
+def _shared_strings(zf: zipfile.ZipFile, wb_part: str) -> list[str]:
+    part = next((alvo for tipo, alvo in _rels(zf, wb_part).values() if tipo.endswith("/sharedStrings")), None)
+    if part is None or part not in zf.namelist():
+        return []
+    out = []
+    partes = []
+    fonetico = 0  # <rPh> (guia fonético) não entra no texto
+    with zf.open(part) as f:
+        for ev, el in iterparse(f, events=("start", "end")):
+            nome = _local(el.tag)
+            if ev == "start":
+                if nome == "rPh":
+                    fonetico += 1
+                continue
+            if nome == "t" and not fonetico:
+                partes.append(el.text or "")
+            elif nome == "rPh":
+                fonetico -= 1
+            elif nome == "si":
+                out.append("".join(partes))
+                partes = []
+                el.clear()
+    return out
+
+
+def _cell_value(tipo: str | None, v: str | None, inline: str | None, strings: list[str]):
+    if tipo == "inlineStr":
+        return inline or ""
+    if v is None:
+        return ""
+    if tipo == "s":
+        return strings[int(v)]
+    if tipo in ("str", "e"):
+        return v
+    if tipo == "d":
+        raise FormatoNaoSuportado("célula com data ISO (t=\"d\")")
+    if tipo == "b":
+        return v.strip() in ("1", "true")
+    return _numero(v)
+
+
+def _first_sheet_part(zf: zipfile.ZipFile) -> tuple[str, str]:
+    """(workbook, 1ª aba); FormatoNaoSuportado no sistema de datas 1904."""
+    wb_part = _workbook_part(zf)
+    sheet_part, date1904 = _first_sheet(zf, wb_part)
+    if date1904:
+        # datas teriam de ser deslocadas, mas só as células com formato de data (styles.xml)
+        raise FormatoNaoSuportado("XLSX no sistema de datas 1904")
+    return wb_part, sheet_part
+
+
+def _celulas(f):
+    """
+    (linha, coluna, tipo, v, inline) de cada célula da aba (0-based), em streaming: as linhas já
+    lidas saem da árvore ao fim de cada <row>. Fórmula sem valor calculado (<f> sem <v>, arquivo
+    salvo sem recalcular) → FormatoNaoSuportado: só o Google calcularia o valor.
+    """
+    row_idx = col_idx = -1
+    tipo = v = ref = None
+    formula = tem_v = False
+    inline: list[str] = []
+    em_inline = 0
+    sheet_data = None
+    for ev, el in iterparse(f, events=("start", "end")):
+        nome = _local(el.tag)
+        if ev == "start":
+            if nome == "sheetData":
+                sheet_data = el
+            elif nome == "row":
+                r = el.get("r")
+                row_idx = int(r) - 1 if r else row_idx + 1
+                col_idx = -1
+            elif nome == "c":
+                ref, tipo, v, inline = el.get("r"), el.get("t"), None, []
+                formula = tem_v = False
+            elif nome == "is":
+                em_inline += 1
+            continue
+        if nome == "v":
+            v, tem_v = el.text, True
+        elif nome == "f":
+            formula = True
+        elif nome == "t" and em_inline:
+            inline.append(el.text or "")
+        elif nome == "is":
+            em_inline -= 1
+        elif nome == "c":
+            col_idx = _col_index(ref) if ref else col_idx + 1
+            if formula and not tem_v:
+                raise FormatoNaoSuportado(f"fórmula sem valor calculado ({ref or f'linha {row_idx + 1}'})")
+            yield row_idx, col_idx, tipo, v, "".join(inline)
+            el.clear()
+        elif nome == "row" and sheet_data is not None:
+            sheet_data.clear()  # libera as linhas já lidas
+
+
+def xlsx_size(fh) -> tuple[int, int]:
+    """
+    (linhas, colunas) ocupadas na 1ª aba, numa passada só de estrutura (expat, sem montar elementos
+    nem valores): teto para ajustar a grade de uma vez antes de read_xlsx. Levanta
+    FormatoNaoSuportado nos casos que read_xlsx não reproduz, antes de qualquer linha ser entregue.
+    """
+    linhas = colunas = 0
+    row_idx = col_idx = -1
+    ref = None
+    formula = tem_v = False
+
+    def sem_valor_calculado():
+        # conferido no início da célula seguinte e no fim (sem EndElementHandler: metade das chamadas)
+        if formula and not tem_v:
+            raise FormatoNaoSuportado(f"fórmula sem valor calculado ({ref or f'linha {row_idx + 1}'})")
+
+    def inicio(tag, attrs):
+        nonlocal linhas, colunas, row_idx, col_idx, ref, formula, tem_v
+        nome = _local(tag)
+        if nome == "c":
+            sem_valor_calculado()
+            ref = attrs.get("r")
+            col_idx = _col_index(ref) if ref else col_idx + 1
+            formula = tem_v = False
+            if attrs.get("t") == "d":
+                raise FormatoNaoSuportado("célula com data ISO (t=\"d\")")
+        elif nome == "v" or nome == "is":
+            tem_v = True
+            if row_idx >= linhas:
+                linhas = row_idx + 1
+            if col_idx >= colunas:
+                colunas = col_idx + 1
+        elif nome == "f":
+            formula = True
+        elif nome == "row":
+            sem_valor_calculado()
+            r = attrs.get("r")
+            row_idx, col_idx = (int(r) - 1 if r else row_idx + 1), -1
+
+    with zipfile.ZipFile(fh) as zf:
+        _, sheet_part = _first_sheet_part(zf)
+        parser = expat.ParserCreate(namespace_separator="}")
+        parser.StartElementHandler = inicio
+        with zf.open(sheet_part) as f:
+            parser.ParseFile(f)
+        sem_valor_calculado()
+    return linhas, colunas
+
+
+def read_xlsx(fh):
+    """Gera as linhas da 1ª aba de um XLSX (arquivo binário com seek, aberto até o fim da leitura)."""
+    with zipfile.ZipFile(fh) as zf:
+        wb_part, sheet_part = _first_sheet_part(zf)
+        strings = _shared_strings(zf, wb_part)
+
+        proxima = 0  # índice da próxima linha a entregar
+        row_idx, row = -1, []
+        with zf.open(sheet_part) as f:
+            for r, c, tipo, v, inline in _celulas(f):
+                if r != row_idx:
+                    if row:
+                        yield from ([] for _ in range(row_idx - proxima))
+                        yield row
+                        proxima = row_idx + 1
+                    row_idx, row = r, []
+                valor = _cell_value(tipo, v, inline, strings)
+                if valor != "":
+                    if len(row) < c:
+                        row.extend([""] * (c - len(row)))
+                    row.append(valor)
+        if row:
+            yield from ([] for _ in range(row_idx - proxima))
+            yield row
+
+
+def _leitor(mime_type: str, nome: str):
+    ext = posixpath.splitext(nome.lower())[1]
+    if mime_type == MIME_XLSX or ext == ".xlsx":
+        return xlsx_size, read_xlsx
+    return None
+
+
+def suportado(mime_type: str, nome: str = "") -> bool:
+    return _leitor(mime_type, nome) is not None
+
+
+def read_local(fh, mime_type: str, nome: str = ""):
+    """
+    Escolhe o leitor pelo mimeType (ou extensão). Retorna (linhas, colunas, gerador de linhas): o
+    tamanho e os casos não suportados vêm de uma 1ª passada, então FormatoNaoSuportado sai aqui,
+    não no meio da leitura. `fh` precisa ficar aberto enquanto o gerador for consumido.
+    """
+    leitor = _leitor(mime_type, nome)
+    if leitor is None:
+        raise FormatoNaoSuportado(f"sem leitor local para '{nome}' ({mime_type})")
+    tamanho, ler = leitor
+    linhas, colunas = tamanho(fh)
+    fh.seek(0)
+    return linhas, colunas, ler(fh)
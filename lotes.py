@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-batching de escritas (values.batchUpdate), compartilhado pelos scripts.
+
+Cada entrada é {"range": A1, "values": [[...]]}; as entradas são agrupadas em requisições
+de até max_cells células. Aceita gerador: as partes saem à medida que enchem.
+
+Entradas criadas com entrada() já trazem a contagem de células (sem reparsear o A1 ao agrupar,
+ao medir a cota e no log) e podem ser preguiçosas: com gerar=, os valores só são montados por
+materializar(), na hora do envio — só os lotes em voo ficam com as linhas na memória.
+"""
+
+import gspread
+
+
+class Entrada(dict):
+    """{"range", "values"} + contagem de células; serializa como um dict comum no corpo da requisição."""
+    __slots__ = ("celulas", "gerar")
+
+
+def entrada(rng, values=None, celulas=None, gerar=None):
+    e = Entrada(range=rng)
+    if values is not None:
+        e["values"] = values
+    e.celulas = celulas if celulas is not None else count_cells_in_entry(e)
+    e.gerar = gerar
+    return e
+
+
+def materializar(parte):
+    """Entradas preguiçosas da parte → entradas com os valores gerados agora (as demais passam direto)."""
+    return [entrada(e["range"], e.gerar(), e.celulas) if getattr(e, "gerar", None) else e for e in parte]
+
+
+def count_cells_in_entry(entry):
+    celulas = getattr(entry, "celulas", None)
+    if celulas is not None:
+        return celulas
+    rng = entry["range"].split("!", 1)[-1]
+    if ":" not in rng:
+        return 1
+    a1_start, a1_end = rng.split(":")
+    r1, c1 = gspread.utils.a1_to_rowcol(a1_start)
+    r2, c2 = gspread.utils.a1_to_rowcol(a1_end)
+    return (r2 - r1 + 1) * (c2 - c1 + 1)
+
+
+def chunk_data_batch(entries, max_cells):
+    chunk, cells = [], 0
+    for e in entries:
+        e_cells = count_cells_in_entry(e)
+        if cells + e_cells > max_cells and chunk:
+            yield chunk
+            chunk, cells = [], 0
+        chunk.append(e); cells += e_cells
+    if chunk: yield chunk
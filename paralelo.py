@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Fan-out de chamadas pequenas e independentes (ex.: 1 escrita por planilha) com paralelismo limitado.
+
+A cota continua com quem chama (fn passa pelo limitador compartilhado, cota.py); aqui só se
+distribui o trabalho e se mede, por item, a latência e o resultado. Uma falha não interrompe
+os demais itens nem um destino lento segura os outros.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fan_out(fn, itens, max_workers: int) -> list[dict]:
+    """
+    fn(item) para cada item, até max_workers ao mesmo tempo.
+    Retorna, na ordem dos itens, {"item", "ok", "segundos", "erro"}.
+    """
+    def um(item):
+        t0 = time.perf_counter()
+        try:
+            fn(item)
+            erro = None
+        except Exception as e:
+            erro = e
+        return {"item": item, "ok": erro is None, "segundos": time.perf_counter() - t0, "erro": erro}
+
+    itens = list(itens)
+    if max_workers <= 1 or len(itens) <= 1:
+        return [um(item) for item in itens]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(itens))) as pool:
+        return list(pool.map(um, itens))
+
+
+def _percentil(ordenados: list[float], p: float) -> float:
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+def resumo(resultados: list[dict], mais_lentos: int = 3) -> dict:
+    """Contagens e latências (s) de um fan_out: ok, falhas, p50, p95, max e os itens mais lentos."""
+    lat = sorted(r["segundos"] for r in resultados)
+    lentos = sorted(resultados, key=lambda r: r["segundos"], reverse=True)[:mais_lentos]
+    return {
+        "ok": sum(1 for r in resultados if r["ok"]),
+        "falhas": sum(1 for r in resultados if not r["ok"]),
+        "p50": _percentil(lat, 0.50) if lat else 0.0,
+        "p95": _percentil(lat, 0.95) if lat else 0.0,
+        "max": lat[-1] if lat else 0.0,
+        "mais_lentos": [(r["item"], r["segundos"]) for r in lentos],
+    }
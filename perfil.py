@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+Modo de perfilamento opcional das execuções agendadas, ligado por variável de ambiente.
+
+PERFIL = lista separada por vírgula (vazio = desligado; "1"/"tudo" = todos):
+- cpu: cProfile das threads, da execução inteira (não separa por etapa) → <script>_cpu.pstats
+  (abre com pstats/snakeviz) e <script>_cpu.txt (funções com mais tempo acumulado e próprio).
+- amostras: amostrador de pilhas a cada PERFIL_INTERVALO_MS → <script>.collapsed, no formato
+  "thread;f1;f2 contagem" (flamegraph.pl / speedscope). Pega também o tempo parado em I/O e cota.
+- mem: tracemalloc → <script>_mem.txt com os maiores pontos de alocação de cada etapa da
+  telemetria (primeira ocorrência de cada nome), a memória rastreada no fim e o pico.
+O pico de RSS sai sempre no relatório da telemetria (rss_pico_mib).
+
+Os arquivos vão para PERFIL_DIR; os workers de DEST_PROCESSOS não são perfilados (o RSS deles
+entra no pico). Tem custo — mem fotografa o heap a cada etapa nova e as fotos aparecem no perfil
+de cpu se os dois estiverem ligados: use para investigar, não em toda execução.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+import telemetria
+
+PERFIL = os.getenv("PERFIL", "")
+PERFIL_DIR = os.getenv("PERFIL_DIR", "perfil")
+PERFIL_INTERVALO_MS = float(os.getenv("PERFIL_INTERVALO_MS", "10"))
+PERFIL_QUADROS = int(os.getenv("PERFIL_QUADROS", "5"))  # profundidade das pilhas do tracemalloc
+PERFIL_TOP = int(os.getenv("PERFIL_TOP", "25"))
+MODOS = ("cpu", "amostras", "mem")
+
+
+def modos(valor: str = PERFIL) -> set:
+    escolhidos = {m.strip().lower() for m in valor.split(",") if m.strip()}
+    if escolhidos & {"1", "tudo", "true", "sim"}:
+        return set(MODOS)
+    desconhecidos = escolhidos - set(MODOS)
+    if desconhecidos:
+        print(f"⚠️ PERFIL: modo(s) desconhecido(s) ignorado(s): {', '.join(sorted(desconhecidos))}")
+    return escolhidos & set(MODOS)
+
+
+# ======== CPU (cProfile) ========
+class _Cpu:
+    """Até o 3.11 o cProfile é por thread: cada thread nova liga o seu via threading.setprofile.
+    A partir do 3.12 ele usa sys.monitoring, vale para o processo todo e só pode haver um ativo.
+
+    Até o 3.11, disable() só desliga o gancho da thread que o chama: no fim entram no relatório o
+    perfil desta thread e os das threads que já terminaram; os de threads ainda vivas (pool ocioso,
+    por ex.) continuam coletando e ficam de fora em vez de serem lidos no meio da coleta."""
+
+    def __init__(self):
+        self.perfis = []  # (thread, perfil)
+        self._lock = threading.Lock()
+
+    def _novo(self) -> cProfile.Profile:
+        p = cProfile.Profile()
+        with self._lock:
+            self.perfis.append((threading.current_thread(), p))
+        p.enable()
+        return p
+
+    def _na_thread(self, frame, evento, arg):
+        sys.setprofile(None)
+        self._novo()
+
+    def iniciar(self):
+        self._novo()
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._na_thread)
+
+    def parar(self, base: str) -> list:
+        threading.setprofile(None)
+        atual = threading.current_thread()
+        with self._lock:
+            perfis = list(self.perfis)
+        parados = []
+        for t, p in perfis:
+            if t is atual or not t.is_alive():
+                p.disable()
+                parados.append(p)
+        stats = pstats.Stats(*parados)
+        stats.dump_stats(f"{base}_cpu.pstats")
+        texto = io.StringIO()
+        stats.stream = texto
+        vivas = len(perfis) - len(parados)
+        texto.write(f"Perfil de CPU da execução inteira ({len(parados)} thread(s)"
+                    + (f"; {vivas} ainda ativa(s) no fim, fora do relatório" if vivas else "")
+                    + ")\n\n== Tempo acumulado ==\n")
+        stats.sort_stats("cumulative").print_stats(PERFIL_TOP)
+        texto.write("\n== Tempo próprio ==\n")
+        stats.sort_stats("tottime").print_stats(PERFIL_TOP)
+        with open(f"{base}_cpu.txt", "w", encoding="utf-8") as f:
+            f.write(texto.getvalue())
+        return [f"{base}_cpu.pstats", f"{base}_cpu.txt"]
+
+
+# ======== Amostras de pilha (collapsed stacks) ========
+class _Amostrador(threading.Thread):
+    def __init__(self, intervalo_s: float):
+        super().__init__(name="perfil-amostrador", daemon=True)
+        self.intervalo = intervalo_s
+        self.pilhas = Counter()
+        self._parar = threading.Event()
+
+    def iniciar(self):
+        self.start()
+
+    @staticmethod
+    def _quadro(f) -> str:
+        co = f.f_code
+        return f"{co.co_name} ({os.path.basename(co.co_filename)}:{co.co_firstlineno})"
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            nomes = {t.ident: re.sub(r"_\d+$", "", t.name) for t in threading.enumerate()}  # pool-0_3 → pool-0
+            for tid, f in sys._current_frames().items():
+                if tid == self.ident:
+                    continue
+                quadros = []
+                while f is not None:
+                    quadros.append(self._quadro(f))
+                    f = f.f_back
+                self.pilhas[";".join([nomes.get(tid, "thread"), *reversed(quadros)])] += 1
+
+    def parar(self, base: str) -> list:
+        self._parar.set()
+        self.join()
+        with open(f"{base}.collapsed", "w", encoding="utf-8") as f:
+            for pilha, n in self.pilhas.most_common():
+                f.write(f"{pilha} {n}\n")
+        return [f"{base}.collapsed"]
+
+
+# ======== Memória (tracemalloc por etapa) ========
+class _Memoria:
+    """Observador da telemetria: fotografa o heap no início e no fim da primeira ocorrência de cada
+    etapa de nível mais externo da thread (as internas já aparecem no diff da externa) e, no fim,
+    lista os pontos que mais alocaram entre as duas fotos.
+
+    As fotos vão para disco e só são comparadas depois do tracemalloc.stop(): com o rastreamento
+    ligado, agrupar milhões de blocos leva dezenas de segundos; desligado, ~1 s."""
+
+    IGNORAR = (tracemalloc.__file__, "<frozen importlib", "<unknown>")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._dir = tempfile.mkdtemp(prefix="perfil_mem_")
+        self._fotos = 0
+        self._abertas = {}  # etapa → (thread, foto inicial, memória rastreada, t0)
+        self.etapas = {}    # etapa → (segundos, Δ memória, foto inicial, foto final)
+
+    def _foto(self) -> str:
+        with self._lock:
+            self._fotos += 1
+            caminho = os.path.join(self._dir, f"{self._fotos}.snap")
+        tracemalloc.take_snapshot().dump(caminho)
+        return caminho
+
+    def iniciar(self):
+        tracemalloc.start(PERFIL_QUADROS)
+        telemetria.observadores.append(self)
+
+    def inicio(self, nome: str):
+        self._local.nivel = getattr(self._local, "nivel", 0) + 1
+        if self._local.nivel > 1:
+            return
+        with self._lock:
+            if nome in self._abertas or nome in self.etapas:
+                return
+            self._abertas[nome] = None  # reserva: outra thread na mesma etapa não fotografa
+        foto = self._foto()
+        with self._lock:
+            self._abertas[nome] = (threading.get_ident(), foto, tracemalloc.get_traced_memory()[0], time.perf_counter())
+
+    def fim(self, nome: str):
+        self._local.nivel -= 1
+        with self._lock:
+            aberta = self._abertas.get(nome)
+            if aberta is None or aberta[0] != threading.get_ident():
+                return
+            del self._abertas[nome]
+        _, antes, atual0, t0 = aberta
+        seg, delta = time.perf_counter() - t0, tracemalloc.get_traced_memory()[0] - atual0
+        depois = self._foto()
+        with self._lock:
+            self.etapas[nome] = (seg, delta, antes, depois)
+
+    def _relevantes(self, estatisticas) -> list:
+        return [s for s in estatisticas if not s.traceback[0].filename.startswith(self.IGNORAR)][:PERFIL_TOP]
+
+    def parar(self, base: str) -> list:
+        telemetria.observadores.remove(self)
+        atual, pico = tracemalloc.get_traced_memory()
+        final = self._foto()
+        tracemalloc.stop()
+        mib = 2**20
+        try:
+            with open(f"{base}_mem.txt", "w", encoding="utf-8") as f:
+                f.write(f"Memória rastreada no fim: {atual / mib:.1f} MiB · pico: {pico / mib:.1f} MiB"
+                        f" · RSS pico: {telemetria.rss_pico_mib()} MiB\n\n== Maiores alocações vivas no fim ==\n")
+                f.writelines(f"{s}\n" for s in self._relevantes(tracemalloc.Snapshot.load(final).statistics("lineno")))
+                for nome, (seg, delta, antes, depois) in sorted(self.etapas.items(), key=lambda kv: -abs(kv[1][1])):
+                    diff = tracemalloc.Snapshot.load(depois).compare_to(tracemalloc.Snapshot.load(antes), "traceback")
+                    f.write(f"\n== Etapa {nome} (1ª ocorrência: {seg:.2f}s, Δ {delta / mib:+.1f} MiB) ==\n")
+                    for s in self._relevantes(diff):
+                        f.write(f"{s.size_diff / 1024:+10.0f} KiB {s.count_diff:+8d} blocos  "
+                                + " ← ".join(f"{os.path.basename(q.filename)}:{q.lineno}" for q in reversed(s.traceback)) + "\n")
+        finally:
+            shutil.rmtree(self._dir, ignore_errors=True)
+        return [f"{base}_mem.txt"]
+
+
+@contextmanager
+def execucao(script: str, escrever=print, valor: str = PERFIL):
+    """Liga os modos de PERFIL durante o bloco e grava os arquivos em PERFIL_DIR no fim (mesmo com erro)."""
+    ativos = modos(valor)
+    if not ativos:
+        yield
+        return
+    coletores = []
+    if "mem" in ativos:
+        coletores.append(_Memoria())
+    if "amostras" in ativos:
+        coletores.append(_Amostrador(PERFIL_INTERVALO_MS / 1000))
+    if "cpu" in ativos:
+        coletores.append(_Cpu())  # por último: não mede a partida dos outros
+    for c in coletores:
+        c.iniciar()
+    escrever(f"🔬 Perfilamento ligado: {', '.join(m for m in MODOS if m in ativos)}.")
+    try:
+        yield
+    finally:
+        base = os.path.join(PERFIL_DIR, script)
+        arquivos = []
+        for c in reversed(coletores):
+            try:
+                os.makedirs(PERFIL_DIR, exist_ok=True)
+                arquivos += c.parar(base)
+            except OSError as e:
+                escrever(f"⚠️ Não consegui gravar o perfil ({e}).")
+        if arquivos:
+            escrever(f"🔬 Perfil gravado: {', '.join(arquivos)}.")
@@ -2,31 +2,60 @@
 """
 Importa arquivo (Excel/CSV) do Drive para 'bd_geral' (sempre limpando antes):
 - Lê nome em config!C2, busca na pasta PASTA_ID
-- Converte p/ Google Sheets temporário com nome __TMP_IMPORTADOR__<arquivo>
-  (usa um único temporário: se existir com o mesmo nome, apaga e recria)
-- Lê 1ª aba com UNFORMATTED_VALUE + SERIAL_NUMBER e escreve RAW (sem apóstrofo)
+- XLSX: baixa o arquivo (files.get_media) e lê a 1ª aba localmente (leitura_local.py),
+  com a mesma semântica de UNFORMATTED_VALUE + SERIAL_NUMBER
+- CSV e outros formatos (ou falha na leitura local): converte p/ Google Sheets temporário com nome
+  __TMP_IMPORTADOR__<arquivo> (usa um único temporário: se existir com o mesmo nome, apaga e recria)
+  e lê a 1ª aba com UNFORMATTED_VALUE + SERIAL_NUMBER, em janelas de BATCH linhas (janelas.py)
+- Escreve RAW (sem apóstrofo)
+- Pula tudo (conversão, limpeza e escritas) se o arquivo não mudou desde a última importação
+  (impressão digital md5Checksum/modifiedTime do Drive gravada em config!K2) — inclusive o
+  timestamp: config!A2/B2 e o Resumo_MENSAL!J2 replicado ficam com o da última importação de fato
+- Sincronização incremental: só reenvia lotes cujo hash mudou desde a última execução
+- Grava snapshot local de 'bd_geral' (chave: arquivo-fonte + modifiedTime) p/ o distribuidor, com os
+  valores formatados que ele leria pela API
 - Converte APENAS as colunas: L, P, Q, R, Z, AA, AC, AD, AE, AF, AG, AJ, AL, AM, AN → número
-- Lotes grandes (BATCH=5000) + retry/backoff p/ evitar 429
+- Lotes grandes (BATCH=5000) sob cota adaptativa (cota.py) + retry p/ 429/5xx
+- Grade redimensionada 1x no início; lotes alterados agrupados em values.batchUpdate (lotes.py)
+- Pipeline: enquanto ESCRITORES threads gravam lotes (intervalos disjuntos), o próximo lote já é
+  lido/convertido; no máximo FILA_LOTES lotes prontos esperando escrita (memória limitada)
 - Garante exclusão do temporário ao final (mesmo se der erro)
-- Logs detalhados no CMD
+- Logs detalhados no CMD + relatório JSON da execução (telemetria.py) com tempo por etapa e
+  chamadas/bytes/429 por endpoint
+- Perfilamento opcional (PERFIL=cpu,amostras,mem; perfil.py): cProfile e pilhas amostradas da
+  execução inteira e alocações do tracemalloc por etapa em perfil/
 
 AJUSTE: após concluir a importação, o timestamp gravado em config!A2 desta
 planilha é replicado para todas as planilhas listadas em config!I2:I, na célula
 Resumo_MENSAL!J2 de cada uma.
 """
 
+import contextlib
+import itertools
 import random
 import re
+import tempfile
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from typing import Any, List
 
 import pytz
 import gspread
-from gspread.exceptions import WorksheetNotFound
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+from gspread.exceptions import APIError, WorksheetNotFound
 from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseDownload
+
+import conversores
+import estado
+import janelas
+import leitura_local
+import paralelo
+import perfil
+import sessao
+import telemetria
+from cota import AdaptiveRateLimiter, retry_after_seconds
+from lotes import chunk_data_batch, count_cells_in_entry, entrada
 
 # ======== CONFIG ========
 CAMINHO_CRED = "credenciais.json"
@@ -38,11 +67,61 @@ ABA_CONFIG = "config"
 ABA_DESTINO = "bd_geral"
 
 BATCH = 5000
-RATE_LIMIT_SLEEP = 0.4
 MAX_TRIES = 6
 
+# Pipeline leitura → conversão → escrita
+ESCRITORES = 3            # lotes gravados em paralelo (cada um no seu intervalo)
+FILA_LOTES = 4            # lotes prontos em voo, no máximo
+PROGRESSO_A_CADA = 15.0   # segundos entre atualizações de progresso em config!B2
+MAX_CELLS_PER_BATCH = 400000  # células por values.batchUpdate (vários lotes numa requisição)
+
+# Replicação do timestamp em Resumo_MENSAL!J2: planilhas gravadas em paralelo, todas sob LIMITE_ESCRITA
+REPLICACAO_PARALELA = 8
+
+# XLSX lido localmente (sem o round trip do temporário convertido pelo Google)
+LEITURA_LOCAL = True
+DOWNLOAD_CHUNK = 8 * 1024 * 1024
+
+# Pula a importação se o arquivo-fonte não mudou (id + md5Checksum, ou modifiedTime se o Drive
+# não der md5) desde a última importação concluída. Apague config!K2 para forçar a reimportação.
+# Pulada, a execução não regrava config!A2/B2 nem replica o J2: o timestamp continua sendo o da
+# última importação com dados novos.
+PULAR_SE_INALTERADO = True
+CEL_FINGERPRINT = "K2"
+
+# Sincronização incremental de 'bd_geral': guarda o hash de cada lote de BATCH linhas
+# (em estado.ESTADO_DIR) e só reenvia lotes alterados. Sem estado válido → limpa e reescreve.
+# O estado guarda a impressão digital gravada em config!K2 na mesma importação: se K2 tiver outra
+# (estado velho restaurado do cache, K2 apagada à mão), reescreve tudo.
+SYNC_INCREMENTAL = True
+ESTADO_SYNC = "sync_bd_geral"
+
+# Snapshot local de 'bd_geral' (estado.ESTADO_DIR/snapshot) para o Importar_BD_Geral.py
+# reaproveitar sem reler a aba inteira pela API. Guarda os valores FORMATADOS (os mesmos de um get
+# da aba): lotes reescritos os trazem na resposta do batchUpdate; inalterados vêm do snapshot
+# anterior (ou, se ele não valer mais, de uma leitura desses lotes). Desligado como o USAR_SNAPSHOT
+# de lá (só serve se os dois estiverem ligados); gravar sem ninguém ler só custa disco e tempo.
+GERAR_SNAPSHOT = False
+SNAPSHOT_NOME = "bd_geral"
+
+# Cota adaptativa (AIMD por minuto) — substitui a pausa fixa entre lotes
+ESCRITAS_POR_MINUTO = 50
+LEITURAS_POR_MINUTO = 50
+COTA_MIN_POR_MINUTO = 10
+COTA_MAX_POR_MINUTO = 60
+
+# Relatório JSON da execução (telemetria.py: tempo por etapa, chamadas/429/retries por endpoint);
+# "" = só o resumo no log
+RELATORIO_EXECUCAO = "relatorio_ponto_geral.json"
+
 TZ = pytz.timezone("America/Sao_Paulo")
 
+LIMITE_ESCRITA = AdaptiveRateLimiter(ESCRITAS_POR_MINUTO, COTA_MIN_POR_MINUTO, COTA_MAX_POR_MINUTO)
+LIMITE_LEITURA = AdaptiveRateLimiter(LEITURAS_POR_MINUTO, COTA_MIN_POR_MINUTO, COTA_MAX_POR_MINUTO)
+
+# O httplib2 por trás do googleapiclient não é thread-safe: cada thread usa o seu cliente Sheets
+_SHEETS_POR_THREAD = None
+
 
 def log(msg: str):
     print(f"[{datetime.now(TZ).strftime('%d/%m/%Y %H:%M:%S')}] {msg}")
@@ -54,29 +133,41 @@ def auth_clients():
         "https://www.googleapis.com/auth/drive",
         "https://www.googleapis.com/auth/spreadsheets",
     ]
-    creds = Credentials.from_service_account_file(CAMINHO_CRED, scopes=scopes)
-    gc = gspread.authorize(creds)
-    drive = build("drive", "v3", credentials=creds)
-    sheets = build("sheets", "v4", credentials=creds)
+    creds = sessao.credenciais(CAMINHO_CRED, scopes)
+    gc = sessao.cliente_gspread(creds)
+    drive = sessao.cliente_api("drive", "v3", creds)
+    sheets = sessao.cliente_api("sheets", "v4", creds)
+    global _SHEETS_POR_THREAD
+    _SHEETS_POR_THREAD = sessao.ClientesPorThread("sheets", "v4", creds, atual=sheets)
     log("✅ Autenticação OK.")
     return gc, drive, sheets
 
 
-def open_ws(gc: gspread.Client, spreadsheet_id: str, title: str) -> gspread.Worksheet:
-    sh = gc.open_by_key(spreadsheet_id)
+def thread_sheets_api(sheets_api):
+    """Cliente Sheets da thread atual (criado na 1ª chamada dela)."""
+    if _SHEETS_POR_THREAD is None:
+        return sheets_api
+    return _SHEETS_POR_THREAD.get()
+
+
+def open_ws(planilhas: sessao.CacheDePlanilhas, spreadsheet_id: str, title: str) -> gspread.Worksheet:
+    """Planilha + aba (metadados em cache) sob a cota de leitura, com retry"""
+    sh = call_with_retry(lambda: planilhas.planilha(spreadsheet_id), LIMITE_LEITURA)
     try:
-        return sh.worksheet(title)
+        return call_with_retry(lambda: planilhas.aba(sh, title), LIMITE_LEITURA)
     except WorksheetNotFound:
         raise RuntimeError(f"❌ Aba '{title}' não encontrada no destino.")
 
 
 def read_cell(ws: gspread.Worksheet, a1: str) -> str:
-    v = ws.acell(a1).value
+    """acell sob a cota de leitura, com retry"""
+    v = call_with_retry(lambda: ws.acell(a1), LIMITE_LEITURA, cells=1).value
     return (v or "").strip()
 
 
 def write_cell(ws: gspread.Worksheet, a1: str, value: Any):
-    ws.update_acell(a1, value)
+    """update_acell sob a cota de escrita, com retry"""
+    call_with_retry(lambda: ws.update_acell(a1, value), LIMITE_ESCRITA, cells=1)
 
 
 def a1_from_rc(row: int, col: int) -> str:
@@ -97,27 +188,39 @@ def ensure_size(ws: gspread.Worksheet, need_last_row: int, need_last_col: int):
     cols = max(ws.col_count, need_last_col)
     if rows != ws.row_count or cols != ws.col_count:
         log(f"🧱 Redimensionando grade do destino para {rows} linhas x {cols} colunas…")
-        ws.resize(rows=rows, cols=cols)
+        call_with_retry(lambda: ws.resize(rows=rows, cols=cols), LIMITE_ESCRITA)
 
 
-def find_in_folder_by_name(drive, pasta_id: str, nome: str) -> str:
+def find_in_folder_by_name(drive, pasta_id: str, nome: str) -> dict:
+    """Retorna os metadados do arquivo (id, name, mimeType, modifiedTime, md5Checksum)."""
     # escapa apóstrofo para a query do Drive
     safe = nome.replace("'", "\\'")
     query = "name = '" + safe + "' and '" + pasta_id + "' in parents and trashed = false"
     log(f"🔎 Procurando '{nome}' na pasta {pasta_id}…")
-    resp = drive.files().list(
+    resp = execute_with_retry(lambda: drive.files().list(
         q=query,
-        fields="files(id,name)",
+        fields="files(id,name,mimeType,modifiedTime,md5Checksum)",
         includeItemsFromAllDrives=True,
         supportsAllDrives=True,
         corpora="allDrives",
-    ).execute()
+    ), LIMITE_LEITURA)
     files = resp.get("files", [])
     if not files:
         raise RuntimeError(f"❌ Arquivo '{nome}' não encontrado na pasta.")
-    file_id = files[0]["id"]
-    log(f"📄 Arquivo encontrado: id={file_id}")
-    return file_id
+    meta = files[0]
+    log(f"📄 Arquivo encontrado: id={meta['id']} (modificado em {meta.get('modifiedTime')})")
+    return meta
+
+
+def file_fingerprint(meta: dict) -> str:
+    """Identifica o conteúdo do arquivo: md5 (arquivos binários) ou modifiedTime (arquivos Google)."""
+    return f"{meta['id']}:{meta.get('md5Checksum') or meta.get('modifiedTime', '')}"
+
+
+def drive_modified_time(drive, file_id: str) -> str:
+    res = execute_with_retry(lambda: drive.files().get(
+        fileId=file_id, fields="modifiedTime", supportsAllDrives=True), LIMITE_LEITURA)
+    return res.get("modifiedTime", "")
 
 
 def trash_file(drive, file_id: str):
@@ -135,13 +238,13 @@ def find_existing_temp_and_trash(drive, temp_name: str):
     """Apaga todos os temporários com esse nome, se existirem. (sem f-string com backslash)"""
     safe_name = temp_name.replace("'", "\\'")
     query = "name = '" + safe_name + "' and trashed = false"
-    resp = drive.files().list(
+    resp = execute_with_retry(lambda: drive.files().list(
         q=query,
         fields="files(id,name)",
         includeItemsFromAllDrives=True,
         supportsAllDrives=True,
         corpora="allDrives",
-    ).execute()
+    ), LIMITE_LEITURA)
     files = resp.get("files", [])
     if files:
         log(f"🧹 Encontrado(s) temporário(s) anterior(es): {len(files)} — enviando à lixeira…")
@@ -154,46 +257,286 @@ def create_temp_sheet(drive, src_file_id: str, temp_name: str) -> str:
     find_existing_temp_and_trash(drive, temp_name)
     log("🧪 Convertendo arquivo para Google Sheets temporário…")
     body = {"name": temp_name, "mimeType": "application/vnd.google-apps.spreadsheet"}
-    nf = drive.files().copy(fileId=src_file_id, body=body, supportsAllDrives=True).execute()
+    nf = execute_with_retry(lambda: drive.files().copy(fileId=src_file_id, body=body, supportsAllDrives=True), LIMITE_ESCRITA)
     temp_id = nf["id"]
     log(f"✅ Temporário criado: {temp_id}")
     return temp_id
 
 
-def values_get_unformatted(sheets_api, spreadsheet_id: str, sheet_title: str) -> List[List[Any]]:
-    """Lê valores não formatados e datas/horas como serial (sem apóstrofo)."""
-    log("📖 Lendo dados do temporário (UNFORMATTED_VALUE + SERIAL_NUMBER)…")
-    res = sheets_api.spreadsheets().values().get(
-        spreadsheetId=spreadsheet_id,
-        range=sheet_title,
-        valueRenderOption="UNFORMATTED_VALUE",
-        dateTimeRenderOption="SERIAL_NUMBER"
-    ).execute()
-    values = res.get("values", [])
-    log(f"📦 Linhas lidas: {len(values)}")
-    return values
+def iter_values_unformatted(sheets_api, spreadsheet_id: str, sheet_title: str, total_rows: int):
+    """Gera blocos de BATCH linhas (UNFORMATTED_VALUE + SERIAL_NUMBER, sem apóstrofo), com prefetch da janela seguinte."""
+    log(f"📖 Lendo dados do temporário em janelas de {BATCH} linhas (UNFORMATTED_VALUE + SERIAL_NUMBER)…")
 
+    def fetch(primeira: int, ultima: int):
+        res = execute_with_retry(lambda: thread_sheets_api(sheets_api).spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=[f"'{sheet_title}'!{primeira}:{ultima}"],
+            valueRenderOption="UNFORMATTED_VALUE",
+            dateTimeRenderOption="SERIAL_NUMBER"
+        ), LIMITE_LEITURA)
+        return res.get("valueRanges", [{}])[0].get("values", [])
 
-def values_update_raw_with_retry(sheets_api, dest_spreadsheet_id: str, a1_range: str, values: List[List[Any]]):
-    """update RAW com retry/backoff p/ 429/500/503"""
+    return janelas.iter_windows(fetch, total_rows, BATCH)
+
+
+def _blocos_medidos(linhas, tamanho: int):
+    """Blocos de `tamanho` linhas de um gerador, com o tempo de leitura de cada um em fonte.leitura_local."""
+    while True:
+        with telemetria.etapa("fonte.leitura_local"):
+            bloco = list(itertools.islice(linhas, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+
+@contextlib.contextmanager
+def read_source_locally(drive, src: dict):
+    """
+    Baixa o arquivo (get_media, em partes) e abre a 1ª aba para leitura local, como UNFORMATTED_VALUE +
+    SERIAL_NUMBER: (linhas, colunas, blocos de BATCH linhas). Os blocos são lidos do arquivo à medida
+    que são consumidos (só alguns na memória); o arquivo baixado vive até o fim do `with`.
+    """
+    log(f"⬇️ Baixando '{src['name']}' para leitura local…")
+    with tempfile.TemporaryFile() as fh:
+        req = drive.files().get_media(fileId=src["id"], supportsAllDrives=True)
+        down = MediaIoBaseDownload(fh, req, chunksize=DOWNLOAD_CHUNK)
+        done = False
+        with telemetria.etapa("fonte.download"):
+            while not done:
+                _, done = down.next_chunk(num_retries=MAX_TRIES)
+        log(f"📖 {fh.tell()} bytes baixados. Lendo localmente…")
+        fh.seek(0)
+        with telemetria.etapa("fonte.leitura_local"):
+            linhas, colunas, rows = leitura_local.read_local(fh, src.get("mimeType", ""), src.get("name", ""))
+        log(f"📦 Linhas a ler: {linhas}")
+        yield linhas, colunas, _blocos_medidos(rows, BATCH)
+
+
+def call_with_retry(fn, limiter: AdaptiveRateLimiter, cells: int = 0):
+    """
+    fn() sob a cota adaptativa; 429 reduz a taxa (respeita Retry-After), 500/503 com backoff.
+    Vale para o googleapiclient (HttpError) e para o gspread (APIError).
+    """
     attempt = 0
     while True:
+        telemetria.contar("espera_cota_s", limiter.acquire(cells))
         try:
-            return sheets_api.spreadsheets().values().update(
-                spreadsheetId=dest_spreadsheet_id,
-                range=a1_range,
-                valueInputOption="RAW",
-                body={"values": values}
-            ).execute()
-        except HttpError as e:
-            status = getattr(e, "resp", None).status if getattr(e, "resp", None) else None
+            res = fn()
+        except (HttpError, APIError) as e:
+            if isinstance(e, APIError):
+                status = getattr(e.response, "status_code", None)
+            else:
+                status = getattr(e, "resp", None).status if getattr(e, "resp", None) else None
             if status in (429, 500, 503) and attempt < MAX_TRIES - 1:
-                delay = (2 ** attempt) + random.uniform(0.0, 0.5)
-                log(f"⏳ {status} rate-limit/erro transitório — retry {attempt+1}/{MAX_TRIES} em {delay:.1f}s…")
-                time.sleep(delay)
+                telemetria.contar("retries")
+                if status == 429:
+                    pause = limiter.on_throttle(retry_after_seconds(e))
+                    log(f"⏳ 429 rate-limit — cota {limiter.rate:.0f}/min, pausa {pause:.1f}s; retry {attempt+1}/{MAX_TRIES}…")
+                else:
+                    delay = (2 ** attempt) + random.uniform(0.0, 0.5)
+                    log(f"⏳ {status} erro transitório — retry {attempt+1}/{MAX_TRIES} em {delay:.1f}s…")
+                    telemetria.contar("backoff_s", delay)
+                    time.sleep(delay)
                 attempt += 1
                 continue
             raise
+        limiter.on_success()
+        telemetria.contar("celulas_enviadas", cells)
+        return res
+
+
+def execute_with_retry(make_request, limiter: AdaptiveRateLimiter, cells: int = 0):
+    """Requisição do googleapiclient (make_request().execute()) sob a cota, com retry"""
+    return call_with_retry(lambda: make_request().execute(), limiter, cells)
+
+
+def values_update_raw_with_retry(sheets_api, dest_spreadsheet_id: str, a1_range: str, values: List[List[Any]]):
+    """update RAW sob a cota de escrita"""
+    return execute_with_retry(lambda: sheets_api.spreadsheets().values().update(
+        spreadsheetId=dest_spreadsheet_id,
+        range=a1_range,
+        valueInputOption="RAW",
+        body={"values": values}
+    ), LIMITE_ESCRITA, cells=sum(len(r) for r in values))
+
+
+def values_batch_update_raw_with_retry(sheets_api, dest_spreadsheet_id: str, data: List[dict],
+                                       formatados: bool = False):
+    """batchUpdate RAW (vários intervalos numa requisição) sob a cota de escrita;
+    formatados=True: a resposta traz os valores gravados já formatados (responses[i].updatedData)"""
+    body = {"valueInputOption": "RAW", "data": data}
+    if formatados:
+        body.update(includeValuesInResponse=True, responseValueRenderOption="FORMATTED_VALUE")
+    return execute_with_retry(lambda: sheets_api.spreadsheets().values().batchUpdate(
+        spreadsheetId=dest_spreadsheet_id, body=body
+    ), LIMITE_ESCRITA, cells=sum(count_cells_in_entry(e) for e in data))
+
+
+def preparar_lotes(blocos, ws_dest: gspread.Worksheet, prev_blocks: list, prev_cols: int, resumo: dict, snap=None):
+    """
+    Gera as entradas {"range", "values"} dos lotes alterados, na ordem (com a contagem de células, lotes.py);
+    lotes inalterados só entram no resumo (rows, cols, blocks = hashes) e no snapshot; os alterados
+    entram no snapshot quando a escrita deles voltar (EscritaEmPipeline).
+    """
+    linha_destino = 1
+    for bloco_idx, bloco in enumerate(blocos, 1):
+        with telemetria.etapa("lotes.conversao"):
+            bloco_fixed = coerce_columns_to_number(bloco)
+        resumo["cols"] = max(resumo["cols"], max((len(r) for r in bloco_fixed), default=0))
+        largura = max(resumo["cols"], prev_cols)
+
+        rng = range_a1(linha_destino, 1, len(bloco_fixed), largura)
+        with telemetria.etapa("lotes.hash"):
+            h = estado.rows_hash(bloco_fixed)
+        resumo["blocks"].append(h)
+        if bloco_idx <= len(prev_blocks) and prev_blocks[bloco_idx - 1] == h:
+            log(f"⏭️ Lote {bloco_idx}: inalterado ({rng}).")
+            if snap is not None:
+                with telemetria.etapa("lotes.snapshot"):
+                    snap.inalterado(bloco_idx - 1, rng, linha_destino - 1, len(bloco_fixed))
+        else:
+            if snap is not None:
+                snap.reescrito(bloco_idx - 1, rng, len(bloco_fixed))
+            bloco_padded = [row + [""] * (largura - len(row)) for row in bloco_fixed]
+            # a grade já foi ajustada no início; só chama a API se a fonte vier maior que o previsto
+            ensure_size(ws_dest, need_last_row=linha_destino + len(bloco_padded) - 1, need_last_col=largura)
+            log(f"📥 Lote {bloco_idx}: {len(bloco_padded)} linhas no intervalo {rng}…")
+            yield entrada(rng, bloco_padded, celulas=len(bloco_padded) * largura)
+
+        linha_destino += len(bloco_fixed)
+        resumo["rows"] += len(bloco_fixed)
+
+
+class SnapshotFormatado:
+    """
+    Snapshot de 'bd_geral' com os valores formatados, gravado na ordem das linhas. Os lotes chegam
+    fora de ordem (escritores em paralelo) e esperam em `prontos` até os anteriores chegarem.
+    Lote inalterado: linhas do snapshot anterior se ele ainda vale (planilha sem escrita desde
+    então), senão lidas da planilha. Tudo roda na thread principal (preparo e colheita dos lotes).
+    """
+
+    def __init__(self, sheets_api, anterior=None):
+        self.sheets_api = sheets_api
+        self.writer = estado.SnapshotWriter(SNAPSHOT_NOME)
+        self.anterior = anterior  # iterador de linhas do snapshot anterior (ou None)
+        self.pos_anterior = 0
+        self.prontos = {}   # índice do lote → linhas formatadas, ou (rng, início, n) se inalterado
+        self.indices = {}   # intervalo de um lote reescrito → (índice, nº de linhas)
+        self.proximo = 0
+        self.lidos = 0      # lotes inalterados lidos da planilha
+
+    @property
+    def rows(self):
+        return self.writer.rows
+
+    def inalterado(self, idx: int, rng: str, inicio: int, n: int):
+        self.prontos[idx] = (rng, inicio, n)
+        self._descarregar()
+
+    def reescrito(self, idx: int, rng: str, n: int):
+        self.indices[rng] = (idx, n)
+
+    def gravados(self, parte: List[dict], respostas: List[dict]):
+        for e, r in zip(parte, respostas):
+            idx, n = self.indices.pop(e["range"])
+            linhas = r.get("updatedData", {}).get("values", [])
+            self.prontos[idx] = linhas + [[] for _ in range(n - len(linhas))]  # a API omite as linhas vazias do fim
+        self._descarregar()
+
+    def _do_anterior(self, rng: str, inicio: int, n: int):
+        if self.anterior is not None:
+            for _ in range(inicio - self.pos_anterior):
+                next(self.anterior, None)
+            linhas = list(itertools.islice(self.anterior, n))
+            self.pos_anterior = inicio + len(linhas)
+            if len(linhas) == n:
+                return linhas
+        self.lidos += 1
+        res = execute_with_retry(lambda: thread_sheets_api(self.sheets_api).spreadsheets().values().get(
+            spreadsheetId=SPREADSHEET_ID_DEST, range=rng, valueRenderOption="FORMATTED_VALUE"
+        ), LIMITE_LEITURA)
+        linhas = res.get("values", [])
+        return linhas + [[] for _ in range(n - len(linhas))]
+
+    def _descarregar(self):
+        while self.proximo in self.prontos:
+            linhas = self.prontos.pop(self.proximo)
+            if isinstance(linhas, tuple):
+                linhas = self._do_anterior(*linhas)
+            self.writer.write_rows(linhas)
+            self.proximo += 1
+
+    def _fechar_anterior(self):
+        if self.anterior is not None:
+            self.anterior.close()  # solta o arquivo antes de o commit trocá-lo
+            self.anterior = None
+
+    def commit(self, meta: dict):
+        if self.prontos or self.indices:
+            raise RuntimeError(f"snapshot incompleto: lote {self.proximo} não chegou")
+        self._fechar_anterior()
+        self.writer.commit(dict(meta, valores="FORMATTED_VALUE"))
+
+    def abort(self):
+        self._fechar_anterior()
+        self.writer.abort()
+
+
+def snapshot_anterior(modificada: str):
+    """Linhas do snapshot anterior, se a planilha não foi escrita desde que ele foi gravado; senão None."""
+    meta = estado.snapshot_meta(SNAPSHOT_NOME)
+    if (meta is None or meta.get("valores") != "FORMATTED_VALUE" or meta.get("spreadsheet_id") != SPREADSHEET_ID_DEST
+            or meta.get("spreadsheet_modified") != modificada):
+        return None
+    return estado.iter_snapshot_rows(SNAPSHOT_NOME)
+
+
+class EscritaEmPipeline:
+    """Grava lotes em paralelo (intervalos disjuntos), com no máximo FILA_LOTES em voo."""
+
+    def __init__(self, sheets_api, ws_config: gspread.Worksheet, snap: SnapshotFormatado | None = None):
+        self.sheets_api = sheets_api
+        self.ws_config = ws_config
+        self.snap = snap
+        self.pool = ThreadPoolExecutor(max_workers=ESCRITORES)
+        self.em_voo = set()
+        self.linhas_gravadas = 0
+        self.ultimo_progresso = time.monotonic()
+
+    def _gravar(self, parte: List[dict]):
+        resp = values_batch_update_raw_with_retry(thread_sheets_api(self.sheets_api), SPREADSHEET_ID_DEST, parte,
+                                                  formatados=self.snap is not None)
+        return parte, resp
+
+    def _colher(self, concluidos):
+        for fut in concluidos:
+            self.em_voo.discard(fut)
+            parte, resp = fut.result()  # erro de um escritor sobe aqui
+            self.linhas_gravadas += sum(len(e["values"]) for e in parte)
+            if self.snap is not None:
+                with telemetria.etapa("lotes.snapshot"):
+                    self.snap.gravados(parte, resp.get("responses", []))
+        if time.monotonic() - self.ultimo_progresso >= PROGRESSO_A_CADA:
+            self.ultimo_progresso = time.monotonic()
+            # só informativo: passa pela mesma cota dos escritores e não derruba a importação se falhar
+            try:
+                write_cell(self.ws_config, "B2", f"📥 Importando… {self.linhas_gravadas} linhas gravadas.")
+            except Exception as e:
+                log(f"⚠️ Não consegui atualizar o progresso em config!B2 ({e}).")
+
+    def enviar(self, parte: List[dict]):
+        while len(self.em_voo) >= FILA_LOTES:
+            concluidos, _ = wait(self.em_voo, return_when=FIRST_COMPLETED)
+            self._colher(concluidos)
+        self.em_voo.add(self.pool.submit(self._gravar, parte))
+
+    def concluir(self):
+        concluidos, _ = wait(self.em_voo)
+        self._colher(concluidos)
+        self.pool.shutdown()
+
+    def cancelar(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
 
 
 # ---------- COERÇÃO SOMENTE NAS COLUNAS PEDIDAS ----------
@@ -208,45 +551,11 @@ def col_letter_to_index(letter: str) -> int:
     return val if val > 0 else 1
 
 TARGET_COLS = {col_letter_to_index(c) for c in TARGET_COLS_LETTERS}
-
-def to_number_if_possible(v: Any):
-    """Remove apóstrofo à esquerda e tenta parse numérico (pt-BR/US)."""
-    if v is None:
-        return ""
-    if isinstance(v, (int, float)):
-        return v
-    s = str(v).strip()
-    if s == "":
-        return ""
-    if s.startswith("'"):
-        s = s[1:].strip()
-    s_br = s.replace(" ", "").replace("R$", "")
-    if any(c in s_br for c in ",."):
-        if "," in s_br and (s_br.rfind(",") > s_br.rfind(".")):
-            try:
-                f = float(s_br.replace(".", "").replace(",", "."))
-                return int(f) if f.is_integer() else f
-            except:
-                pass
-    try:
-        f = float(s.replace(" ", "").replace("R$", ""))
-        return int(f) if f.is_integer() else f
-    except:
-        try:
-            return int(s)
-        except:
-            return s
+TARGET_IDX = sorted(c - 1 for c in TARGET_COLS)  # 0-based, para o conversor por colunas
 
 def coerce_columns_to_number(block: List[List[Any]]) -> List[List[Any]]:
-    out = []
-    for row in block:
-        if not row:
-            out.append(row); continue
-        new_row = []
-        for idx, val in enumerate(row, start=1):
-            new_row.append(to_number_if_possible(val) if idx in TARGET_COLS else val)
-        out.append(new_row)
-    return out
+    """Converte só as colunas-alvo (conversores.py: caminho rápido + memória por texto)."""
+    return conversores.coerce_number_columns(block, TARGET_IDX)
 # ---------------------------------------------------------
 
 
@@ -258,7 +567,7 @@ def normalize_sheet_id(s: str) -> str:
 
 def read_destinations_from_config(ws_config: gspread.Worksheet, col_letter: str = "I", start_row: int = 2) -> List[str]:
     """Lê config!I2:I e retorna IDs/URLs não vazios."""
-    vals = ws_config.get(f"{col_letter}{start_row}:{col_letter}")
+    vals = call_with_retry(lambda: ws_config.get(f"{col_letter}{start_row}:{col_letter}"), LIMITE_LEITURA)
     out: List[str] = []
     for row in vals:
         if row and str(row[0]).strip():
@@ -266,9 +575,32 @@ def read_destinations_from_config(ws_config: gspread.Worksheet, col_letter: str
     return out
 
 def write_timestamp_to_resumo_j2(sheets_api, spreadsheet_id: str, when_str: str):
-    """Escreve o timestamp em Resumo_MENSAL!J2 com retry/backoff."""
+    """Escreve o timestamp em Resumo_MENSAL!J2 com retry/backoff (pode rodar em qualquer thread)."""
     target_id = normalize_sheet_id(spreadsheet_id)
-    values_update_raw_with_retry(sheets_api, target_id, "Resumo_MENSAL!J2", [[when_str]])
+    with telemetria.destino(target_id), telemetria.etapa("destino"):
+        values_update_raw_with_retry(thread_sheets_api(sheets_api), target_id, "Resumo_MENSAL!J2", [[when_str]])
+
+def replicate_timestamp(sheets_api, destinos: List[str], when_str: str):
+    """
+    Resumo_MENSAL!J2 de cada planilha em config!I, até REPLICACAO_PARALELA ao mesmo tempo.
+    IDs repetidos (mesmo ID em URL e puro, por ex.) são gravados 1x. Loga falhas e latências.
+    """
+    unicos = {}
+    for dst in destinos:
+        unicos.setdefault(normalize_sheet_id(dst), dst)
+    if len(unicos) < len(destinos):
+        log(f"ℹ️ {len(destinos) - len(unicos)} destino(s) repetido(s) ignorado(s).")
+
+    resultados = paralelo.fan_out(
+        lambda ssid: write_timestamp_to_resumo_j2(sheets_api, ssid, when_str), unicos, REPLICACAO_PARALELA)
+    for r in resultados:
+        if not r["ok"]:
+            log(f"❌ Falha ao escrever timestamp em '{unicos[r['item']]}' ({r['segundos']:.1f}s): {r['erro']}")
+    res = paralelo.resumo(resultados)
+    log(f"✅ Replicação concluída — sucesso: {res['ok']}, falhas: {res['falhas']}")
+    if resultados:
+        lentos = ", ".join(f"{ssid} {seg:.1f}s" for ssid, seg in res["mais_lentos"])
+        log(f"   ⏱️ latência p50 {res['p50']:.1f}s · p95 {res['p95']:.1f}s · máx {res['max']:.1f}s — mais lentos: {lentos}")
 # ==============================================
 
 
@@ -277,66 +609,134 @@ def importar_excel_para_bd_geral():
     gc, drive, sheets_api = auth_clients()
 
     log("📂 Abrindo abas de destino…")
-    ws_config = open_ws(gc, SPREADSHEET_ID_DEST, ABA_CONFIG)
-    ws_dest = open_ws(gc, SPREADSHEET_ID_DEST, ABA_DESTINO)
+    planilhas = sessao.CacheDePlanilhas(gc)
+    with telemetria.etapa("abertura"):
+        ws_config = open_ws(planilhas, SPREADSHEET_ID_DEST, ABA_CONFIG)
+        ws_dest = open_ws(planilhas, SPREADSHEET_ID_DEST, ABA_DESTINO)
 
     log("🧭 Lendo parâmetros em config…")
-    nome_arquivo = read_cell(ws_config, "C2")
+    with telemetria.etapa("config.leitura"):
+        nome_arquivo = read_cell(ws_config, "C2")
     if not nome_arquivo:
         raise RuntimeError("❌ 'config!C2' vazio. Informe o nome do arquivo (com extensão).")
     log(f"📝 Nome do arquivo a importar: {nome_arquivo}")
 
     temp_id = ""
     temp_name = f"__TMP_IMPORTADOR__{nome_arquivo}"
+    snap = None
+    leitura = contextlib.ExitStack()  # arquivo baixado da leitura local, aberto enquanto os blocos são lidos
     try:
-        # Sempre converte usando um ÚNICO temporário (apaga anteriores com o mesmo nome)
-        src_file_id = find_in_folder_by_name(drive, PASTA_ID, nome_arquivo)
-        temp_id = create_temp_sheet(drive, src_file_id, temp_name)
-
-        log("🧹 Limpando aba 'bd_geral'…")
-        ws_dest.clear()
-        write_cell(ws_config, "B2", "📥 Arquivo convertido. Iniciando importação…")
-
-        log("🔗 Abrindo temporário e coletando dados…")
-        sh_temp = gc.open_by_key(temp_id)
-        first_ws = sh_temp.get_worksheet(0)
-        sheet_title = first_ws.title
-        dados = values_get_unformatted(sheets_api, temp_id, sheet_title)
-        if not dados:
+        # Sem leitura local, converte usando um ÚNICO temporário (apaga anteriores com o mesmo nome)
+        with telemetria.etapa("fonte.busca"):
+            src = find_in_folder_by_name(drive, PASTA_ID, nome_arquivo)
+        src_file_id = src["id"]
+        fingerprint = file_fingerprint(src)
+        fingerprint_planilha = read_cell(ws_config, CEL_FINGERPRINT)
+        if PULAR_SE_INALTERADO and fingerprint_planilha == fingerprint:
+            # nada é escrito na planilha (nem A2/B2, nem o J2 dos destinos): o modifiedTime dela fica
+            # estável e o Importar_BD_Geral.py pula os destinos e usa o snapshot
+            log(f"⏭️ '{nome_arquivo}' inalterado desde a última importação ({fingerprint}). Nada a fazer; "
+                f"timestamp em config!A2 e Resumo_MENSAL!J2 mantido.")
+            return
+        # antes da 1ª escrita desta execução: diz se o snapshot anterior ainda descreve a planilha
+        modificada_antes = drive_modified_time(drive, SPREADSHEET_ID_DEST) if GERAR_SNAPSHOT else ""
+
+        # blocos + tamanho previsto (teto) da fonte, para ajustar a grade do destino de uma vez
+        blocos = None
+        if LEITURA_LOCAL and leitura_local.suportado(src.get("mimeType", ""), nome_arquivo):
+            try:
+                linhas_max, colunas_max, blocos = leitura.enter_context(read_source_locally(drive, src))
+            except Exception as e:
+                log(f"⚠️ Leitura local falhou ({e}). Usando conversão pelo Google…")
+        if blocos is None:
+            with telemetria.etapa("fonte.conversao_google"):
+                temp_id = create_temp_sheet(drive, src_file_id, temp_name)
+
+            write_cell(ws_config, "B2", "📥 Arquivo convertido. Iniciando importação…")
+
+            log("🔗 Abrindo temporário e coletando dados…")
+            sh_temp = call_with_retry(lambda: gc.open_by_key(temp_id), LIMITE_LEITURA)
+            first_ws = call_with_retry(lambda: sh_temp.get_worksheet(0), LIMITE_LEITURA)
+            blocos = iter_values_unformatted(sheets_api, temp_id, first_ws.title, first_ws.row_count)
+            linhas_max, colunas_max = first_ws.row_count, first_ws.col_count
+        else:
+            write_cell(ws_config, "B2", "📥 Arquivo lido. Iniciando importação…")
+        sync_key = f"{SPREADSHEET_ID_DEST}_{ABA_DESTINO}"
+        primeiro = next(blocos, None)
+        if not primeiro:
+            log("🧹 Limpando aba 'bd_geral'…")
+            call_with_retry(ws_dest.clear, LIMITE_ESCRITA)
+            estado.delete(ESTADO_SYNC, sync_key)
+            estado.delete("snapshot", SNAPSHOT_NOME)
             write_cell(ws_config, "B2", "⚠️ Aba convertida está vazia.")
+            write_cell(ws_config, CEL_FINGERPRINT, fingerprint)
             log("⛔ Nada para importar. Encerrando.")
             return
 
-        total_rows = len(dados)
-        total_cols = max(len(r) for r in dados)
-        log(f"📊 Tamanho do dataset: {total_rows} linhas x {total_cols} colunas (máx).")
-
-        linha_destino = 1
-        i = 0
-        bloco_idx = 0
-
-        while i < total_rows:
-            fim = min(i + BATCH, total_rows)
-            bloco = dados[i:fim]
-            bloco_idx += 1
-
-            bloco_padded = [row + [""] * (total_cols - len(row)) for row in bloco]
-            bloco_fixed = coerce_columns_to_number(bloco_padded)
-
-            ensure_size(ws_dest, need_last_row=linha_destino + len(bloco_fixed) - 1, need_last_col=total_cols)
-
-            rng = range_a1(linha_destino, 1, len(bloco_fixed), total_cols)
-            log(f"📥 Lote {bloco_idx}: colando {len(bloco_fixed)} linhas no intervalo {rng}…")
-            values_update_raw_with_retry(sheets_api, SPREADSHEET_ID_DEST, rng, bloco_fixed)
+        # Lotes chegam em streaming: o total de linhas/colunas só é conhecido no fim. O hash é do
+        # conteúdo (sem preenchimento); cada lote reescrito cobre também a largura da importação
+        # anterior, para não sobrar célula velha à direita.
+        sync_prev = estado.load(ESTADO_SYNC, sync_key) if SYNC_INCREMENTAL else None
+        incremental = (sync_prev is not None and sync_prev.get("sheet_id") == ws_dest.id
+                       and sync_prev.get("batch") == BATCH and sync_prev.get("carimbo") == fingerprint_planilha)
+        estado.delete(ESTADO_SYNC, sync_key)  # só volta a valer quando a importação concluir
+        prev_blocks = sync_prev["blocks"] if incremental else []
+        prev_cols = sync_prev.get("cols", 0) if incremental else 0
+        if incremental:
+            log("🔁 Sincronização incremental de 'bd_geral' (só lotes alterados)…")
+        else:
+            log("🧹 Limpando aba 'bd_geral'…")
+            with telemetria.etapa("bd_geral.limpeza"):
+                call_with_retry(ws_dest.clear, LIMITE_ESCRITA)
+
+        anterior = snapshot_anterior(modificada_antes) if GERAR_SNAPSHOT and incremental else None
+        estado.delete("snapshot", SNAPSHOT_NOME)  # 'bd_geral' vai mudar: snapshot antigo deixa de valer
+        if GERAR_SNAPSHOT:
+            snap = SnapshotFormatado(sheets_api, anterior)
+
+        ensure_size(ws_dest, need_last_row=linhas_max, need_last_col=max(colunas_max, prev_cols))
+        resumo = {"rows": 0, "cols": 0, "blocks": []}
+        entradas = preparar_lotes(itertools.chain([primeiro], blocos), ws_dest, prev_blocks, prev_cols, resumo, snap)
+        escrita = EscritaEmPipeline(sheets_api, ws_config, snap)
+        try:
+            # preparo dos lotes (lotes.*) e escrita se sobrepõem: a etapa é o tempo de parede das duas
+            with telemetria.etapa("bd_geral.escrita"):
+                for parte in chunk_data_batch(entradas, MAX_CELLS_PER_BATCH):
+                    escrita.enviar(parte)
+                escrita.concluir()
+        except BaseException:
+            escrita.cancelar()
+            raise
+        total_rows, total_cols, hashes = resumo["rows"], resumo["cols"], resumo["blocks"]
 
-            linha_destino += len(bloco_fixed)
-            i = fim
-            time.sleep(RATE_LIMIT_SLEEP)
+        log(f"📊 Tamanho do dataset: {total_rows} linhas x {total_cols} colunas (máx).")
+        if incremental and total_rows < sync_prev["rows"]:
+            sobra = range_a1(total_rows + 1, 1, sync_prev["rows"] - total_rows, max(total_cols, prev_cols))
+            log(f"🧹 Limpando linhas que sobraram da importação anterior ({sobra})…")
+            call_with_retry(lambda: ws_dest.batch_clear([sobra]), LIMITE_ESCRITA)
+        if SYNC_INCREMENTAL:
+            estado.save(ESTADO_SYNC, sync_key, {
+                "sheet_id": ws_dest.id, "batch": BATCH, "cols": total_cols,
+                "rows": total_rows, "blocks": hashes, "carimbo": fingerprint,
+            })
 
         log("🧾 Finalizando (registrando timestamp em config)…")
         agora = datetime.now(TZ).strftime("%d/%m/%Y %H:%M:%S")
-        write_cell(ws_config, "A2", agora)
-        write_cell(ws_config, "B2", f"Concluído em {agora}")
+        with telemetria.etapa("finalizacao"):
+            write_cell(ws_config, "A2", agora)
+            write_cell(ws_config, "B2", f"Concluído em {agora}")
+            write_cell(ws_config, CEL_FINGERPRINT, fingerprint)
+
+        if snap is not None:
+            # modifiedTime da planilha após a última escrita nela: se mudar, o snapshot está velho
+            snap.commit({
+                "source_file_id": src_file_id, "source_modified": src.get("modifiedTime", ""),
+                "spreadsheet_id": SPREADSHEET_ID_DEST,
+                "spreadsheet_modified": drive_modified_time(drive, SPREADSHEET_ID_DEST),
+                "cols": total_cols, "import_stamp": agora,
+            })
+            lidos = f"; {snap.lidos} lote(s) inalterado(s) relido(s) da planilha" if snap.lidos else ""
+            log(f"💾 Snapshot local de '{ABA_DESTINO}' gravado ({snap.rows} linhas{lidos}).")
 
         # ===== NOVO: replicar timestamp em todas as planilhas listadas em config!I2:I =====
         log("↗️ Replicando timestamp em Resumo_MENSAL!J2 das planilhas listadas em config!I…")
@@ -344,23 +744,20 @@ def importar_excel_para_bd_geral():
         if not destinos:
             log("⚠️ Nenhum destino encontrado em config!I2:I (nada a replicar).")
         else:
-            ok, fail = 0, 0
-            for dst in destinos:
-                try:
-                    write_timestamp_to_resumo_j2(sheets_api, dst, agora)
-                    ok += 1
-                except Exception as e:
-                    fail += 1
-                    log(f"❌ Falha ao escrever timestamp em '{dst}': {e}")
-            log(f"✅ Replicação concluída — sucesso: {ok}, falhas: {fail}")
+            with telemetria.etapa("replicacao"):
+                replicate_timestamp(sheets_api, destinos, agora)
 
     finally:
         # Garantia de limpeza do temporário mesmo em caso de erro
+        leitura.close()
         trash_file(drive, temp_id)
+        if snap is not None:
+            snap.abort()  # descarta o snapshot parcial (no-op se já publicado)
 
 
 if __name__ == "__main__":
     try:
-        importar_excel_para_bd_geral()
+        with telemetria.execucao("ponto_geral", RELATORIO_EXECUCAO, log), perfil.execucao("ponto_geral", log):
+            importar_excel_para_bd_geral()
     except Exception as e:
         log(f"❌ Erro ao importar Excel: {e}")
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Sessão autenticada compartilhada pelos scripts.
+
+- gspread sobre uma única requests.Session (AuthorizedSession) com pool de conexões keep-alive:
+  as chamadas de todas as threads reaproveitam as conexões TLS já abertas.
+- Clientes Drive/Sheets (googleapiclient) montados do documento de discovery estático que vem
+  com a biblioteca, lido 1x por processo — nenhum GET de discovery na partida.
+  O httplib2 desses clientes não é thread-safe: cada thread usa o seu (ClientesPorThread),
+  e cada um mantém as próprias conexões abertas entre chamadas.
+- CacheDePlanilhas: Spreadsheet e abas por id de planilha, com os metadados lidos 1x e
+  reaproveitados nas novas tentativas do mesmo destino (em vez de 1 GET por aba por tentativa).
+  Para quem só precisa de id/título/grade das abas, propriedades() faz 1 spreadsheets.get
+  (fields=sheets.properties), sem montar Spreadsheet/Worksheet.
+- Toda requisição das duas bibliotecas passa pela telemetria (telemetria.py): chamadas por
+  endpoint, latência, bytes e status.
+"""
+
+import threading
+from functools import lru_cache
+
+import gspread
+from google.auth.transport.requests import AuthorizedSession
+from google.oauth2.service_account import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import build_http
+from gspread.exceptions import WorksheetNotFound
+from requests.adapters import HTTPAdapter
+
+import telemetria
+
+POOL_CONEXOES = 16  # conexões keep-alive por host (>= threads que chamam a API ao mesmo tempo)
+
+
+def credenciais(caminho: str, scopes) -> Credentials:
+    return Credentials.from_service_account_file(caminho, scopes=scopes)
+
+
+def sessao_http(creds: Credentials, pool: int = POOL_CONEXOES) -> AuthorizedSession:
+    """requests.Session autenticada, com pool de `pool` conexões por host."""
+    sessao = AuthorizedSession(creds)
+    adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+    sessao.mount("https://", adapter)
+    return sessao
+
+
+def cliente_gspread(creds: Credentials, pool: int = POOL_CONEXOES) -> gspread.Client:
+    return gspread.Client(auth=creds, session=telemetria.medir_sessao(sessao_http(creds, pool)))
+
+
+@lru_cache(maxsize=None)
+def _documento_discovery(servico: str, versao: str) -> str:
+    doc = get_static_doc(servico, versao)
+    if doc is None:
+        raise RuntimeError(f"❌ Discovery estático de {servico} {versao} não encontrado no googleapiclient.")
+    return doc
+
+
+def http_autorizado(creds: Credentials):
+    """httplib2 autenticado, como o googleapiclient monta quando recebe só as credenciais."""
+    return AuthorizedHttp(creds, http=build_http())
+
+
+def cliente_api(servico: str, versao: str, creds: Credentials):
+    """Cliente googleapiclient (ex.: 'drive', 'v3') sem discovery pela rede."""
+    return build_from_document(_documento_discovery(servico, versao),
+                               http=telemetria.HttpMedido(http_autorizado(creds)))
+
+
+class ClientesPorThread:
+    """Um cliente googleapiclient por thread, criado na 1ª chamada dela."""
+
+    def __init__(self, servico: str, versao: str, creds: Credentials, atual=None):
+        self.servico = servico
+        self.versao = versao
+        self.creds = creds
+        self._local = threading.local()
+        if atual is not None:
+            self._local.api = atual  # cliente já criado pela thread que monta o objeto
+
+    def get(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            api = cliente_api(self.servico, self.versao, self.creds)
+            self._local.api = api
+        return api
+
+
+class CacheDePlanilhas:
+    """
+    Spreadsheet/Worksheet por id de planilha. Abrir custa 1 GET de metadados e a 1ª aba pedida
+    mais 1 (lista todas as abas); depois, tudo sai do cache. Thread-safe entre planilhas diferentes.
+    """
+
+    def __init__(self, gc):
+        self.gc = gc
+        self._lock = threading.Lock()
+        self._planilhas = {}  # id → Spreadsheet
+        self._abas = {}       # id → {título: Worksheet}
+        self._props = {}      # id → {título: sheet properties}
+
+    def planilha(self, ssid: str):
+        with self._lock:
+            ss = self._planilhas.get(ssid)
+        if ss is None:
+            ss = self.gc.open_by_key(ssid)
+            with self._lock:
+                ss = self._planilhas.setdefault(ssid, ss)
+        return ss
+
+    def aba(self, spreadsheet, titulo: str):
+        """Aba pelo título (a 1ª, se repetido, como Spreadsheet.worksheet). WorksheetNotFound se não existir."""
+        with self._lock:
+            abas = self._abas.get(spreadsheet.id)
+        if abas is None:
+            abas = {}
+            for ws in spreadsheet.worksheets():
+                abas.setdefault(ws.title, ws)
+            with self._lock:
+                abas = self._abas.setdefault(spreadsheet.id, abas)
+        ws = abas.get(titulo)
+        if ws is None:
+            raise WorksheetNotFound(titulo)
+        return ws
+
+    def propriedades(self, ssid: str) -> dict:
+        """{título: properties} das abas (1ª de cada título), de um único spreadsheets.get."""
+        with self._lock:
+            props = self._props.get(ssid)
+        if props is None:
+            meta = self.gc.http_client.fetch_sheet_metadata(ssid, params={"fields": "sheets.properties"})
+            props = {}
+            for sheet in meta.get("sheets", []):
+                props.setdefault(sheet["properties"]["title"], sheet["properties"])
+            with self._lock:
+                props = self._props.setdefault(ssid, props)
+        return props
+
+    def registrar_propriedades(self, ssid: str, propriedades: dict):
+        """Inclui no cache as properties de uma aba recém-criada (resposta do addSheet)."""
+        with self._lock:
+            props = self._props.get(ssid)
+            if props is not None:
+                props.setdefault(propriedades["title"], propriedades)
+
+    def esquecer(self, ssid: str):
+        """Descarta o que houver da planilha (próxima abertura relê os metadados)."""
+        with self._lock:
+            self._planilhas.pop(ssid, None)
+            self._abas.pop(ssid, None)
+            self._props.pop(ssid, None)
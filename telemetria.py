@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+Telemetria da execução: tempo por etapa, chamadas de API e relatório no fim.
+
+- etapa(nome): mede um trecho (vezes, tempo total e máximo). Dentro de destino(ssid) conta também
+  para aquele destino — o escopo é por thread: quem dispara threads para um destino repassa o ssid.
+- contar(nome, valor): contadores — células enviadas, retries, segundos de backoff e de espera
+  pela cota (cota.py) etc.
+- Camada HTTP (sessao.py): cada requisição do gspread (medir_sessao) e do googleapiclient
+  (HttpMedido) conta como chamada do seu endpoint, com latência, bytes enviados/recebidos e status.
+- execucao(script, caminho): no fim da execução (com ou sem erro) grava o relatório JSON — legível
+  por máquina, para comparar execuções agendadas — e imprime a tabela-resumo no log.
+- Workers de outros processos devolvem exportar() e o principal soma com incorporar().
+- observadores: objetos com inicio(nome)/fim(nome) chamados em cada etapa (ex.: perfil.py).
+
+Thread-safe; custo por evento: um lock e um perf_counter.
+"""
+
+import json
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+_lock = threading.Lock()
+_local = threading.local()
+_inicio = time.time()
+_etapas = {}      # (destino, nome) → [vezes, total s, máx s]
+_contadores = {}  # (destino, nome) → valor
+_api = {}         # endpoint → [chamadas, total s, máx s, bytes enviados, bytes recebidos, 429, outros erros]
+observadores = []
+
+
+def zerar():
+    global _inicio
+    with _lock:
+        _inicio = time.time()
+        _etapas.clear()
+        _contadores.clear()
+        _api.clear()
+
+
+# ======== Escopo (destino) ========
+def destino_atual():
+    return getattr(_local, "destino", None)
+
+
+@contextmanager
+def destino(ssid):
+    """Etapas e contadores da thread passam a contar também para `ssid` (None = só o global)."""
+    anterior = destino_atual()
+    _local.destino = ssid
+    try:
+        yield
+    finally:
+        _local.destino = anterior
+
+
+def _escopos():
+    d = destino_atual()
+    return (None,) if d is None else (None, d)
+
+
+# ======== Etapas e contadores ========
+def registrar(nome: str, segundos: float):
+    with _lock:
+        for escopo in _escopos():
+            agg = _etapas.setdefault((escopo, nome), [0, 0.0, 0.0])
+            agg[0] += 1
+            agg[1] += segundos
+            agg[2] = max(agg[2], segundos)
+
+
+@contextmanager
+def etapa(nome: str):
+    for o in observadores:
+        o.inicio(nome)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(nome, time.perf_counter() - t0)
+        for o in observadores:
+            o.fim(nome)
+
+
+def contar(nome: str, valor: float = 1):
+    if not valor:
+        return
+    with _lock:
+        for escopo in _escopos():
+            _contadores[(escopo, nome)] = _contadores.get((escopo, nome), 0) + valor
+
+
+# ======== Camada HTTP ========
+def endpoint(metodo: str, url: str) -> str:
+    """Nome do endpoint (ex.: 'sheets.values.batchUpdate', 'drive.files.list') a partir da URL."""
+    partes = urlsplit(url)
+    caminho = partes.path
+    m = re.match(r"^/v4/spreadsheets/[^/:]+(.*)$", caminho)
+    if m:
+        resto = m.group(1)
+        if resto in ("", "/"):
+            return "sheets.get"
+        if resto.startswith(":"):
+            return "sheets." + resto[1:]
+        if resto.startswith("/values:"):
+            return "sheets.values." + resto[len("/values:"):]
+        if resto.startswith("/values/"):
+            if resto.endswith(":clear"):
+                return "sheets.values.clear"
+            if resto.endswith(":append"):
+                return "sheets.values.append"
+            return "sheets.values.update" if metodo.upper() == "PUT" else "sheets.values.get"
+        return "sheets.outro"
+    m = re.match(r"^(?:/drive)?/v3/files(?:/([^/]+))?(/copy)?$", caminho)
+    if m:
+        if m.group(2):
+            return "drive.files.copy"
+        if not m.group(1):
+            return "drive.files.list" if metodo.upper() == "GET" else "drive.files.create"
+        if metodo.upper() == "GET":
+            return "drive.files.get_media" if parse_qs(partes.query).get("alt") == ["media"] else "drive.files.get"
+        return "drive.files.update" if metodo.upper() == "PATCH" else "drive.files.delete"
+    if "oauth2" in partes.netloc or caminho.endswith("/token"):
+        return "auth.token"
+    return "outro"
+
+
+def registrar_requisicao(metodo: str, url: str, status: int, segundos: float, enviados: int, recebidos: int):
+    ep = endpoint(metodo, url)
+    with _lock:
+        agg = _api.setdefault(ep, [0, 0.0, 0.0, 0, 0, 0, 0])
+        agg[0] += 1
+        agg[1] += segundos
+        agg[2] = max(agg[2], segundos)
+        agg[3] += enviados
+        agg[4] += recebidos
+        if status == 429:
+            agg[5] += 1
+        elif not 200 <= status < 400:
+            agg[6] += 1
+    contar("chamadas")
+    contar("api_s", segundos)
+    contar("bytes_enviados", enviados)
+    contar("bytes_recebidos", recebidos)
+    if status == 429:
+        contar("http_429")
+
+
+def _tamanho(corpo) -> int:
+    return len(corpo) if isinstance(corpo, (bytes, str)) else 0
+
+
+def _gancho_requests(resp, *args, **kwargs):
+    req = resp.request
+    registrar_requisicao(req.method, resp.url or req.url, resp.status_code, resp.elapsed.total_seconds(),
+                         _tamanho(req.body), len(resp.content or b""))
+    return resp
+
+
+def medir_sessao(sessao):
+    """Registra cada resposta da requests.Session (gspread). Retorna a própria sessão."""
+    sessao.hooks["response"].append(_gancho_requests)
+    return sessao
+
+
+class HttpMedido:
+    """httplib2.Http (ou AuthorizedHttp) dos clientes googleapiclient, com cada requisição registrada."""
+
+    def __init__(self, http):
+        self.http = http
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            resp, conteudo = self.http.request(uri, method, body, headers, *args, **kwargs)
+        except Exception:
+            registrar_requisicao(method, uri, 0, time.perf_counter() - t0, _tamanho(body), 0)
+            raise
+        registrar_requisicao(method, uri, resp.status, time.perf_counter() - t0, _tamanho(body), len(conteudo or b""))
+        return resp, conteudo
+
+    def __getattr__(self, nome):
+        return getattr(self.http, nome)
+
+
+# ======== Multiprocesso ========
+def exportar(zerar_depois: bool = False) -> dict:
+    """Agregados crus (picklable), p/ um worker devolver ao processo principal."""
+    with _lock:
+        dados = {"etapas": {k: list(v) for k, v in _etapas.items()}, "contadores": dict(_contadores),
+                 "api": {k: list(v) for k, v in _api.items()}}
+        if zerar_depois:
+            _etapas.clear()
+            _contadores.clear()
+            _api.clear()
+    return dados
+
+
+def incorporar(dados: dict):
+    with _lock:
+        for tabela, origem in ((_etapas, dados["etapas"]), (_api, dados["api"])):
+            for chave, agg in origem.items():
+                atual = tabela.setdefault(chave, [0] * len(agg))
+                for i, v in enumerate(agg):
+                    atual[i] = max(atual[i], v) if i == 2 else atual[i] + v
+        for chave, v in dados["contadores"].items():
+            _contadores[chave] = _contadores.get(chave, 0) + v
+
+
+# ======== Relatório ========
+def rss_pico_mib() -> float | None:
+    """Pico de memória residente deste processo + filhos já encerrados (workers), em MiB."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(pico / (2**20 if sys.platform == "darwin" else 2**10), 1)  # bytes no macOS, KiB no Linux
+
+
+def _etapas_de(escopo) -> dict:
+    return {nome: {"vezes": n, "total_s": round(total, 3), "max_s": round(maximo, 3)}
+            for (e, nome), (n, total, maximo) in sorted(_etapas.items(), key=lambda kv: -kv[1][1]) if e == escopo}
+
+
+def _contadores_de(escopo) -> dict:
+    return {nome: round(v, 3) for (e, nome), v in sorted(_contadores.items(), key=lambda kv: kv[0][1]) if e == escopo}
+
+
+def relatorio(script: str, **extra) -> dict:
+    with _lock:
+        destinos = sorted({e for e, _ in list(_etapas) + list(_contadores) if e is not None})
+        return {
+            "script": script,
+            "inicio": datetime.fromtimestamp(_inicio, timezone.utc).isoformat(timespec="seconds"),
+            "duracao_s": round(time.time() - _inicio, 3),
+            "rss_pico_mib": rss_pico_mib(),
+            **extra,
+            "etapas": _etapas_de(None),
+            "contadores": _contadores_de(None),
+            "api": {ep: {"chamadas": n, "total_s": round(t, 3), "media_s": round(t / n, 3) if n else 0.0,
+                         "max_s": round(mx, 3), "bytes_enviados": env, "bytes_recebidos": rec,
+                         "http_429": e429, "http_erros": erros}
+                    for ep, (n, t, mx, env, rec, e429, erros) in sorted(_api.items(), key=lambda kv: -kv[1][1])},
+            "destinos": {d: {"etapas": _etapas_de(d), "contadores": _contadores_de(d)} for d in destinos},
+        }
+
+
+def salvar(caminho: str, rel: dict):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(rel, f, ensure_ascii=False, indent=1)
+
+
+def imprimir_resumo(rel: dict, escrever=print, max_linhas: int = 12):
+    """Tabela-resumo: etapas e endpoints mais demorados, contadores e destinos mais lentos."""
+    rss = f", pico de memória {rel['rss_pico_mib']:.0f} MiB" if rel.get("rss_pico_mib") else ""
+    escrever(f"📊 Resumo da execução ({rel['duracao_s']:.1f}s{rss}):")
+    escrever(f"   {'etapa':<28}{'vezes':>7}{'total':>10}{'máx':>9}")
+    for nome, e in list(rel["etapas"].items())[:max_linhas]:
+        escrever(f"   {nome:<28}{e['vezes']:>7}{e['total_s']:>9.1f}s{e['max_s']:>8.1f}s")
+    if rel["api"]:
+        escrever(f"   {'endpoint':<28}{'chamadas':>9}{'total':>9}{'média':>8}{'KiB env.':>10}{'KiB rec.':>10}{'429':>5}")
+        for ep, a in rel["api"].items():
+            escrever(f"   {ep:<28}{a['chamadas']:>9}{a['total_s']:>8.1f}s{a['media_s']:>7.2f}s"
+                     f"{a['bytes_enviados'] / 1024:>10.0f}{a['bytes_recebidos'] / 1024:>10.0f}{a['http_429']:>5}")
+    c = rel["contadores"]
+    escrever(f"   chamadas {c.get('chamadas', 0):.0f} · 429 {c.get('http_429', 0):.0f} · retries {c.get('retries', 0):.0f}"
+             f" · backoff {c.get('backoff_s', 0):.1f}s · espera de cota {c.get('espera_cota_s', 0):.1f}s"
+             f" · células enviadas {c.get('celulas_enviadas', 0):.0f}")
+    lentos = sorted(rel["destinos"].items(), key=lambda kv: -kv[1]["etapas"].get("destino", {}).get("total_s", 0))
+    if lentos:
+        escrever(f"   {'destino':<46}{'tempo':>8}{'chamadas':>9}{'429':>5}{'retries':>8}")
+        for ssid, d in lentos[:max_linhas]:
+            c = d["contadores"]
+            escrever(f"   {ssid:<46}{d['etapas'].get('destino', {}).get('total_s', 0):>7.1f}s"
+                     f"{c.get('chamadas', 0):>9.0f}{c.get('http_429', 0):>5.0f}{c.get('retries', 0):>8.0f}")
+
+
+@contextmanager
+def execucao(script: str, caminho: str, escrever=print):
+    """Zera a telemetria; no fim (mesmo com erro) grava o relatório em `caminho` ("" = não grava) e imprime o resumo."""
+    zerar()
+    erro = None
+    try:
+        yield
+    except BaseException as e:
+        erro = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        rel = relatorio(script, ok=erro is None, erro=erro)
+        imprimir_resumo(rel, escrever)
+        if caminho:
+            try:
+                salvar(caminho, rel)
+                escrever(f"🧾 Relatório da execução gravado em {caminho}.")
+            except OSError as e:
+                escrever(f"⚠️ Não consegui gravar o relatório da execução ({e}).")
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Cenário do Importar_BD_Geral.py contra o emulador das APIs (bench/emulador.py), para os testes:
+FONTE com 'config' e 'bd_geral' e destinos com filtros em bd_config!F2:F.
+
+As escritas de cada destino passam por espiões (values_batch_update e o values.batchClear em
+write_with_retry) que guardam os intervalos enviados e podem falhar de propósito; process_destino
+é chamado direto, sem as tentativas/rodadas do main, para deixar no disco o estado de uma
+execução interrompida.
+"""
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "bench"))
+
+import Importar_BD_Geral as imp  # noqa: E402
+import cota  # noqa: E402
+import estado  # noqa: E402
+import sessao  # noqa: E402
+from emulador import Emulador  # noqa: E402
+
+HEADER = ["DATA", "NOME", "SETOR", "EQUIPE", "MATRICULA", "ENTRADA"]  # F = coluna de hora
+EQUIPES = ["Equipe Alfa", "Equipe Bravo"]
+
+# constantes do módulo trocadas durante o teste (restauradas em fechar)
+AJUSTES = {"CHUNK": 10, "MAX_CELLS_PER_BATCH": 60, "ESCRITAS_PARALELAS": 1, "DEST_WORKERS": 1}
+
+
+def linha(i: int, equipe: str, nome: str = "") -> list:
+    return [f"{i % 28 + 1:02d}/01/2024", nome or f"Pessoa {i:03d}", f"Setor {i % 3}", equipe, f"{i:06d}",
+            f"{8 + i % 10:02d}:{i % 60:02d}"]
+
+
+def linhas_fonte(n: int) -> list[list]:
+    """Cabeçalho + n linhas, alternando as equipes."""
+    return [HEADER] + [linha(i, EQUIPES[i % 2]) for i in range(n)]
+
+
+class FalhaSimulada(Exception):
+    """Erro não transitório: process_destino desiste do destino e guarda o diário."""
+
+
+class Cenario:
+    def __init__(self, linhas: list[list], destinos: dict):
+        """destinos: {ssid: [filtros]}."""
+        self.emu = Emulador()
+        self.linhas = linhas
+        self.destinos = destinos
+        self._dir = tempfile.mkdtemp(prefix="teste_estado_")
+        self._antes = {k: getattr(imp, k) for k in list(AJUSTES) + ["LIMITE_ESCRITA", "LIMITE_LEITURA",
+                                                                    "values_batch_update", "write_with_retry"]}
+        self._estado_dir = estado.ESTADO_DIR
+        estado.ESTADO_DIR = self._dir
+        for k, v in AJUSTES.items():
+            setattr(imp, k, v)
+        imp.LIMITE_ESCRITA = cota.AdaptiveRateLimiter(1e9, 1e9, 1e9)
+        imp.LIMITE_LEITURA = cota.AdaptiveRateLimiter(1e9, 1e9, 1e9)
+        self._enviar = self._antes["values_batch_update"]
+        imp.values_batch_update = self._espiao
+        self._escrever = self._antes["write_with_retry"]
+        imp.write_with_retry = self._espiao_limpeza
+        self.escritas = []    # (ssid, [intervalos]) de cada values.batchUpdate aceito
+        self.limpezas = []    # (ssid, [intervalos]) de cada values.batchClear aceito
+        self.falhar_em = None  # (ssid, n): o n-ésimo batchUpdate (1-based) desse destino falha
+        self.falhar_limpeza = None  # ssid: o values.batchClear desse destino falha
+        self._contagem = {}
+
+        config = [[""] * 9 for _ in range(len(destinos) + 1)]
+        for i, ssid in enumerate(destinos, 1):
+            config[i][8] = ssid  # config!I
+        self.emu.criar_planilha(imp.ID_FONTE, {imp.ABA_FONTE_DADOS: linhas, imp.ABA_CONFIG_FONTE: config},
+                                titulo="FONTE")
+        for ssid, filtros in destinos.items():
+            self.emu.criar_planilha(ssid, {
+                imp.ABA_DESTINO_RESUMO: None,
+                imp.ABA_DESTINO_CONFIG: [[""] * 5 + ["FILTRO"]] + [[""] * 5 + [f] for f in filtros],
+            }, titulo=ssid)
+
+    def fechar(self):
+        for k, v in self._antes.items():
+            setattr(imp, k, v)
+        estado.ESTADO_DIR = self._estado_dir
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _espiao(self, http, ssid, data, value_input_option="RAW"):
+        n = self._contagem[ssid] = self._contagem.get(ssid, 0) + 1
+        if self.falhar_em == (ssid, n):
+            raise FalhaSimulada(f"lote {n} de {ssid}")
+        out = self._enviar(http, ssid, data, value_input_option)
+        self.escritas.append((ssid, [e["range"] for e in data]))
+        return out
+
+    def _espiao_limpeza(self, fn, *args, cells=0, **kwargs):
+        if getattr(fn, "__name__", "") == "values_batch_clear" and args[0] == self.falhar_limpeza:
+            raise FalhaSimulada(f"limpeza de {args[0]}")
+        out = self._escrever(fn, *args, cells=cells, **kwargs)
+        if getattr(fn, "__name__", "") == "values_batch_clear":
+            self.limpezas.append((args[0], kwargs["body"]["ranges"]))
+        return out
+
+    # ---------- execução ----------
+    def processar(self, ssid: str) -> bool:
+        """Uma execução de process_destino para o destino (FONTE lida de novo, como num job novo)."""
+        self.escritas, self.limpezas, self._contagem = [], [], {}
+        with self.emu.instalado(), contextlib.redirect_stdout(io.StringIO()) as self.log:
+            planilhas = sessao.CacheDePlanilhas(imp.auth_gspread())
+            ss_fonte, _ = imp.safe_open_spreadsheet(planilhas, imp.ID_FONTE)
+            fonte = imp.FonteLazy(planilhas, ss_fonte, imp.fonte_modified_time(planilhas.gc), colunar=imp.USAR_COLUNAR)
+            return imp.process_destino(planilhas, fonte, ssid)
+
+    def main(self):
+        self.escritas, self.limpezas, self._contagem = [], [], {}
+        with self.emu.instalado(), contextlib.redirect_stdout(io.StringIO()) as self.log:
+            imp.main()
+
+    # ---------- conferência ----------
+    def bd(self, ssid: str) -> list[list]:
+        return self.emu.valores(ssid, imp.ABA_DESTINO_DADOS)
+
+    def intervalos_bd(self, ssid: str) -> list[str]:
+        """Intervalos de 'bd' gravados no destino desde o último processar/main."""
+        prefixo = f"'{imp.ABA_DESTINO_DADOS}'!"
+        return [r[len(prefixo):] for s, rs in self.escritas if s == ssid for r in rs if r.startswith(prefixo)]
+
+    def limpou_bd(self, ssid: str) -> bool:
+        """A aba 'bd' inteira foi limpa (reescrita completa) no último processar/main."""
+        return any(f"'{imp.ABA_DESTINO_DADOS}'" in rs for s, rs in self.limpezas if s == ssid)
+
+    def sync(self, ssid: str) -> dict | None:
+        return estado.load(imp.ESTADO_SYNC, ssid)
+
+    def alterar_fonte(self, linhas: list[list], linha: int = 1, coluna: int = 1):
+        self.emu.alterar(imp.ID_FONTE, imp.ABA_FONTE_DADOS, linhas, linha, coluna)
+
+    def alterar_carimbo(self, ssid: str, valor: str):
+        """Resumo_MENSAL!I2 gravado por outra execução (ou à mão)."""
+        self.emu.alterar(ssid, imp.ABA_DESTINO_RESUMO, [[valor]], 2, 9)
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Equivalência de conversores.py com as versões anteriores (congeladas abaixo): mesmo tipo e
+mesmo repr, também na 2ª chamada (cache).
+- data/hora/número pt-BR: funções do Importar_BD_Geral.py;
+- coerce_number_columns: coerce_columns_to_number do ponto_geral.py, célula a célula.
+"""
+import os
+import random
+import re
+import sys
+import unittest
+from datetime import datetime, timezone, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import conversores  # noqa: E402
+
+# ======== Versões anteriores (congeladas; não alterar) ========
+TZ = timezone(timedelta(hours=-3))
+
+def serial_from_datetime(dt: datetime) -> float:
+    base = datetime(1899, 12, 30, tzinfo=TZ)
+    delta = dt - base
+    return delta.days + (delta.seconds + delta.microseconds / 1e6) / 86400.0
+
+def to_date_serial_keep(v):
+    if v is None or v == "": return ""
+    if isinstance(v, (int, float)):
+        try: return float(v)
+        except Exception: return v
+    s = str(v).strip()
+    m = re.match(r"^(\d{2})/(\d{2})/(\d{4})(?:\s+\d{2}:\d{2}(?::\d{2})?)?$", s)
+    if m:
+        d, mth, y = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        try:
+            dt = datetime(y, mth, d, tzinfo=TZ)
+        except ValueError:
+            return s  # data inválida (ex.: 31/02/2024) fica como texto
+        return serial_from_datetime(dt)
+    try:
+        dt = datetime.fromisoformat(s)
+        if dt.tzinfo is None: dt = dt.replace(tzinfo=TZ)
+        dt = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        return serial_from_datetime(dt)
+    except Exception:
+        try: return float(s)
+        except Exception: return s
+
+def to_time_serial_keep(v):
+    if v is None or v == "": return ""
+    if isinstance(v, (int, float)):
+        try: return float(v)
+        except Exception: return v
+    s = str(v).strip()
+    m = re.match(r"^(\d{1,2}):(\d{2})(?::(\d{2}))?$", s)
+    if m:
+        hh = int(m.group(1)); mm = int(m.group(2)); ss = int(m.group(3) or 0)
+        return (hh*3600 + mm*60 + ss) / 86400.0
+    m = re.match(r"^\d{2}/\d{2}/\d{4}\s+(\d{1,2}):(\d{2})(?::(\d{2}))?$", s)
+    if m:
+        hh = int(m.group(1)); mm = int(m.group(2)); ss = int(m.group(3) or 0)
+        return (hh*3600 + mm*60 + ss) / 86400.0
+    try:
+        dt = datetime.fromisoformat(s)
+        if dt.tzinfo is None: dt = dt.replace(tzinfo=TZ)
+        return (dt.hour*3600 + dt.minute*60 + dt.second) / 86400.0
+    except Exception:
+        try: return float(s)
+        except Exception: return s
+
+def is_zero_left_string(s: str) -> bool:
+    return bool(re.match(r"^0\d+$", s.strip()))
+
+def parse_number_brazil(x):
+    if x is None: return ""
+    if isinstance(x, (int, float)): return float(x)
+    s = str(x).strip()
+    if re.search(r"[A-Za-z]", s): return s
+    if is_zero_left_string(s): return s
+    s2 = s.replace(".", "").replace(",", ".")
+    s2 = re.sub(r"[^0-9\.\-]", "", s2)
+    if re.fullmatch(r"-?\d+(\.\d+)?", s2):
+        try: return float(s2)
+        except Exception: return s
+    return s
+
+def to_number_if_possible(v):
+    """Remove apóstrofo à esquerda e tenta parse numérico (pt-BR/US)."""
+    if v is None:
+        return ""
+    if isinstance(v, (int, float)):
+        return v
+    s = str(v).strip()
+    if s == "":
+        return ""
+    if s.startswith("'"):
+        s = s[1:].strip()
+    s_br = s.replace(" ", "").replace("R$", "")
+    if any(c in s_br for c in ",."):
+        if "," in s_br and (s_br.rfind(",") > s_br.rfind(".")):
+            try:
+                f = float(s_br.replace(".", "").replace(",", "."))
+                return int(f) if f.is_integer() else f
+            except:
+                pass
+    try:
+        f = float(s.replace(" ", "").replace("R$", ""))
+        return int(f) if f.is_integer() else f
+    except:
+        try:
+            return int(s)
+        except:
+            return s
+
+def coerce_columns_to_number(block, target_cols):
+    """target_cols: colunas 1-indexadas (TARGET_COLS do ponto_geral.py)."""
+    out = []
+    for row in block:
+        if not row:
+            out.append(row); continue
+        new_row = []
+        for idx, val in enumerate(row, start=1):
+            new_row.append(to_number_if_possible(val) if idx in target_cols else val)
+        out.append(new_row)
+    return out
+
+PARES = {
+    "data": (to_date_serial_keep, conversores.to_date_serial_keep),
+    "hora": (to_time_serial_keep, conversores.to_time_serial_keep),
+    "numero": (parse_number_brazil, conversores.parse_number_brazil),
+}
+
+# ======== Entradas ========
+CASOS_LIMITE = [
+    None, "", "  ", True, False, 0, 7, -3, 2.5, 10 ** 400, float("nan"),
+    "01/02/2024", " 01/02/2024 ", "31/02/2024", "00/00/0000", "01/02/0000", "1/2/2024", "01/02/24",
+    "01/02/2024 10:20", "01/02/2024  10:20:30", "01/02/2024 7:05", "01/02/2024T10:20",
+    "٠١/٠٢/٢٠٢٤", "01/02/2024\n", "29/02/2023", "29/02/2024", "31/12/9999",
+    "2024-01-05", "2024-01-05 10:30", "2024-01-05T10:00:00+00:00", "2024-01-05T23:59:59-05:00", "20240105",
+    "08:30", "8:30", "08:30:15", "24:00", "99:99:99", "8:5", "08:30:1", "08:30:15:00", ":30", "12:٣٠",
+    "T10:20", "10:20:30.5", "08h30",
+    "0", "00", "007", "0,5", "0.5", "-0,75", "1.234,56", "1.234.567,8", "12.5", "1234", " 1234 ", "-",
+    "--1", "1-2", "R$ 10,50", "10%", "1 000", "1e3", "nan", "inf", "١٢٣", "²", "abc", "N/A", "x",
+    "3,", ",5", ".", ",", "1,2,3", "+5", "-12", "1_000",
+]
+
+
+def corpus(n: int, seed: int):
+    """Valores no formato de bd_geral: poucas datas/horas distintas, muitas repetições."""
+    rnd = random.Random(seed)
+    datas = [f"{d:02d}/{m:02d}/{a}" for a in (2023, 2024, 2025) for m in range(1, 13) for d in (1, 5, 10, 15, 20, 28, 30)]
+    horas = [f"{h:02d}:{mi:02d}" for h in range(6, 23) for mi in (0, 15, 30, 45)] + ["", "00:00", "07:58:12"]
+    numeros = [f"{rnd.randint(0, 9999)},{rnd.randint(0, 99):02d}" for _ in range(500)] \
+        + [str(rnd.randint(1, 500)) for _ in range(200)] + ["", "0", "-", "1.234,56"]
+    out = {"data": [], "hora": [], "numero": []}
+    for _ in range(n):
+        out["data"].append(rnd.choice(datas) if rnd.random() > 0.02 else rnd.choice(["", 45000, "2024-03-01"]))
+        out["hora"].append(rnd.choice(horas) if rnd.random() > 0.02 else rnd.choice(["", 0.5, "01/02/2024 08:00"]))
+        out["numero"].append(rnd.choice(numeros) if rnd.random() > 0.05 else rnd.choice([3, 2.5, "abc", "007"]))
+    return out
+
+
+def resultado(fn, v):
+    """Valor devolvido ou o tipo da exceção (as duas versões devem falhar igual)."""
+    try:
+        return fn(v)
+    except Exception as e:
+        return type(e)
+
+
+class EquivalenciaTest(unittest.TestCase):
+    def setUp(self):
+        for f in (conversores._data_de_texto, conversores._hora_de_texto, conversores._numero_br_de_texto):
+            f.cache_clear()
+
+    def conferir(self, valores):
+        for nome, (ref, nova) in PARES.items():
+            for v in valores:
+                for chamada in (1, 2):  # a 2ª vem do cache
+                    r, g = resultado(ref, v), resultado(nova, v)
+                    with self.subTest(conversor=nome, valor=v, chamada=chamada):
+                        self.assertIs(type(g), type(r))
+                        self.assertEqual(repr(g), repr(r))
+
+    def test_casos_limite(self):
+        self.conferir(CASOS_LIMITE)
+
+    def test_corpus(self):
+        dados = corpus(5000, seed=1)
+        for nome, (ref, nova) in PARES.items():
+            for v in dados[nome]:
+                self.assertEqual(repr(resultado(nova, v)), repr(resultado(ref, v)), f"{nome}({v!r})")
+
+
+class DataInvalidaTest(unittest.TestCase):
+    def test_data_invalida_fica_como_texto(self):
+        for s in ("31/02/2024", "29/02/2023", "00/00/0000", " 31/04/2024 "):
+            with self.subTest(valor=s):
+                self.assertEqual(conversores.to_date_serial_keep(s), s.strip())
+
+    def test_data_valida_vira_serial(self):
+        self.assertEqual(conversores.to_date_serial_keep("29/02/2024"), 45351.0)
+        self.assertEqual(conversores.to_date_serial_keep("01/01/1900"), 2.0)
+
+
+class CoercaoNumericaTest(unittest.TestCase):
+    TEXTOS = ["abc", "R$ 10,50", "1e3", " 7 ", "x-1", "'0012", "N/A", "1.234.567,8", "-0,75", "  ", "nan",
+              "1_000", "007", "0", "00", "0,5", "'007", "12.5", "1.234,56", "inf", "-", True, False, None, 3, 2.5]
+
+    def conferir(self, linhas, alvo):
+        """alvo: índices 0-based das colunas convertidas."""
+        esperado = coerce_columns_to_number(linhas, {j + 1 for j in alvo})
+        obtido = conversores.coerce_number_columns(linhas, alvo)
+        self.assertEqual(len(obtido), len(esperado))
+        for i, (a, b) in enumerate(zip(obtido, esperado)):
+            self.assertEqual([type(c) for c in a], [type(c) for c in b], f"linha {i}")
+            self.assertEqual(repr(a), repr(b), f"linha {i}")
+
+    def test_colunas_mistas(self):
+        # só as colunas-alvo mudam; as demais passam intactas, com o tipo que tinham
+        linhas = [[t, t, t] for t in self.TEXTOS]
+        self.conferir(linhas, [1])
+        out = conversores.coerce_number_columns([["1,5", "1,5", "1,5"]], [1])
+        self.assertEqual(out, [["1,5", 1.5, "1,5"]])
+
+    def test_celulas_vazias(self):
+        linhas = [["", "  ", None], [None, "", ""], []]
+        self.conferir(linhas, [0, 1, 2])
+        self.assertEqual(conversores.coerce_number_columns(linhas, [0, 1, 2]), [["", "", ""], ["", "", ""], []])
+
+    def test_zero_a_esquerda(self):
+        linhas = [["007", "'0012", "00", "0,5", "'007"]]
+        self.conferir(linhas, [0, 1, 2, 3, 4])
+        self.assertEqual(conversores.coerce_number_columns(linhas, [0, 1, 2, 3, 4]), [[7, 12, 0, 0.5, 7]])
+
+    def test_linhas_curtas(self):
+        # colunas-alvo além do fim da linha são ignoradas (sem preencher a linha)
+        linhas = [["1"], ["1", "2"], [], ["1", "2", "3", "4", "5", "6"]]
+        self.conferir(linhas, [1, 4, 30])
+        self.assertEqual(conversores.coerce_number_columns(linhas, [1, 4, 30]),
+                         [["1"], ["1", 2], [], ["1", 2, "3", "4", 5, "6"]])
+
+    def test_entrada_nao_alterada(self):
+        linhas = [["1", "2,5"]]
+        conversores.coerce_number_columns(linhas, [0, 1])
+        self.assertEqual(linhas, [["1", "2,5"]])
+
+    def test_sintetico(self):
+        rnd = random.Random(1)
+        linhas = []
+        for _ in range(2000):
+            row = [rnd.choice(self.TEXTOS + [str(rnd.randint(0, 9999)), f"{rnd.randint(0, 999)},{rnd.randint(0, 99):02d}"])
+                   for _ in range(rnd.randint(0, 40))]
+            linhas.append(row)
+        self.conferir(linhas, sorted(rnd.sample(range(40), 15)))
+
+
+if __name__ == "__main__":
+    unittest.main()
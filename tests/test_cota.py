@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import unittest
+
+import requests
+from googleapiclient.errors import HttpError
+from gspread.exceptions import APIError
+from httplib2 import Response as Httplib2Response
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cota import retry_after_seconds  # noqa: E402
+
+
+def resposta_429(headers=None) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = 429
+    resp.headers.update(headers or {})
+    resp._content = b'{"error": {"code": 429, "message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}}'
+    return resp
+
+
+class RetryAfterTest(unittest.TestCase):
+    def test_gspread_429_com_retry_after(self):
+        resp = resposta_429({"Retry-After": "1"})
+        self.assertFalse(resp)  # o motivo do bug: Response de erro é falsy
+        self.assertEqual(retry_after_seconds(APIError(resp)), 1.0)
+
+    def test_gspread_429_sem_retry_after(self):
+        self.assertIsNone(retry_after_seconds(APIError(resposta_429())))
+
+    def test_googleapiclient_429(self):
+        resp = Httplib2Response({"status": "429", "retry-after": "7"})
+        self.assertEqual(retry_after_seconds(HttpError(resp, b"{}")), 7.0)
+
+    def test_erro_sem_resposta(self):
+        self.assertIsNone(retry_after_seconds(RuntimeError("x")))
+
+
+if __name__ == "__main__":
+    unittest.main()
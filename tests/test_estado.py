@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import estado  # noqa: E402
+
+
+class RowsHashTest(unittest.TestCase):
+    def test_deterministico(self):
+        rows = [["a", 1, 2.5, ""], ["ç", None, True]]
+        self.assertEqual(estado.rows_hash(rows), estado.rows_hash([list(r) for r in rows]))
+
+    def test_tipos_contam(self):
+        hashes = {estado.rows_hash([[v]]) for v in (1, 1.0, "1", True)}
+        self.assertEqual(len(hashes), 4)
+
+    def test_ordem_e_divisao_das_linhas_contam(self):
+        self.assertNotEqual(estado.rows_hash([["a"], ["b"]]), estado.rows_hash([["b"], ["a"]]))
+        self.assertNotEqual(estado.rows_hash([["a", "b"]]), estado.rows_hash([["a"], ["b"]]))
+        self.assertNotEqual(estado.rows_hash([["a"]]), estado.rows_hash([["a", ""]]))
+
+
+class ChangedBlocksTest(unittest.TestCase):
+    def test_iguais(self):
+        self.assertEqual(estado.changed_blocks(["a", "b", "c"], ["a", "b", "c"]), [])
+
+    def test_bloco_alterado(self):
+        self.assertEqual(estado.changed_blocks(["a", "b", "c"], ["a", "x", "c"]), [1])
+
+    def test_blocos_novos_no_fim(self):
+        self.assertEqual(estado.changed_blocks(["a"], ["a", "b", "c"]), [1, 2])
+        self.assertEqual(estado.changed_blocks([], ["a", "b"]), [0, 1])
+
+    def test_menos_blocos(self):
+        # os que sumiram não entram: a limpeza das sobras é feita à parte
+        self.assertEqual(estado.changed_blocks(["a", "b", "c"], ["a"]), [])
+
+    def test_pendente_do_diario_sempre_reenviado(self):
+        self.assertEqual(estado.changed_blocks(["a", None, "c"], ["a", "b", "c"]), [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Importar_BD_Geral.process_destino contra o emulador (tests/cenario_importar.py).
+'DREF' tem os mesmos filtros de 'DA' e só é processado no fim, do zero: é a referência de uma
+execução completa para o conteúdo de 'bd'.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cenario_importar import Cenario, imp, linhas_fonte  # noqa: E402
+
+# 100 linhas na FONTE → 50 da Equipe Alfa → 5 blocos de CHUNK=10 em 'bd'
+BLOCOS = ["A2:F11", "A12:F21", "A22:F31", "A32:F41", "A42:F51"]
+
+
+class CenarioTest(unittest.TestCase):
+    def setUp(self):
+        self.cen = Cenario(linhas_fonte(100), {"DA": ["Equipe Alfa"], "DREF": ["Equipe Alfa"]})
+        self.addCleanup(self.cen.fechar)
+
+    def assertBdComoExecucaoCompleta(self):
+        self.assertTrue(self.cen.processar("DREF"))
+        self.assertEqual(self.cen.bd("DA"), self.cen.bd("DREF"))
+
+
+class RetomadaTest(CenarioTest):
+    """DiarioDeEscrita: execução interrompida no meio de 'bd' → a próxima reenvia só as pendências."""
+
+    def test_retoma_so_os_blocos_pendentes(self):
+        self.cen.falhar_em = ("DA", 3)  # 1 = cabeçalho, 2 = bloco 0, 3 = bloco 1
+        self.assertFalse(self.cen.processar("DA"))
+        diario = self.cen.sync("DA")
+        self.assertIsNone(diario["fonte"])  # destino não conta como concluído
+        self.assertEqual([h is None for h in diario["blocks"]], [False, True, False, False, False])
+        self.assertIsNotNone(diario["header"])
+
+        self.cen.falhar_em = None
+        self.assertTrue(self.cen.processar("DA"))
+        self.assertIn("Retomando envio interrompido: 1 bloco(s)", self.cen.log.getvalue())
+        self.assertEqual(self.cen.intervalos_bd("DA"), ["A12:F21"])
+        self.assertFalse(self.cen.limpou_bd("DA"))
+        self.assertIsNotNone(self.cen.sync("DA")["fonte"])
+        self.assertBdComoExecucaoCompleta()
+
+    def test_cabecalho_pendente(self):
+        self.cen.falhar_em = ("DA", 1)
+        self.assertFalse(self.cen.processar("DA"))
+        self.assertIsNone(self.cen.sync("DA")["header"])
+
+        self.cen.falhar_em = None
+        self.assertTrue(self.cen.processar("DA"))
+        self.assertEqual(self.cen.intervalos_bd("DA"), ["A1"])
+        self.assertFalse(self.cen.limpou_bd("DA"))
+        self.assertBdComoExecucaoCompleta()
+
+    def test_carimbo_diferente_de_i2_reescreve_tudo(self):
+        self.cen.falhar_em = ("DA", 3)
+        self.assertFalse(self.cen.processar("DA"))
+        self.cen.alterar_carimbo("DA", "01/01/2030 00:00:00")  # outra execução gravou o destino
+
+        self.cen.falhar_em = None
+        self.assertTrue(self.cen.processar("DA"))
+        self.assertIn("não confere com", self.cen.log.getvalue())
+        self.assertTrue(self.cen.limpou_bd("DA"))
+        self.assertEqual(self.cen.intervalos_bd("DA"), ["A1"] + BLOCOS)
+        self.assertBdComoExecucaoCompleta()
+
+    def test_limpeza_das_sobras_sobrevive_a_interrupcao(self):
+        self.assertTrue(self.cen.processar("DA"))
+        # FONTE encolhe para 60 linhas (30 da Alfa): as linhas 32..51 de 'bd' sobram
+        self.cen.alterar_fonte([[""] * 6] * 40, linha=62)
+        self.cen.falhar_limpeza = "DA"
+        self.assertFalse(self.cen.processar("DA"))
+        diario = self.cen.sync("DA")
+        self.assertEqual((diario["rows"], len(diario["blocks"])), (50, 3))  # rows = max(anterior, novo)
+
+        self.cen.falhar_limpeza = None
+        self.assertTrue(self.cen.processar("DA"))
+        self.assertIn([f"'{imp.ABA_DESTINO_DADOS}'!A32:F51"], [rs[2:] for s, rs in self.cen.limpezas if s == "DA"])
+        self.assertEqual(len(self.cen.bd("DA")), 31)
+        self.assertBdComoExecucaoCompleta()
+
+
+class IncrementalTest(CenarioTest):
+    """Sincronização por hashes de bloco e as voltas para a reescrita completa."""
+
+    def setUp(self):
+        super().setUp()
+        self.assertTrue(self.cen.processar("DA"))
+        self.assertEqual(self.cen.intervalos_bd("DA"), ["A1"] + BLOCOS)
+
+    def assertReescritaCompleta(self):
+        self.assertTrue(self.cen.processar("DA"))
+        self.assertTrue(self.cen.limpou_bd("DA"))
+        self.assertEqual(self.cen.intervalos_bd("DA")[0], "A1")
+        self.assertBdComoExecucaoCompleta()
+
+    def test_uma_linha_alterada_reenvia_um_bloco(self):
+        self.cen.alterar_fonte([["Outra Pessoa"]], linha=46, coluna=2)  # i=44: 23ª linha da Alfa, bloco 2
+        self.assertTrue(self.cen.processar("DA"))
+        self.assertIn("Sincronização incremental: 1/5 bloco(s)", self.cen.log.getvalue())
+        self.assertEqual(self.cen.intervalos_bd("DA"), ["A22:F31"])
+        self.assertFalse(self.cen.limpou_bd("DA"))
+        self.assertEqual(self.cen.bd("DA")[23][1], "Outra Pessoa")
+        self.assertBdComoExecucaoCompleta()
+
+    def test_nada_alterado_nao_reenvia_blocos(self):
+        imp.PULAR_SE_INALTERADO, antes = False, imp.PULAR_SE_INALTERADO
+        self.addCleanup(setattr, imp, "PULAR_SE_INALTERADO", antes)
+        self.assertTrue(self.cen.processar("DA"))
+        self.assertEqual(self.cen.intervalos_bd("DA"), [])
+
+    def test_ncols_diferente(self):
+        self.cen.alterar_fonte([["extra"]], linha=3, coluna=7)  # coluna G passa a existir (e o cabeçalho com ela)
+        self.assertReescritaCompleta()
+
+    def test_chunk_diferente(self):
+        imp.CHUNK = 5
+        self.cen.alterar_fonte([["Outra Pessoa"]], linha=46, coluna=2)  # sem isso o destino é pulado
+        self.assertReescritaCompleta()
+
+    def test_cabecalho_diferente(self):
+        self.cen.alterar_fonte([["NOME COMPLETO"]], linha=1, coluna=2)
+        self.assertReescritaCompleta()
+
+    def test_aba_bd_recriada(self):
+        abas = self.cen.emu.planilhas["DA"].abas
+        abas[:] = [a for a in abas if a.titulo != imp.ABA_DESTINO_DADOS]  # apagada à mão: volta com outro sheetId
+        self.cen.alterar_fonte([["Outra Pessoa"]], linha=46, coluna=2)
+        self.assertReescritaCompleta()
+
+    def test_carimbo_diferente_de_i2(self):
+        self.cen.alterar_carimbo("DA", "01/01/2030 00:00:00")
+        self.cen.alterar_fonte([["Outra Pessoa"]], linha=46, coluna=2)
+        self.assertReescritaCompleta()
+
+
+class PularInalteradoTest(CenarioTest):
+    """PULAR_SE_INALTERADO: FONTE (modifiedTime), filtros, sheetId de 'bd' e carimbo iguais → destino pulado."""
+
+    def alterar_filtro(self, ssid, filtro):
+        self.cen.emu.alterar(ssid, imp.ABA_DESTINO_CONFIG, [[filtro]], linha=2, coluna=6)
+
+    def test_destino_inalterado_e_pulado(self):
+        self.assertTrue(self.cen.processar("DA"))
+        bd = self.cen.bd("DA")
+        self.assertTrue(self.cen.processar("DA"))
+        self.assertIn("Pulando destino", self.cen.log.getvalue())
+        self.assertEqual((self.cen.escritas, self.cen.limpezas), ([], []))
+        self.assertEqual(self.cen.bd("DA"), bd)
+
+    def test_filtro_alterado_regrava(self):
+        self.assertTrue(self.cen.processar("DA"))
+        self.alterar_filtro("DA", "Equipe Bravo")
+        self.assertTrue(self.cen.processar("DA"))
+        self.assertNotIn("Pulando destino", self.cen.log.getvalue())
+        self.assertEqual(self.cen.intervalos_bd("DA"), BLOCOS)
+        self.alterar_filtro("DREF", "Equipe Bravo")
+        self.assertBdComoExecucaoCompleta()
+        self.assertEqual({r[3] for r in self.cen.bd("DA")[1:]}, {"Equipe Bravo"})
+
+    def test_main_so_regrava_o_destino_alterado(self):
+        self.cen.main()
+        self.assertEqual({s for s, _ in self.cen.escritas}, {"DA", "DREF"})
+        self.alterar_filtro("DA", "Equipe Bravo")
+        self.cen.main()
+        self.assertEqual({s for s, _ in self.cen.escritas}, {"DA"})
+        self.assertEqual({s for s, _ in self.cen.limpezas}, {"DA"})
+        self.assertEqual(self.cen.log.getvalue().count("Pulando destino"), 1)
+        self.assertEqual({r[3] for r in self.cen.bd("DREF")[1:]}, {"Equipe Alfa"})
+        self.assertEqual({r[3] for r in self.cen.bd("DA")[1:]}, {"Equipe Bravo"})
+
+    def test_fonte_alterada_nao_pula(self):
+        self.assertTrue(self.cen.processar("DA"))
+        self.cen.alterar_fonte([["Outra Pessoa"]], linha=46, coluna=2)
+        self.assertTrue(self.cen.processar("DA"))
+        self.assertNotIn("Pulando destino", self.cen.log.getvalue())
+        self.assertEqual(self.cen.intervalos_bd("DA"), ["A22:F31"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""leitura_local: XLSX mínimos montados aqui (só a 1ª aba importa)."""
+import io
+import os
+import sys
+import types
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import leitura_local  # noqa: E402
+from leitura_local import FormatoNaoSuportado  # noqa: E402
+
+NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+
+
+def xlsx(sheet_data: str, shared: list[str] = ()) -> io.BytesIO:
+    """XLSX com uma aba cujo <sheetData> é `sheet_data` (e a tabela de strings compartilhadas, se houver)."""
+    rels = ('<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            'Target="worksheets/sheet1.xml"/>')
+    if shared:
+        rels += ('<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+                 'Target="sharedStrings.xml"/>')
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("_rels/.rels",
+                    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+                    'Target="xl/workbook.xml"/></Relationships>')
+        zf.writestr("xl/workbook.xml",
+                    f'<workbook xmlns="{NS}" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                    '<sheets><sheet name="Dados" sheetId="1" r:id="rId1"/></sheets></workbook>')
+        zf.writestr("xl/_rels/workbook.xml.rels",
+                    f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{rels}</Relationships>')
+        zf.writestr("xl/worksheets/sheet1.xml", f'<worksheet xmlns="{NS}"><sheetData>{sheet_data}</sheetData></worksheet>')
+        if shared:
+            zf.writestr("xl/sharedStrings.xml",
+                        f'<sst xmlns="{NS}">' + "".join(f"<si><t>{s}</t></si>" for s in shared) + "</sst>")
+    buf.seek(0)
+    return buf
+
+
+# linha 2 vazia, linha 4 só com célula vazia, linha 6 sem nada depois da última célula com valor
+PLANILHA = (
+    '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="inlineStr"><is><t>VALOR</t></is></c></row>'
+    '<row r="3"><c r="A3"><v>45123</v></c><c r="C3"><v>0.5</v></c><c r="D3" t="b"><v>1</v></c></row>'
+    '<row r="4"><c r="B4" t="s"><v>1</v></c></row>'
+    '<row r="5"><c r="B5" t="str"><v>texto</v></c><c r="E5"/></row>'
+    '<row r="6"/>'
+)
+ESPERADO = [["NOME", "VALOR"], [], [45123, "", 0.5, True], [], ["", "texto"]]
+
+
+class ReadXlsxTest(unittest.TestCase):
+    def test_linhas(self):
+        linhas = leitura_local.read_xlsx(xlsx(PLANILHA, ["NOME", ""]))
+        self.assertIsInstance(linhas, types.GeneratorType)
+        self.assertEqual(list(linhas), ESPERADO)
+
+    def test_sem_referencias(self):
+        sem_r = '<row><c t="inlineStr"><is><t>a</t></is></c><c><v>2</v></c></row><row/><row><c/><c><v>3</v></c></row>'
+        self.assertEqual(list(leitura_local.read_xlsx(xlsx(sem_r))), [["a", 2], [], ["", 3]])
+
+    def test_aba_vazia(self):
+        self.assertEqual(list(leitura_local.read_xlsx(xlsx(""))), [])
+        self.assertEqual(leitura_local.xlsx_size(xlsx("")), (0, 0))
+
+
+class ReadLocalTest(unittest.TestCase):
+    def test_tamanho_e_linhas(self):
+        linhas, colunas, rows = leitura_local.read_local(xlsx(PLANILHA, ["NOME", ""]), leitura_local.MIME_XLSX)
+        # teto: a linha 4 só tem a string vazia, que read_xlsx não entrega
+        self.assertEqual((linhas, colunas), (5, 4))
+        self.assertEqual(list(rows), ESPERADO)
+
+    def test_data_iso_falha_antes_das_linhas(self):
+        com_data = '<row r="1"><c r="A1"><v>1</v></c></row><row r="2"><c r="A2" t="d"><v>2024-01-02</v></c></row>'
+        with self.assertRaises(FormatoNaoSuportado):
+            leitura_local.read_local(xlsx(com_data), leitura_local.MIME_XLSX)
+
+    def test_formula_com_valor_calculado(self):
+        com_formula = ('<row r="1"><c r="A1"><v>2</v></c><c r="B1"><f>A1*2</f><v>4</v></c>'
+                       '<c r="C1" t="str"><f>"x"&amp;A1</f><v>x2</v></c></row>')
+        linhas, colunas, rows = leitura_local.read_local(xlsx(com_formula), leitura_local.MIME_XLSX)
+        self.assertEqual(list(rows), [[2, 4, "x2"]])
+
+    def test_formula_sem_valor_calculado(self):
+        sem_v = '<row r="1"><c r="A1"><v>2</v></c></row><row r="2"><c r="B2"><f>A1*2</f></c></row>'
+        for planilha in (sem_v, sem_v + '<row r="3"><c r="A3"><v>1</v></c></row>'):  # na última célula e no meio
+            with self.assertRaisesRegex(FormatoNaoSuportado, "B2"):
+                leitura_local.read_local(xlsx(planilha), leitura_local.MIME_XLSX)
+            with self.assertRaisesRegex(FormatoNaoSuportado, "B2"):
+                list(leitura_local.read_xlsx(xlsx(planilha)))
+
+    def test_sem_leitor(self):
+        self.assertFalse(leitura_local.suportado("text/csv", "base.csv"))
+        with self.assertRaises(FormatoNaoSuportado):
+            leitura_local.read_local(io.BytesIO(b""), "text/csv", "base.csv")
+
+
+if __name__ == "__main__":
+    unittest.main()
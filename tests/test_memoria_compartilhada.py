@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Modo multiprocesso do Importar_BD_Geral.py: FONTE colunar na memória compartilhada e de volta."""
+import contextlib
+import gc
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import Importar_BD_Geral as imp  # noqa: E402
+
+HEADER = ["DATA", "NOME", "SETOR", "EQUIPE", "MATRICULA", "ENTRADA", "VALOR"]
+
+
+def linhas(n: int) -> list[list]:
+    return [[f"{i % 28 + 1:02d}/01/2024", f"Pessoa {i}", f"Setor {i % 3}", f"Equipe {'AB'[i % 2]}", f"{i:06d}",
+             "08:30" if i % 5 else "", f"{i},5" if i % 7 else "n/d"] for i in range(n)]
+
+
+class CompartilhadaTest(unittest.TestCase):
+    def setUp(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.dados = imp.load_blocks([[HEADER] + linhas(60)], len(HEADER), colunar=True)
+        self.shm, descritor = imp.share_source(self.dados)
+        self.addCleanup(self.shm.unlink)
+        self.addCleanup(self.shm.close)
+        self.fonte = imp.FonteCompartilhada(dict(descritor, modified="2024-01-01T00:00:00Z"))
+        self.addCleanup(lambda: getattr(self, "fonte", None) and self.fonte.fechar())
+
+    def test_take_rows_igual_ao_original(self):
+        headers, store, col_d, ncols = self.fonte.get()
+        original = self.dados[1]
+        self.assertEqual((headers, ncols), (self.dados[0], self.dados[3]))
+        idxs = [0, 5, 7, 31, 59]
+        self.assertEqual(imp.take_rows(store, idxs), imp.take_rows(original, idxs))
+        self.assertEqual(imp.take_rows(store, range(60)), imp.take_rows(original, range(60)))
+        self.assertEqual(imp.match_d_dictionary(col_d, {"equipe a"}), imp.match_d_dictionary(self.dados[2], {"equipe a"}))
+
+    def test_fechar_solta_o_bloco(self):
+        erros = []
+        hook, sys.unraisablehook = sys.unraisablehook, erros.append
+        self.addCleanup(setattr, sys, "unraisablehook", hook)
+        imp.take_rows(self.fonte.get()[1], [0, 1])
+        self.fonte.fechar()
+        self.assertIsNone(self.fonte.get())
+        self.fonte.fechar()  # 2ª vez (atexit depois de um fechamento explícito) não faz nada
+        del self.fonte
+        gc.collect()
+        self.assertEqual([e.exc_value for e in erros], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""perfil._Cpu: perfis por thread (até o 3.11) no fim da execução."""
+import os
+import pstats
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import perfil  # noqa: E402
+
+
+def trabalho_terminado():
+    return sum(i * i for i in range(20000))
+
+
+def trabalho_vivo(liberar: threading.Event):
+    liberar.wait()
+    return sum(i for i in range(20000))
+
+
+class CpuTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="teste_perfil_")
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        self.base = os.path.join(self.dir, "script")
+
+    def funcoes(self) -> set:
+        return {nome for _, _, nome in pstats.Stats(f"{self.base}_cpu.pstats").stats}
+
+    def test_threads(self):
+        cpu = perfil._Cpu()
+        cpu.iniciar()
+        terminada = threading.Thread(target=trabalho_terminado)
+        terminada.start()
+        terminada.join()
+        liberar = threading.Event()
+        viva = threading.Thread(target=trabalho_vivo, args=(liberar,))
+        viva.start()
+        try:
+            cpu.parar(self.base)
+        finally:
+            liberar.set()
+            viva.join()
+        with open(f"{self.base}_cpu.txt", encoding="utf-8") as f:
+            cabecalho = f.readline()
+        self.assertIn("trabalho_terminado", self.funcoes())
+        if sys.version_info < (3, 12):
+            self.assertIn("2 thread(s); 1 ainda ativa(s) no fim, fora do relatório", cabecalho)
+            self.assertNotIn("trabalho_vivo", self.funcoes())
+
+
+if __name__ == "__main__":
+    unittest.main()
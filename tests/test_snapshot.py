@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Snapshot local de 'bd_geral' (ponto_geral.GERAR_SNAPSHOT → Importar_BD_Geral.USAR_SNAPSHOT) contra o
+emulador, no cenário do bench_ponta_a_ponta: o 'bd' de cada destino tem que sair igual ao da
+leitura pela API, inclusive com números em colunas que o Importar não converte. O emulador formata
+frações com vírgula (como uma planilha pt_BR), para o texto formatado diferir do valor cru.
+"""
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bench"))
+
+import bench_ponta_a_ponta as bench  # noqa: E402
+import cota  # noqa: E402
+import emulador  # noqa: E402
+import estado  # noqa: E402
+import Importar_BD_Geral as imp  # noqa: E402
+import ponto_geral as ponto  # noqa: E402
+from emulador import Emulador  # noqa: E402
+
+FORMATADO = emulador._formatado
+
+AJUSTES = {
+    ponto: {"BATCH": 50, "MAX_CELLS_PER_BATCH": 1200, "GERAR_SNAPSHOT": True},
+    imp: {"CHUNK": 50, "MAX_CELLS_PER_BATCH": 1200, "LEITURA_JANELA": 40, "PULAR_SE_INALTERADO": False,
+          "DEST_WORKERS": 1, "USAR_SNAPSHOT": False},
+}
+
+
+def formatado_pt_br(v):
+    texto = FORMATADO(v)
+    return texto.replace(".", ",") if isinstance(v, float) else texto
+
+
+def linhas_com_numeros_em_texto(n: int) -> list[list]:
+    """Linhas do bench com números (inteiros e frações) também em colunas sem conversão."""
+    linhas = bench.gerar_linhas(n, 25, imp.TIME_COLS, imp.NUMBER_COLS, seed=7)
+    livres = [2] + [j for j in range(5, 25) if bench._letra(j + 1) not in imp.TIME_COLS | imp.NUMBER_COLS]
+    for i, row in enumerate(linhas[1:], 1):
+        j = livres[i % len(livres)]
+        if j < len(row):
+            row[j] = (45123, 0.75, 1234.5, 7)[i % 4]
+    return linhas
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self._antes = {(m, k): getattr(m, k) for m, ajustes in AJUSTES.items()
+                       for k in list(ajustes) + ["LIMITE_ESCRITA", "LIMITE_LEITURA"]}
+        self.addCleanup(lambda: [setattr(m, k, v) for (m, k), v in self._antes.items()])
+        for m, ajustes in AJUSTES.items():
+            for k, v in ajustes.items():
+                setattr(m, k, v)
+            m.LIMITE_ESCRITA = cota.AdaptiveRateLimiter(1e9, 1e9, 1e9)
+            m.LIMITE_LEITURA = cota.AdaptiveRateLimiter(1e9, 1e9, 1e9)
+        estado_dir, estado.ESTADO_DIR = estado.ESTADO_DIR, tempfile.mkdtemp(prefix="teste_estado_")
+        self.addCleanup(shutil.rmtree, estado.ESTADO_DIR, True)
+        self.addCleanup(setattr, estado, "ESTADO_DIR", estado_dir)
+        for modulo in (emulador, bench):
+            patch = mock.patch.object(modulo, "_formatado", formatado_pt_br)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.emu = Emulador()
+        self.linhas = linhas_com_numeros_em_texto(400)
+        self.destinos = bench.montar(self.emu, ponto, imp, self.linhas, 2)
+
+    def rodar(self, fn) -> str:
+        with self.emu.instalado(), contextlib.redirect_stdout(io.StringIO()) as log:
+            fn()
+        return log.getvalue()
+
+    def bds(self) -> dict:
+        return {ssid: self.emu.valores(ssid, imp.ABA_DESTINO_DADOS) for ssid in self.destinos}
+
+    def assertBdIgualPelosDoisCaminhos(self) -> str:
+        imp.USAR_SNAPSHOT = False
+        self.rodar(imp.main)
+        pela_api = self.bds()
+        imp.USAR_SNAPSHOT = True
+        log = self.rodar(imp.main)
+        self.assertIn("Usando snapshot local", log)
+        self.assertEqual(self.bds(), pela_api)
+        self.assertEqual(bench.conferir(self.emu, ponto, imp, self.linhas, self.destinos), [])
+        return log
+
+    def test_importacao_completa(self):
+        self.rodar(ponto.importar_excel_para_bd_geral)
+        self.assertBdIgualPelosDoisCaminhos()
+
+    def test_incremental_reaproveita_o_snapshot_anterior(self):
+        self.rodar(ponto.importar_excel_para_bd_geral)
+        self.linhas = bench.alterar(self.linhas, 0.01, seed=3)
+        bench.publicar(self.emu, ponto, self.linhas)
+        log = self.rodar(ponto.importar_excel_para_bd_geral)
+        self.assertIn("Sincronização incremental", log)
+        self.assertNotIn("relido(s) da planilha", log)
+        self.assertBdIgualPelosDoisCaminhos()
+
+    def test_incremental_com_snapshot_velho_rele_os_lotes_inalterados(self):
+        self.rodar(ponto.importar_excel_para_bd_geral)
+        self.emu.alterar(ponto.SPREADSHEET_ID_DEST, ponto.ABA_CONFIG, [["obs"]], linha=5, coluna=1)  # edição à mão
+        self.linhas = bench.alterar(self.linhas, 0.01, seed=3)
+        bench.publicar(self.emu, ponto, self.linhas)
+        log = self.rodar(ponto.importar_excel_para_bd_geral)
+        self.assertIn("relido(s) da planilha", log)
+        self.assertBdIgualPelosDoisCaminhos()
+
+
+if __name__ == "__main__":
+    unittest.main()